@@ -0,0 +1,88 @@
+"""
+요청 시점 파생 피처 (NumPy 벡터화 구현)
+
+스코어링 요청 배치나 학습 DataFrame 전체를 한 번에 계산함. 행 단위 Python 루프
+대신 배열 연산만 사용하므로 배치가 커질수록 행당 비용이 줄어듦.
+features.py의 On-Demand Feature View(transaction_derived_features)가 이 함수를
+그대로 사용하며, 스코어링 서비스(compute_derived_arrays)나 학습 데이터 생성
+(compute_derived_features)에서도 직접 호출 가능.
+
+파생 피처:
+- user_merchant_distance_km: 거래 위치(lat/long) ~ 머천트 위치(merch_lat/merch_long) haversine 거리
+- amount_to_avg_ratio / amount_to_avg_7d_ratio / amount_to_avg_30d_ratio: 금액 / 사용자 평균 금액
+- amount_zscore: (금액 - 사용자 평균) / 사용자 표준편차
+
+분모가 0 이하이거나 값이 없으면 NaN (거래 이력이 없거나 한 건뿐인 사용자).
+"""
+
+from typing import Dict, Mapping
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+
+# 요청 시점에 함께 전달되어야 하는 거래 필드 (transactions 테이블 컬럼명과 동일)
+REQUEST_FIELDS = ['amount', 'lat', 'long', 'merch_lat', 'merch_long']
+
+# user_transaction_features에서 사용하는 피처
+USER_FEATURE_INPUTS = ['avg_amount', 'std_amount', 'avg_amount_7d', 'avg_amount_30d']
+
+DERIVED_FEATURES = [
+    'user_merchant_distance_km',
+    'amount_to_avg_ratio',
+    'amount_to_avg_7d_ratio',
+    'amount_to_avg_30d_ratio',
+    'amount_zscore',
+]
+
+
+def _as_float(values) -> np.ndarray:
+    """배열/Series/리스트를 float64 배열로 (None은 NaN, 이미 float64면 복사 없음)"""
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """두 좌표 배열 사이의 대원 거리 (km)"""
+    lat1, lon1, lat2, lon2 = (np.radians(_as_float(v)) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) * 0.5) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))  # a >= 0, 반올림 오차만 보정
+
+
+def safe_ratio(numerator, denominator) -> np.ndarray:
+    """numerator / denominator (분모가 0 이하 / NaN이면 NaN)"""
+    numerator, denominator = _as_float(numerator), _as_float(denominator)
+    valid = denominator > 0
+    return np.divide(numerator, denominator, out=np.full(len(numerator), np.nan), where=valid)
+
+
+def zscore(values, mean, std) -> np.ndarray:
+    """(values - mean) / std (std가 0 이하 / NaN이면 NaN)"""
+    return safe_ratio(_as_float(values) - _as_float(mean), std)
+
+
+def compute_derived_arrays(frame: Mapping) -> Dict[str, np.ndarray]:
+    """REQUEST_FIELDS + USER_FEATURE_INPUTS 컬럼을 가진 배치 전체의 파생 피처 배열
+
+    frame은 DataFrame 또는 컬럼명 -> 배열/리스트 매핑 (예: 스코어링 요청 dict).
+    DataFrame을 만들지 않으므로 작은 배치의 스코어링 경로에서는 이 함수를 사용.
+    """
+    amount = _as_float(frame['amount'])
+    avg_amount = _as_float(frame['avg_amount'])
+    return {
+        'user_merchant_distance_km': haversine_km(frame['lat'], frame['long'],
+                                                  frame['merch_lat'], frame['merch_long']),
+        'amount_to_avg_ratio': safe_ratio(amount, avg_amount),
+        'amount_to_avg_7d_ratio': safe_ratio(amount, frame['avg_amount_7d']),
+        'amount_to_avg_30d_ratio': safe_ratio(amount, frame['avg_amount_30d']),
+        'amount_zscore': zscore(amount, avg_amount, frame['std_amount']),
+    }
+
+
+def compute_derived_features(frame: Mapping) -> pd.DataFrame:
+    """compute_derived_arrays의 DataFrame 버전 (On-Demand Feature View / 학습 데이터용)"""
+    index = frame.index if isinstance(frame, pd.DataFrame) else None
+    return pd.DataFrame(compute_derived_arrays(frame), index=index)
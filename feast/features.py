@@ -5,27 +5,43 @@ Point-in-Time Join을 위한 Feature View 정의
 - 사용자 피처: 시간에 따라 변하는 거래 통계
 - 머천트 피처: 머천트별 거래 특성
 - 카테고리 피처: 카테고리별 통계
+- 거래 파생 피처: 요청 시점 계산 (On-Demand, derived_features.py)
 """
 
-from feast import Entity, FeatureView, Field
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from feast import Entity, FeatureView, Field, RequestSource, ValueType
 from feast.infra.offline_stores.contrib.postgres_offline_store.postgres_source import (
     PostgreSQLSource,
 )
+from feast.on_demand_feature_view import on_demand_feature_view
 from feast.types import Float64, Int64, String, UnixTimestamp
 from datetime import timedelta
 
+from derived_features import REQUEST_FIELDS, USER_FEATURE_INPUTS, compute_derived_features
+
 
 # =============================================================================
 # Entity 정의
 # =============================================================================
 
+# 엔티티 키 타입 (feature_store.yaml의 entity_key_type, scripts/surrogate_keys.py)
+# int면 user_id/merchant_id가 int64 대리 키이고 온라인 키도 int64_val로 직렬화됨
+with open(Path(__file__).parent / "feature_store.yaml") as f:
+    ENTITY_KEY_TYPE = (yaml.safe_load(f) or {}).get("entity_key_type", "string")
+ENTITY_VALUE_TYPE = ValueType.INT64 if ENTITY_KEY_TYPE == "int" else ValueType.STRING
+
 user = Entity(
     name="user_id",
+    value_type=ENTITY_VALUE_TYPE,
     description="사용자 고유 식별자 (익명화된 신용카드 번호)",
 )
 
 merchant = Entity(
     name="merchant_id",
+    value_type=ENTITY_VALUE_TYPE,
     description="머천트 고유 식별자",
 )
 
@@ -178,3 +194,34 @@ category_features_fv = FeatureView(
     source=category_features_source,
     description="카테고리별 거래 통계 피처",
 )
+
+
+# =============================================================================
+# On-Demand Feature View 정의 (요청 시점 계산)
+# =============================================================================
+
+# 스코어링 요청 / 학습용 Entity DataFrame에 함께 들어오는 거래 필드
+transaction_request = RequestSource(
+    name="transaction_request",
+    schema=[Field(name=name, dtype=Float64) for name in REQUEST_FIELDS],
+    description="거래 금액과 거래/머천트 위치 (transactions 테이블 컬럼)",
+)
+
+
+# 거래 파생 피처 (배치 전체를 NumPy로 한 번에 계산)
+# get_historical_features는 요청한 피처만 변환 입력으로 넘기므로, 학습 데이터 조회 시에는
+# USER_FEATURE_INPUTS(user_transaction_features의 평균/표준편차)도 함께 요청해야 함
+@on_demand_feature_view(
+    sources=[user_transaction_features_fv[USER_FEATURE_INPUTS], transaction_request],
+    schema=[
+        Field(name="user_merchant_distance_km", dtype=Float64, description="거래 위치 ~ 머천트 거리 (km)"),
+        Field(name="amount_to_avg_ratio", dtype=Float64, description="금액 / 사용자 평균 금액"),
+        Field(name="amount_to_avg_7d_ratio", dtype=Float64, description="금액 / 최근 7일 평균 금액"),
+        Field(name="amount_to_avg_30d_ratio", dtype=Float64, description="금액 / 최근 30일 평균 금액"),
+        Field(name="amount_zscore", dtype=Float64, description="사용자 금액 분포 기준 z-score"),
+    ],
+    mode="pandas",
+    description="요청 시점 거래 파생 피처",
+)
+def transaction_derived_features(inputs: pd.DataFrame) -> pd.DataFrame:
+    return compute_derived_features(inputs)
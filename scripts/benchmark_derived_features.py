@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+요청 시점 파생 피처 마이크로 벤치마크
+
+feast/derived_features.py의 벡터화 구현을 배치 크기(1 ~ 10k)별로 측정하고,
+스코어링 서비스에서 행마다 Python으로 계산하는 방식과 행당 비용을 비교:
+- row_loop: 행 단위 math 연산 (기존 방식에 해당)
+- vectorized: compute_derived_arrays (배치 전체를 NumPy로 한 번에, 스코어링 경로)
+- feast_odfv: On-Demand Feature View 변환 경로 (vectorized + Feast 래퍼)
+
+입력은 transactions.csv의 거래 필드(금액, 위치) + 합성 사용자 통계이며,
+파일이 없으면 전부 합성 데이터를 사용함.
+
+사용 예:
+    python3 scripts/benchmark_derived_features.py
+    python3 scripts/benchmark_derived_features.py --batch-sizes 1 100 10000 --output derived_bench.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FEAST_REPO = Path(__file__).parent.parent / "feast"
+DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
+sys.path.insert(0, str(FEAST_REPO))
+
+from derived_features import (DERIVED_FEATURES, EARTH_RADIUS_KM, REQUEST_FIELDS,  # noqa: E402
+                              USER_FEATURE_INPUTS, compute_derived_arrays,
+                              compute_derived_features)
+
+try:
+    from features import transaction_derived_features
+except ImportError:
+    transaction_derived_features = None
+
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+
+def load_inputs(n: int, seed: int = 42) -> pd.DataFrame:
+    """거래 필드 + 사용자 통계 n행"""
+    rng = np.random.default_rng(seed)
+    path = DATA_DIR / "transactions.csv"
+    if path.exists():
+        df = pd.read_csv(path, usecols=REQUEST_FIELDS, nrows=n)
+    else:
+        df = pd.DataFrame({'amount': rng.gamma(2.0, 40.0, n).round(2)})
+    if len(df) < n:
+        df = df.sample(n, replace=True, random_state=seed).reset_index(drop=True)
+    if 'lat' not in df:
+        df['lat'] = rng.uniform(25, 48, n)
+        df['long'] = rng.uniform(-123, -70, n)
+        df['merch_lat'] = df['lat'] + rng.uniform(-1, 1, n)
+        df['merch_long'] = df['long'] + rng.uniform(-1, 1, n)
+
+    df['avg_amount'] = rng.gamma(2.0, 40.0, n)
+    df['std_amount'] = df['avg_amount'] * rng.uniform(0.2, 1.5, n)
+    df['avg_amount_7d'] = df['avg_amount'] * rng.uniform(0.5, 1.5, n)
+    df['avg_amount_30d'] = df['avg_amount'] * rng.uniform(0.8, 1.2, n)
+    # 이력이 없거나 한 건뿐인 사용자 (분모 0 / 결측)
+    df.loc[df.sample(frac=0.02, random_state=seed).index, 'std_amount'] = 0.0
+    df.loc[df.sample(frac=0.01, random_state=seed + 1).index, USER_FEATURE_INPUTS] = np.nan
+    return df
+
+
+def _ratio(a, b):
+    return a / b if b == b and b > 0 else math.nan
+
+
+def derive_row(row: dict) -> dict:
+    """행 단위 Python 구현 (비교 기준)"""
+    lat1, lon1 = math.radians(row['lat']), math.radians(row['long'])
+    lat2, lon2 = math.radians(row['merch_lat']), math.radians(row['merch_long'])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    amount = row['amount']
+    return {
+        'user_merchant_distance_km': 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(max(a, 0.0), 1.0))),
+        'amount_to_avg_ratio': _ratio(amount, row['avg_amount']),
+        'amount_to_avg_7d_ratio': _ratio(amount, row['avg_amount_7d']),
+        'amount_to_avg_30d_ratio': _ratio(amount, row['avg_amount_30d']),
+        'amount_zscore': _ratio(amount - row['avg_amount'], row['std_amount']),
+    }
+
+
+def check_equivalence(df: pd.DataFrame) -> float:
+    """벡터화 결과와 행 단위 결과의 최대 상대 오차 (NaN 위치도 일치해야 함)"""
+    vectorized = compute_derived_features(df)[DERIVED_FEATURES].to_numpy()
+    rows = pd.DataFrame([derive_row(r) for r in df.to_dict('records')])[DERIVED_FEATURES].to_numpy()
+    if not np.array_equal(np.isnan(vectorized), np.isnan(rows)):
+        raise AssertionError("벡터화 / 행 단위 결과의 NaN 위치가 다릅니다")
+    mask = ~np.isnan(rows)
+    return float(np.max(np.abs(vectorized[mask] - rows[mask]) / np.maximum(np.abs(rows[mask]), 1e-12)))
+
+
+def time_call(fn, min_seconds: float) -> float:
+    """min_seconds 이상 반복 실행한 호출당 평균 시간 (초)"""
+    fn()  # 워밍업
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def benchmark(df: pd.DataFrame, batch_sizes, min_seconds: float):
+    results = []
+    for batch_size in batch_sizes:
+        batch = df.head(batch_size)
+        records = batch.to_dict('records')
+        # 스코어링 요청은 보통 컬럼별 리스트(dict)로 들어옴
+        columns = {c: batch[c].tolist() for c in REQUEST_FIELDS + USER_FEATURE_INPUTS}
+
+        methods = {
+            'row_loop': lambda: [derive_row(r) for r in records],
+            'vectorized': lambda: compute_derived_arrays(columns),
+        }
+        if transaction_derived_features is not None:
+            transformation = transaction_derived_features.feature_transformation
+            methods['feast_odfv'] = lambda: transformation.transform(batch)
+
+        for method, fn in methods.items():
+            seconds = time_call(fn, min_seconds)
+            results.append({
+                'batch_size': batch_size,
+                'method': method,
+                'seconds_per_batch': seconds,
+                'us_per_row': seconds / batch_size * 1e6,
+            })
+    return results
+
+
+def print_results(results):
+    methods = list(dict.fromkeys(r['method'] for r in results))
+    by_key = {(r['batch_size'], r['method']): r for r in results}
+    print(f"\n{'batch':>7}" + "".join(f" {m + ' us/row':>20}" for m in methods) + f" {'vectorized 배수':>16}")
+    for batch_size in dict.fromkeys(r['batch_size'] for r in results):
+        cells = "".join(f" {by_key[(batch_size, m)]['us_per_row']:>20.3f}" for m in methods)
+        speedup = by_key[(batch_size, 'row_loop')]['us_per_row'] / by_key[(batch_size, 'vectorized')]['us_per_row']
+        print(f"{batch_size:>7,}{cells} {speedup:>15.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요청 시점 파생 피처 벡터화 벤치마크")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--min-seconds", type=float, default=0.3, help="배치 크기/방식별 최소 측정 시간")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    df = load_inputs(max(args.batch_sizes))
+    max_error = check_equivalence(df.head(10000))
+    print(f"벡터화 / 행 단위 결과 일치 확인: 최대 상대 오차 {max_error:.2e}")
+    if transaction_derived_features is None:
+        print("Warning: Feast가 없어 feast_odfv 경로는 측정하지 않습니다")
+
+    results = benchmark(df, args.batch_sizes, args.min_seconds)
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'measured_at': datetime.now().isoformat(timespec="seconds"),
+            'max_relative_error': max_error,
+            'results': results,
+        }, indent=2))
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
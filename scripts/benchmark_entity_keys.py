@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+엔티티 키 타입 비교 벤치마크 (문자열 해시 키 vs int64 대리 키)
+
+같은 합성 스냅샷/이벤트 데이터를 두 키 타입으로 만들어 다음을 비교:
+- pandas: 키 컬럼 메모리, (키, 시각) 정렬 시간, merge_asof PIT 조인 시간
+- PostgreSQL (--postgres): (user_id, created_at) 인덱스 생성 시간 / 크기,
+  PIT 조인 시간 (LATERAL 인덱스 조회, Feast식 ROW_NUMBER 윈도우)
+- 온라인 키: Feast가 직렬화한 엔티티 키 바이트 (Redis 키 길이, feast 설치 시)
+
+문자열 키는 prepare_fraud_data.py와 같은 'user_' + MD5 앞 8자리 형식이고, 정수 키는
+키 사전이 부여하는 것과 같은 1부터의 촘촘한 정수. PostgreSQL 비교는 세션 임시 테이블을
+사용하므로 기존 features 스키마는 건드리지 않음.
+
+사용 예:
+    python3 scripts/benchmark_entity_keys.py
+    python3 scripts/benchmark_entity_keys.py --entities 50000 --days 60 --postgres --output keys.json
+"""
+
+import argparse
+import io
+import json
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from surrogate_keys import KEY_TYPES, PREFIXES, key_sql_type, string_keys
+
+FEATURE_COLUMNS = ['total_transactions', 'avg_amount', 'amount_7d', 'fraud_count']
+START = pd.Timestamp('2019-01-01')
+TTL_DAYS = 90
+
+PIT_QUERIES = {
+    # 엔티티 행마다 (user_id, created_at) 인덱스를 역순으로 한 번 조회
+    'lateral': """
+        SELECT e.row_id, f.total_transactions, f.avg_amount, f.amount_7d, f.fraud_count
+        FROM bench_events e
+        LEFT JOIN LATERAL (
+            SELECT * FROM bench_features f
+            WHERE f.user_id = e.user_id AND f.created_at <= e.event_timestamp
+            ORDER BY f.created_at DESC
+            LIMIT 1
+        ) f ON true
+    """,
+    # Feast PostgreSQL offline store와 같은 형태 (TTL 범위 조인 후 최신 행 선택)
+    'window': f"""
+        SELECT row_id, total_transactions, avg_amount, amount_7d, fraud_count
+        FROM (
+            SELECT e.row_id, f.total_transactions, f.avg_amount, f.amount_7d, f.fraud_count,
+                   ROW_NUMBER() OVER (PARTITION BY e.row_id ORDER BY f.created_at DESC) AS rn
+            FROM bench_events e
+            JOIN bench_features f
+              ON f.user_id = e.user_id
+             AND f.created_at <= e.event_timestamp
+             AND f.created_at > e.event_timestamp - INTERVAL '{TTL_DAYS} days'
+        ) ranked
+        WHERE rn = 1
+    """,
+}
+
+
+def generate_tables(n_entities: int, days: int, n_events: int, seed: int = 42):
+    """엔티티별 일별 스냅샷 + 이벤트 (키는 1..n_entities 정수)"""
+    rng = np.random.default_rng(seed)
+    keys = np.repeat(np.arange(1, n_entities + 1, dtype=np.int64), days)
+    day = np.tile(np.arange(days), n_entities)
+    snapshots = pd.DataFrame({
+        'user_id': keys,
+        'created_at': START + pd.to_timedelta(day + 1, unit='D'),
+        'total_transactions': day + rng.integers(1, 5, len(keys)),
+        'avg_amount': rng.gamma(2.0, 40.0, len(keys)).round(2),
+        'amount_7d': rng.gamma(2.0, 200.0, len(keys)).round(2),
+        'fraud_count': rng.poisson(0.05, len(keys)),
+    })
+
+    events = pd.DataFrame({
+        'row_id': np.arange(n_events, dtype=np.int64),
+        'user_id': rng.integers(1, n_entities + 1, n_events),
+        'event_timestamp': START + pd.to_timedelta(rng.uniform(0, days + 1, n_events), unit='D').round('s'),
+    })
+    return snapshots, events
+
+
+def with_key_type(df: pd.DataFrame, key_type: str, string_map: pd.Series) -> pd.DataFrame:
+    if key_type == 'int':
+        return df
+    df = df.copy()
+    df['user_id'] = string_map.reindex(df['user_id']).to_numpy()
+    return df
+
+
+def timed(func: Callable, repeats: int) -> Dict:
+    seconds = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - t0)
+    return {'min_s': min(seconds), 'median_s': statistics.median(seconds)}
+
+
+def bench_pandas(snapshots: pd.DataFrame, events: pd.DataFrame, repeats: int) -> Dict:
+    """키 컬럼 메모리, 정렬, merge_asof PIT 조인"""
+    result = {
+        'key_bytes_per_row': snapshots['user_id'].memory_usage(deep=True, index=False) / len(snapshots),
+        'sort': timed(lambda: snapshots.sort_values(['user_id', 'created_at'], kind='stable'), repeats),
+    }
+    left = events.sort_values('event_timestamp', kind='stable')
+    right = snapshots.sort_values('created_at', kind='stable')
+    result['merge_asof'] = timed(lambda: pd.merge_asof(
+        left, right, left_on='event_timestamp', right_on='created_at', by='user_id',
+        direction='backward', allow_exact_matches=True,
+    ), repeats)
+    return result
+
+
+def copy_frame(cur, table: str, df: pd.DataFrame):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH CSV", buffer)
+
+
+def bench_postgres(snapshots: pd.DataFrame, events: pd.DataFrame, key_type: str, repeats: int) -> Dict:
+    """세션 임시 테이블로 인덱스 크기 / PIT 조인 시간 측정"""
+    from service_clients import get_postgres_pool
+
+    key_sql = key_sql_type(key_type)
+    pool = get_postgres_pool(maxconn=1, statement_timeout_ms=0, application_name="mmp-benchmark-entity-keys")
+    result = {}
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS bench_features, bench_events")
+            cur.execute(f"""
+                CREATE TEMP TABLE bench_features (
+                    id SERIAL PRIMARY KEY,
+                    user_id {key_sql} NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    total_transactions INTEGER,
+                    avg_amount DECIMAL(10,2),
+                    amount_7d DECIMAL(12,2),
+                    fraud_count INTEGER
+                )
+            """)
+            cur.execute(f"""
+                CREATE TEMP TABLE bench_events (
+                    row_id BIGINT PRIMARY KEY,
+                    user_id {key_sql} NOT NULL,
+                    event_timestamp TIMESTAMP NOT NULL
+                )
+            """)
+            copy_frame(cur, 'bench_features', snapshots[['user_id', 'created_at'] + FEATURE_COLUMNS])
+            copy_frame(cur, 'bench_events', events[['row_id', 'user_id', 'event_timestamp']])
+
+            t0 = time.perf_counter()
+            cur.execute("CREATE INDEX bench_features_user_created ON bench_features(user_id, created_at)")
+            result['index_build_s'] = time.perf_counter() - t0
+            cur.execute("ANALYZE bench_features")
+            cur.execute("ANALYZE bench_events")
+
+            cur.execute("SELECT pg_relation_size('bench_features_user_created'), pg_relation_size('bench_features')")
+            index_bytes, table_bytes = cur.fetchone()
+            result['index_bytes'] = int(index_bytes)
+            result['table_bytes'] = int(table_bytes)
+
+            for name, query in PIT_QUERIES.items():
+                cur.execute(query)  # 캐시 워밍업
+                result[name] = timed(lambda: (cur.execute(query), cur.fetchall()), repeats)
+        conn.rollback()
+    return result
+
+
+def serialized_key_bytes(values: List) -> float:
+    """Feast가 Redis 키로 쓰는 직렬화 엔티티 키의 평균 길이 (feast 없으면 None)"""
+    try:
+        from feast.infra.key_encoding_utils import serialize_entity_key
+        from feast.protos.feast.types.EntityKey_pb2 import EntityKey as EntityKeyProto
+        from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+    except ImportError:
+        return None
+    sizes = []
+    for value in values:
+        proto = (ValueProto(int64_val=int(value)) if isinstance(value, (int, np.integer))
+                 else ValueProto(string_val=str(value)))
+        key = EntityKeyProto(join_keys=['user_id'], entity_values=[proto])
+        sizes.append(len(serialize_entity_key(key, entity_key_serialization_version=3)))
+    return float(np.mean(sizes))
+
+
+def print_results(results: Dict, meta: Dict):
+    print("\n" + "=" * 72)
+    print(f"엔티티 키 타입 비교 (엔티티 {meta['entities']:,}, 스냅샷 {meta['snapshot_rows']:,}행, "
+          f"이벤트 {meta['events']:,}행)")
+    print("=" * 72)
+    print(f"{'':<30}" + "".join(f"{key_type:>14}" for key_type in KEY_TYPES) + f"{'int/string':>14}")
+
+    def row(label, path, fmt):
+        values = []
+        for key_type in KEY_TYPES:
+            value = results[key_type]
+            for part in path:
+                value = value.get(part) if isinstance(value, dict) else None
+            values.append(value)
+        if any(v is None for v in values):
+            return
+        ratio = values[1] / values[0] if values[0] else float('nan')
+        print(f"{label:<30}" + "".join(f"{fmt(v):>14}" for v in values) + f"{ratio:>13.2f}x")
+
+    ms = lambda v: f"{v * 1000:.1f}ms"
+    row("키 컬럼 (B/행, pandas)", ('pandas', 'key_bytes_per_row'), lambda v: f"{v:.1f}")
+    row("(키, 시각) 정렬", ('pandas', 'sort', 'min_s'), ms)
+    row("merge_asof PIT 조인", ('pandas', 'merge_asof', 'min_s'), ms)
+    row("온라인 키 (B, 직렬화)", ('online_key_bytes',), lambda v: f"{v:.1f}")
+    row("PG 인덱스 크기", ('postgres', 'index_bytes'), lambda v: f"{v / 1024 / 1024:.2f}MB")
+    row("PG 테이블 크기", ('postgres', 'table_bytes'), lambda v: f"{v / 1024 / 1024:.2f}MB")
+    row("PG 인덱스 생성", ('postgres', 'index_build_s'), ms)
+    for name in PIT_QUERIES:
+        row(f"PG PIT 조인 ({name})", ('postgres', name, 'min_s'), ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문자열 해시 키 vs int64 대리 키 PIT 조인 / 인덱스 크기 비교")
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=30, help="엔티티당 일별 스냅샷 수")
+    parser.add_argument("--events", type=int, default=50000, help="PIT 조인할 이벤트(엔티티 행) 수")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--postgres", action="store_true", help="PostgreSQL 임시 테이블로 인덱스 크기 / SQL PIT 조인도 측정")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    print("Generating synthetic tables...")
+    snapshots, events = generate_tables(args.entities, args.days, args.events)
+    ids = pd.Series(np.arange(1, args.entities + 1, dtype=np.int64))
+    string_map = pd.Series(string_keys(ids, PREFIXES['user_id']).to_numpy(), index=ids)
+
+    results = {}
+    for key_type in KEY_TYPES:
+        print(f"Benchmarking {key_type} keys...")
+        key_snapshots = with_key_type(snapshots, key_type, string_map)
+        key_events = with_key_type(events, key_type, string_map)
+        results[key_type] = {
+            'pandas': bench_pandas(key_snapshots, key_events, args.repeats),
+            'online_key_bytes': serialized_key_bytes(key_events['user_id'].head(1000).tolist()),
+        }
+        if args.postgres:
+            results[key_type]['postgres'] = bench_postgres(key_snapshots, key_events, key_type, args.repeats)
+
+    meta = {'entities': args.entities, 'days': args.days, 'snapshot_rows': len(snapshots),
+            'events': len(events), 'repeats': args.repeats}
+    print_results(results, meta)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            **meta,
+            'measured_at': datetime.now().isoformat(timespec="seconds"),
+            'results': results,
+        }, indent=2))
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
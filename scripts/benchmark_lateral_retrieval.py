@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Historical Retrieval 벤치마크 (Feast PostgreSQL offline store vs LATERAL 인덱스 조회)
+
+entity_df 크기별로 같은 피처를 두 경로로 조회하여 시간과 결과 일치를 비교:
+- feast    store.get_historical_features(...).to_df() (TTL 범위 조인 + 윈도우 순위)
+- lateral  lateral_retrieval.get_historical_features_lateral (뷰별 LATERAL 인덱스 조회)
+
+entity_df는 transactions.csv에서 뽑으며, 요청 크기가 거래 수보다 크면 복원 추출함.
+PostgreSQL에 데이터가 로드되어 있고 `feast apply`가 끝난 상태여야 함.
+
+사용 예:
+    python3 scripts/benchmark_lateral_retrieval.py
+    python3 scripts/benchmark_lateral_retrieval.py --sizes 1000 10000 100000 --repeats 3 --output lateral.json
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from lateral_retrieval import DATA_DIR, DEFAULT_FEATURES, FEAST_REPO, FeatureStore, get_historical_features_lateral
+
+DEFAULT_SIZES = [1000, 10000, 50000, 200000]
+
+
+def sample_entity_df(transactions: pd.DataFrame, n: int, seed: int = 42) -> pd.DataFrame:
+    entity_df = transactions.sample(n=n, replace=n > len(transactions), random_state=seed)
+    return entity_df.sort_values('event_timestamp', kind='mergesort').reset_index(drop=True)
+
+
+def count_value_mismatches(expected: pd.DataFrame, actual: pd.DataFrame, columns: List[str]) -> int:
+    """같은 행 순서의 두 결과에서 다른 값 수 (NaN끼리는 일치로 봄)"""
+    expected = expected[columns].reset_index(drop=True)
+    actual = actual[columns].reset_index(drop=True)
+    equal = (expected == actual).fillna(False).astype(bool) | (expected.isna() & actual.isna())
+    return int((~equal).to_numpy().sum())
+
+
+def bench_size(store: FeatureStore, entity_df: pd.DataFrame, features: List[str], repeats: int) -> Dict:
+    feast_seconds, lateral_seconds = [], []
+    feast_input = entity_df.assign(__row=np.arange(len(entity_df)))
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        feast_df = store.get_historical_features(entity_df=feast_input, features=features).to_df()
+        feast_seconds.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        result, report = get_historical_features_lateral(store, entity_df, features)
+        lateral_seconds.append(time.perf_counter() - t0)
+
+    columns = [c for c in result.columns if c not in entity_df.columns]
+    feast_df = feast_df.set_index('__row').reindex(np.arange(len(entity_df)))
+    return {
+        'rows': len(entity_df),
+        'feast_s': min(feast_seconds),
+        'lateral_s': min(lateral_seconds),
+        'lateral_upload_s': report.upload_seconds,
+        'lateral_join_s': report.join_seconds,
+        'speedup': min(feast_seconds) / min(lateral_seconds),
+        'mismatches': count_value_mismatches(feast_df, result, columns),
+    }
+
+
+def print_results(results: List[Dict]):
+    print("\n" + "=" * 78)
+    print("Historical Retrieval: Feast PostgreSQL vs LATERAL 인덱스 조회")
+    print("=" * 78)
+    print(f"{'entity_df':>10} {'feast':>10} {'lateral':>10} {'(upload)':>10} {'(join)':>10} {'speedup':>9} {'불일치':>8}")
+    for r in results:
+        print(f"{r['rows']:>10,} {r['feast_s']:>9.2f}s {r['lateral_s']:>9.2f}s {r['lateral_upload_s']:>9.2f}s "
+              f"{r['lateral_join_s']:>9.2f}s {r['speedup']:>8.2f}x {r['mismatches']:>8,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feast PIT SQL vs LATERAL 인덱스 조회 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="entity_df 행 수")
+    parser.add_argument("--feature", action="append", help="피처 참조 (기본: test_point_in_time_join과 동일)")
+    parser.add_argument("--repeats", type=int, default=1, help="크기별 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    features = args.feature or DEFAULT_FEATURES
+    transactions = pd.read_csv(DATA_DIR / "transactions.csv", parse_dates=['event_timestamp'])
+    store = FeatureStore(repo_path=str(FEAST_REPO))
+
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking entity_df {size:,} rows...")
+        results.append(bench_size(store, sample_entity_df(transactions, size), features, args.repeats))
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'features': features,
+            'repeats': args.repeats,
+            'measured_at': datetime.now().isoformat(timespec="seconds"),
+            'results': results,
+        }, indent=2))
+        print(f"\n결과 저장: {args.output}")
+
+    if any(r['mismatches'] for r in results):
+        print("\nError: LATERAL 결과가 Feast 결과와 다릅니다")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Online store 레이아웃 비교 벤치마크 (기본 Redis vs Packed-vector Redis)
+
+같은 Feature View 값을 두 store에 각각 써 넣고 다음을 비교:
+- 메모리: 엔티티 키별 MEMORY USAGE 합계 (엔티티당 바이트)
+- 쓰기 시간: online_write_batch
+- 읽기 지연: 배치 크기별 online_read (Redis 조회 + ValueProto 디코딩) p50/p99
+
+두 store는 서로 다른 project 이름으로 키를 분리하며, 끝나면 쓴 키를 삭제함.
+Redis 접속 정보는 .env / 환경 변수(REDIS_HOST, REDIS_PORT)를 따름.
+
+사용 예:
+    docker-compose up -d redis
+    python3 scripts/benchmark_online_store.py --entities 20000
+    python3 scripts/benchmark_online_store.py --view merchant_features --output bench.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from service_clients import get_redis, get_settings
+
+FEAST_REPO = Path(__file__).parent.parent / "feast"
+DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
+sys.path.insert(0, str(FEAST_REPO))
+
+# Feast 임포트
+try:
+    from feast import RepoConfig
+    from feast.infra.online_stores.helpers import _redis_key
+    from feast.infra.online_stores.redis import RedisOnlineStore
+    from feast.protos.feast.types.EntityKey_pb2 import EntityKey as EntityKeyProto
+    from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+    from feast.types import Float32, Float64, String
+
+    import features
+    from packed_redis_online_store import PackedRedisOnlineStore, packed_keys
+except ImportError as e:
+    print(f"Feast가 설치되어 있지 않습니다: {e}")
+    print("설치: pip install feast[postgres]")
+    exit(1)
+
+VIEWS = {
+    'user_transaction_features': (features.user_transaction_features_fv, 'user_id', 'user_features.csv'),
+    'merchant_features': (features.merchant_features_fv, 'merchant_id', 'merchant_features.csv'),
+}
+BATCH_SIZES = [1, 10, 100, 1000]
+SYNTHETIC_INT_KEY_BASE = 10 ** 12
+
+
+def repo_config(project: str, online_store: dict) -> RepoConfig:
+    return RepoConfig(
+        project=project,
+        provider="local",
+        registry=str(FEAST_REPO / "data" / "registry.db"),
+        online_store=online_store,
+        entity_key_serialization_version=3,
+    )
+
+
+def load_rows(view, join_key: str, csv_name: str, n: int, seed: int = 42) -> pd.DataFrame:
+    """엔티티별 최신 스냅샷 n개 (CSV가 없거나 부족하면 합성 데이터로 채움)"""
+    rng = np.random.default_rng(seed)
+    path = DATA_DIR / csv_name
+    if path.exists():
+        df = pd.read_csv(path, parse_dates=['created_at'])
+        df = df.sort_values('created_at').groupby(join_key, sort=False).tail(1)
+    else:
+        df = None
+
+    if df is None or len(df) < n:
+        extra = n - (0 if df is None else len(df))
+        if features.ENTITY_KEY_TYPE == 'int':
+            # 키 사전이 부여하는 범위와 겹치지 않는 정수 키
+            keys = SYNTHETIC_INT_KEY_BASE + np.arange(extra, dtype=np.int64)
+        else:
+            keys = [f"synthetic_{i}" for i in range(extra)]
+        synthetic = {join_key: keys,
+                     'created_at': pd.Timestamp('2020-06-01')}
+        for f in view.features:
+            if f.dtype == String:
+                synthetic[f.name] = rng.choice(['grocery_pos', 'shopping_net', 'travel'], extra)
+            elif f.dtype in (Float32, Float64):
+                synthetic[f.name] = rng.gamma(2.0, 50.0, extra).round(2)
+            else:
+                synthetic[f.name] = rng.integers(0, 2000, extra)
+        synthetic = pd.DataFrame(synthetic)
+        df = synthetic if df is None else pd.concat([df, synthetic], ignore_index=True)
+    return df.head(n).reset_index(drop=True)
+
+
+def entity_value(value) -> 'ValueProto':
+    """엔티티 키 ValueProto (int64 대리 키면 int64_val, 아니면 string_val)"""
+    if isinstance(value, (int, np.integer)):
+        return ValueProto(int64_val=int(value))
+    return ValueProto(string_val=str(value))
+
+
+def to_feast_rows(view, join_key: str, df: pd.DataFrame):
+    rows = []
+    for record in df.to_dict('records'):
+        values = {}
+        for f in view.features:
+            value = record.get(f.name)
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                values[f.name] = ValueProto()
+            elif f.dtype == String:
+                values[f.name] = ValueProto(string_val=str(value))
+            elif f.dtype in (Float32, Float64):
+                values[f.name] = ValueProto(double_val=float(value))
+            else:
+                values[f.name] = ValueProto(int64_val=int(value))
+        entity_key = EntityKeyProto(join_keys=[join_key], entity_values=[entity_value(record[join_key])])
+        timestamp = pd.Timestamp(record['created_at']).to_pydatetime().replace(tzinfo=timezone.utc)
+        rows.append((entity_key, values, timestamp, None))
+    return rows
+
+
+def redis_keys(store, config: RepoConfig, view, entity_keys):
+    """store가 실제로 사용하는 Redis 키"""
+    if isinstance(store, PackedRedisOnlineStore):
+        return packed_keys(config, view, entity_keys)
+    return [_redis_key(config.project, k, config.entity_key_serialization_version) for k in entity_keys]
+
+
+def memory_usage(client, keys) -> int:
+    with client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.memory_usage(key, samples=0)
+        return sum(v or 0 for v in pipe.execute())
+
+
+def delete_keys(client, keys):
+    for i in range(0, len(keys), 1000):
+        client.delete(*keys[i:i + 1000])
+
+
+def bench_store(name, store, config, view, rows, repeats: int, seed: int = 42):
+    client = get_redis()
+    entity_keys = [r[0] for r in rows]
+    keys = redis_keys(store, config, view, entity_keys)
+    delete_keys(client, keys)
+
+    t0 = time.perf_counter()
+    for i in range(0, len(rows), 1000):
+        store.online_write_batch(config, view, rows[i:i + 1000], None)
+    write_seconds = time.perf_counter() - t0
+    memory = memory_usage(client, keys)
+
+    rng = np.random.default_rng(seed)
+    reads = {}
+    for batch_size in BATCH_SIZES:
+        if batch_size > len(entity_keys):
+            continue
+        latencies = []
+        for _ in range(repeats):
+            picked = [entity_keys[i] for i in rng.choice(len(entity_keys), batch_size, replace=False)]
+            t = time.perf_counter()
+            result = store.online_read(config, view, picked)
+            latencies.append(time.perf_counter() - t)
+            assert len(result) == batch_size
+        latencies = np.array(latencies) * 1000
+        reads[batch_size] = {
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'keys_per_second': float(batch_size / (latencies.mean() / 1000)),
+        }
+
+    delete_keys(client, keys)
+    return {
+        'store': name,
+        'entities': len(rows),
+        'memory_bytes': memory,
+        'bytes_per_entity': memory / len(rows),
+        'write_seconds': write_seconds,
+        'reads': reads,
+    }
+
+
+def print_results(view_name: str, results):
+    stock, packed = results
+    print(f"\n[{view_name}] 엔티티 {stock['entities']:,}개")
+    print(f"{'store':<10} {'bytes/entity':>13} {'write(s)':>9}" +
+          "".join(f" {'b=' + str(b) + ' p50/p99(ms)':>22}" for b in stock['reads']))
+    for r in results:
+        cells = "".join(f" {v['p50_ms']:>10.3f}/{v['p99_ms']:<11.3f}" for v in r['reads'].values())
+        print(f"{r['store']:<10} {r['bytes_per_entity']:>13,.1f} {r['write_seconds']:>9.2f}{cells}")
+    print(f"\n메모리 절감: {stock['memory_bytes'] / max(packed['memory_bytes'], 1):.2f}x")
+    for b in stock['reads']:
+        if b in packed['reads']:
+            print(f"배치 {b:>5} 읽기 처리량: {packed['reads'][b]['keys_per_second'] / stock['reads'][b]['keys_per_second']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기본 Redis vs Packed-vector Redis online store 비교")
+    parser.add_argument("--view", choices=list(VIEWS), default='user_transaction_features')
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=200, help="배치 크기별 읽기 반복 횟수")
+    parser.add_argument("--float-precision", choices=["float32", "float64"], default="float32")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    connection_string = f"{settings.redis_host}:{settings.redis_port}"
+    view, join_key, csv_name = VIEWS[args.view]
+    rows = to_feast_rows(view, join_key, load_rows(view, join_key, csv_name, args.entities))
+
+    stock_config = repo_config("bench_stock", {'type': 'redis', 'connection_string': connection_string})
+    packed_config = repo_config("bench_packed", {
+        'type': 'packed_redis_online_store.PackedRedisOnlineStore',
+        'connection_string': connection_string,
+        'float_precision': args.float_precision,
+    })
+
+    results = [
+        bench_store("stock", RedisOnlineStore(), stock_config, view, rows, args.repeats),
+        bench_store("packed", PackedRedisOnlineStore(), packed_config, view, rows, args.repeats),
+    ]
+    print_results(args.view, results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'view': args.view,
+            'float_precision': args.float_precision,
+            'measured_at': datetime.now().isoformat(timespec="seconds"),
+            'results': results,
+        }, indent=2))
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+전처리 성능 회귀 벤치마크 (스케일링 곡선)
+
+prepare_fraud_data.py의 테이블 빌더를 크기가 커지는 합성 입력(Kaggle 스키마)에
+각각 실행하여 다음을 측정:
+- 크기별 실행 시간 (반복 중 최솟값) / tracemalloc peak
+- log-log 회귀로 구한 경험적 스케일링 지수 (시간 ∝ rows^k)
+- 100만 행 기준 예상 시간 (지수로 외삽) / 메모리 (선형 외삽)
+
+입력 증가 방식 (--growth):
+- users: 사용자당 거래 수를 고정하고 사용자 수를 늘림 (샘플 데이터와 같은 밀도)
+- history: 사용자 수를 고정하고 사용자당 이력을 늘림 (전체 데이터셋 / 누적 데이터 증가)
+
+커밋된 기준값(benchmark_prepare_baseline.json)과 비교하여 지수 증가, 가장 큰 입력의
+시간(기준 머신 대비 보정) / 메모리가 임계값을 넘으면 종료 코드 1로 실패함.
+지수 증가는 양쪽 log-log 적합의 R^2가 --min-r2(기본 0.9) 이상일 때만 판정하고,
+그보다 낮으면 (고정 비용이나 잡음이 지배하는 빌더) 경고만 출력함.
+머신 간 속도 차이와 공유 CPU의 시간대별 속도 변화는 측정점마다 직전에 실행한
+고정 pandas 작업(calibrate) 시간으로 나눈 상대 시간(normalized)으로 보정.
+
+사용 예:
+    python3 scripts/benchmark_prepare.py
+    python3 scripts/benchmark_prepare.py --growth users --builders compute_user_features --sizes 1000 2000 4000
+    python3 scripts/benchmark_prepare.py --update-baseline
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prepare_fraud_data import (compute_user_features, prepare_category_features,
+                                prepare_merchant_features, prepare_transactions,
+                                prepare_user_demographics)
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_prepare_baseline.json"
+
+# 빌더 -> 기본 입력 크기. 벡터화된 빌더는 작은 입력에서 고정 비용이 시간을 지배하므로
+# 더 큰 입력으로 측정하고, 사용자별 루프인 compute_user_features만 작은 입력을 사용
+FAST_SIZES = [20_000, 40_000, 80_000, 160_000, 320_000]
+BUILDERS = {
+    'prepare_transactions': (prepare_transactions, FAST_SIZES),
+    'prepare_user_demographics': (prepare_user_demographics, FAST_SIZES),
+    'compute_user_features': (compute_user_features, [500, 1000, 2000, 4000, 8000]),
+    'prepare_merchant_features': (prepare_merchant_features, FAST_SIZES),
+    'prepare_category_features': (prepare_category_features, FAST_SIZES),
+}
+
+GROWTH_MODES = ('users', 'history')
+
+# 합성 입력 형태 (원본 데이터셋과 비슷하게)
+ROWS_PER_USER = 50          # 50K 샘플 / 약 1,000명
+HISTORY_USERS = 50          # history 모드의 고정 사용자 수
+N_MERCHANTS = 693
+SPAN_DAYS = 537             # 2019-01-01 ~ 2020-06-21
+START = np.datetime64('2019-01-01T00:00:00', 's')
+CATEGORIES = [
+    'entertainment', 'food_dining', 'gas_transport', 'grocery_net', 'grocery_pos',
+    'health_fitness', 'home', 'kids_pets', 'misc_net', 'misc_pos',
+    'personal_care', 'shopping_net', 'shopping_pos', 'travel',
+]
+STATES = ['CA', 'NY', 'TX', 'FL', 'PA', 'OH', 'MI', 'IL', 'MO', 'AL']
+JOBS = ['Engineer', 'Teacher', 'Nurse', 'Lawyer', 'Designer', 'Farmer', 'Chemist', 'Pilot']
+
+# 회귀 판정 기본 임계값
+MAX_EXPONENT_INCREASE = 0.3
+MAX_SLOWDOWN = 2.0
+MAX_MEMORY_GROWTH = 1.5
+# 수십 ms 빌더의 지수는 실행마다 ±0.3 정도 흔들리므로, 가장 큰 입력에서도
+# 이 배수 이상 느려졌을 때만 지수 증가를 회귀로 판정
+EXPONENT_MIN_SLOWDOWN = 1.2
+# log-log 적합의 R^2가 이보다 낮으면 (고정 비용 / 측정 잡음이 지배) 지수를 신뢰하지 않음:
+# 지수 비교는 경고만 하고, 100만 행 외삽은 선형으로 계산
+MIN_EXPONENT_R2 = 0.9
+
+
+def generate_raw(n_rows: int, n_users: int, seed: int = 42) -> pd.DataFrame:
+    """Kaggle 원본(raw_cache.load_raw 결과)과 같은 스키마의 합성 거래 n_rows건"""
+    rng = np.random.default_rng(seed)
+    n_users = max(1, min(n_users, n_rows))
+
+    # 사용자별 고정 속성
+    cc_nums = rng.choice(np.arange(4_000_000_000_000_000, 4_000_000_000_000_000 + 10 * n_users, 10,
+                                   dtype=np.int64), n_users, replace=False)
+    user_lat = rng.uniform(25, 48, n_users)
+    user_long = rng.uniform(-123, -70, n_users)
+    user_dob = START - rng.integers(18 * 365, 80 * 365, n_users).astype('timedelta64[D]')
+
+    # 머천트별 고정 속성
+    n_merchants = min(N_MERCHANTS, n_rows)
+    merchant_names = np.array([f"fraud_Merchant {i}" for i in range(n_merchants)], dtype=object)
+    merchant_category = rng.choice(np.array(CATEGORIES, dtype=object), n_merchants)
+
+    # 모든 사용자가 최소 1건을 갖도록 앞부분은 순서대로 배정
+    user = np.concatenate([np.arange(n_users), rng.integers(0, n_users, n_rows - n_users)])
+    merchant = rng.integers(0, n_merchants, n_rows)
+    offset = rng.integers(0, SPAN_DAYS * 86400, n_rows).astype('timedelta64[s]')
+    is_fraud = (rng.random(n_rows) < 0.05).astype(np.int64)
+
+    return pd.DataFrame({
+        'trans_date_trans_time': START + offset,
+        'cc_num': cc_nums[user],
+        'merchant': merchant_names[merchant],
+        'category': merchant_category[merchant],
+        'amt': np.round(rng.gamma(2.0, 40.0, n_rows) * np.where(is_fraud == 1, 5.0, 1.0), 2),
+        'gender': np.where(user % 2 == 0, 'F', 'M'),
+        'city': np.array([f"City {u % 500}" for u in range(n_users)], dtype=object)[user],
+        'state': np.array(STATES, dtype=object)[user % len(STATES)],
+        'zip': 10000 + user % 90000,
+        'lat': user_lat[user],
+        'long': user_long[user],
+        'city_pop': (1000 + user * 37 % 500_000).astype(np.int64),
+        'job': np.array(JOBS, dtype=object)[user % len(JOBS)],
+        'dob': user_dob[user],
+        'trans_num': [f"{v:032x}" for v in rng.integers(0, 2 ** 63, n_rows, dtype=np.int64)],
+        'merch_lat': user_lat[user] + rng.uniform(-1, 1, n_rows),
+        'merch_long': user_long[user] + rng.uniform(-1, 1, n_rows),
+        'is_fraud': is_fraud,
+    })
+
+
+def users_for(n_rows: int, growth: str) -> int:
+    if growth == 'users':
+        return max(1, n_rows // ROWS_PER_USER)
+    return HISTORY_USERS
+
+
+def calibrate(repeats: int = 5) -> float:
+    """머신 속도 보정용 고정 pandas 작업 시간 (초, 반복 중 최솟값)"""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'key': rng.integers(0, 1000, 200_000),
+        'ts': rng.integers(0, 10 ** 9, 200_000),
+        'value': rng.random(200_000),
+    })
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ordered = frame.sort_values('ts')
+        ordered.groupby('key')['value'].cumsum()
+        ordered.groupby('key').agg(total=('value', 'sum'), n=('value', 'size'))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _run_quiet(fn, df):
+    """빌더의 진행 메시지를 숨기고 실행"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(df)
+
+
+def measure(fn, df: pd.DataFrame, repeats: int, max_seconds: float) -> dict:
+    """실행 시간(반복 중 최솟값)과 tracemalloc peak (별도 1회 실행)
+
+    timeit과 같이 측정 중에는 GC를 끔 (이전 실행의 객체 수거 시점에 따른 편차 제거).
+    """
+    calibration = calibrate()
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = _run_quiet(fn, df)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        if times[-1] > max_seconds:
+            break
+
+    # tracemalloc은 할당마다 오버헤드가 있으므로 시간 측정과 분리
+    tracemalloc.start()
+    try:
+        _run_quiet(fn, df)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': min(times),
+        'calibration_seconds': calibration,
+        'normalized': min(times) / calibration,
+        'runs': len(times),
+        'peak_bytes': peak,
+        'rows_out': len(result),
+    }
+
+
+def fit_exponent(sizes, values) -> dict:
+    """log(value) = k * log(size) + c 최소제곱 적합 (k, R^2)"""
+    x, y = np.log(np.asarray(sizes, dtype=float)), np.log(np.asarray(values, dtype=float))
+    if len(x) < 2:
+        return {'exponent': None, 'r2': None}
+    k, c = np.polyfit(x, y, 1)
+    residual = y - (k * x + c)
+    total = np.sum((y - y.mean()) ** 2)
+    r2 = 1.0 - np.sum(residual ** 2) / total if total > 0 else 1.0
+    return {'exponent': float(k), 'r2': float(r2)}
+
+
+def exponent_reliable(summary: dict, min_r2: float = MIN_EXPONENT_R2) -> bool:
+    return summary.get('exponent') is not None and (summary.get('r2') or 0.0) >= min_r2
+
+
+def summarize(points) -> dict:
+    """크기별 측정값 -> 스케일링 지수 / 100만 행 기준 시간·메모리"""
+    sizes = [p['rows'] for p in points]
+    time_fit = fit_exponent(sizes, [p['normalized'] for p in points])
+    memory_fit = fit_exponent(sizes, [max(p['peak_bytes'], 1) for p in points])
+    largest = points[-1]
+    scale = 1_000_000 / largest['rows']
+    # 모든 행을 읽으므로 선형보다 빠를 수는 없음 (지수 < 1은 고정 비용의 영향)
+    exponent = max(time_fit['exponent'], 1.0) if exponent_reliable(time_fit) else 1.0
+    return {
+        'exponent': time_fit['exponent'],
+        'r2': time_fit['r2'],
+        'memory_exponent': memory_fit['exponent'],
+        'seconds_per_1m_rows': largest['seconds'] * scale ** exponent,
+        'seconds_per_1m_rows_linear': largest['seconds'] * scale,
+        'memory_mb_per_1m_rows': largest['peak_bytes'] * scale / 1024 / 1024,
+        'points': points,
+    }
+
+
+def run_benchmark(builders, growth_modes, sizes, repeats: int, max_seconds: float, seed: int) -> dict:
+    """sizes가 None이면 빌더별 기본 크기 사용. 같은 크기의 입력은 빌더 간에 공유"""
+    results = {}
+    for growth in growth_modes:
+        results[growth] = {}
+        inputs = {}
+        for name in builders:
+            fn, default_sizes = BUILDERS[name]
+            points = []
+            for n_rows in sizes or default_sizes:
+                if n_rows not in inputs:
+                    inputs[n_rows] = generate_raw(n_rows, users_for(n_rows, growth), seed=seed)
+                m = measure(fn, inputs[n_rows], repeats, max_seconds)
+                m['rows'] = n_rows
+                points.append(m)
+                print(f"  [{growth}] {name:<28} {n_rows:>8,} rows  {m['seconds']:>9.3f}s  "
+                      f"{m['peak_bytes'] / 1024 / 1024:>8.1f}MB  (out {m['rows_out']:,})")
+            results[growth][name] = summarize(points)
+    return results
+
+
+def print_results(results):
+    for growth, builders in results.items():
+        print(f"\n[{growth}] 스케일링 요약")
+        print(f"  {'builder':<28} {'지수 k':>7} {'R^2':>6} {'s/1M rows':>12} {'(선형)':>10} {'MB/1M rows':>11}")
+        for name, s in builders.items():
+            exponent = f"{s['exponent']:.2f}" if s['exponent'] is not None else "-"
+            r2 = f"{s['r2']:.2f}" if s['r2'] is not None else "-"
+            r2 += "" if exponent_reliable(s) else "*"
+            print(f"  {name:<28} {exponent:>7} {r2:>6} {s['seconds_per_1m_rows']:>12,.1f} "
+                  f"{s['seconds_per_1m_rows_linear']:>10,.1f} {s['memory_mb_per_1m_rows']:>11,.1f}")
+    print(f"\n  * R^2 < {MIN_EXPONENT_R2}: 지수를 신뢰할 수 없어 선형으로 외삽")
+
+
+def compare_to_baseline(results, baseline: dict, max_exponent_increase: float,
+                        max_slowdown: float, max_memory_growth: float, min_r2: float = MIN_EXPONENT_R2):
+    """기준값 대비 회귀 목록 (비교 가능한 항목이 없으면 빈 목록)
+
+    지수는 양쪽 적합의 R^2가 min_r2 이상일 때만 비교하고, 아니면 경고만 출력.
+    """
+    regressions = []
+    print(f"\n기준값 비교 (기준 측정: {baseline.get('measured_at', '?')}, {baseline.get('platform', '?')})")
+    for growth, builders in results.items():
+        for name, current in builders.items():
+            base = baseline.get('results', {}).get(growth, {}).get(name)
+            if base is None:
+                print(f"  [{growth}] {name}: 기준값 없음 - 건너뜀")
+                continue
+
+            # 양쪽에 모두 있는 가장 큰 크기에서 행당 시간/메모리 비교
+            issues = []
+            base_points = {p['rows']: p for p in base['points']}
+            common = [p for p in current['points'] if p['rows'] in base_points]
+            slowdown = memory_growth = None
+            if common:
+                point, base_point = common[-1], base_points[common[-1]['rows']]
+                slowdown = point['normalized'] / base_point['normalized']
+                memory_growth = point['peak_bytes'] / max(base_point['peak_bytes'], 1)
+                if slowdown > max_slowdown:
+                    issues.append(f"{point['rows']:,}행 시간 x{slowdown:.2f}")
+                if memory_growth > max_memory_growth:
+                    issues.append(f"{point['rows']:,}행 메모리 x{memory_growth:.2f}")
+
+            warning = ""
+            if not (exponent_reliable(current, min_r2) and exponent_reliable(base, min_r2)):
+                if current['exponent'] is not None and base['exponent'] is not None:
+                    warning = (f" (지수 비교 생략: R^2 기준 {base['r2'] or 0:.2f} / 현재 {current['r2'] or 0:.2f},"
+                               f" 최소 {min_r2})")
+            else:
+                increase = current['exponent'] - base['exponent']
+                if increase > max_exponent_increase and (slowdown or 0) > EXPONENT_MIN_SLOWDOWN:
+                    issues.append(f"지수 {base['exponent']:.2f} -> {current['exponent']:.2f}")
+
+            detail = (f"시간 x{slowdown:.2f}, 메모리 x{memory_growth:.2f}"
+                      if slowdown is not None else "공통 크기 없음")
+            status = "REGRESSION " + ", ".join(issues) if issues else "OK"
+            print(f"  [{growth}] {name:<28} {detail:<28} {status}{warning}")
+            regressions.extend(f"[{growth}] {name}: {issue}" for issue in issues)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전처리 빌더 스케일링 벤치마크 / 회귀 검사")
+    parser.add_argument("--sizes", type=int, nargs="+", help="입력 행 수 (기본: 빌더별 기본 크기)")
+    parser.add_argument("--growth", nargs="+", choices=GROWTH_MODES, default=list(GROWTH_MODES))
+    parser.add_argument("--builders", nargs="+", choices=list(BUILDERS), default=list(BUILDERS))
+    parser.add_argument("--repeats", type=int, default=7, help="크기별 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--max-seconds", type=float, default=2.0,
+                        help="한 번 실행이 이 시간을 넘으면 반복 중단")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="현재 결과로 기준값 파일 갱신")
+    parser.add_argument("--max-exponent-increase", type=float, default=MAX_EXPONENT_INCREASE)
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN)
+    parser.add_argument("--max-memory-growth", type=float, default=MAX_MEMORY_GROWTH)
+    parser.add_argument("--min-r2", type=float, default=MIN_EXPONENT_R2,
+                        help="지수 비교에 필요한 log-log 적합 R^2 (미만이면 경고만)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    sizes = sorted(set(args.sizes)) if args.sizes else None
+    calibration = calibrate()
+    print(f"머신 보정 작업: {calibration * 1000:.1f}ms")
+    print(f"증가 방식: {', '.join(args.growth)}")
+
+    results = run_benchmark(args.builders, args.growth, sizes, args.repeats, args.max_seconds, args.seed)
+    print_results(results)
+
+    report = {
+        'measured_at': datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'calibration_seconds': calibration,
+        'results': results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\n결과 저장: {args.output}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\n기준값 갱신: {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nWarning: 기준값 파일이 없습니다 ({args.baseline}) - --update-baseline으로 생성")
+        return
+
+    regressions = compare_to_baseline(
+        results, json.loads(args.baseline.read_text()),
+        args.max_exponent_increase, args.max_slowdown, args.max_memory_growth, args.min_r2,
+    )
+    if regressions:
+        print(f"\n성능 회귀 {len(regressions)}건:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("\n성능 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
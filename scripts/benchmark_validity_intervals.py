@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+스냅샷 레이아웃 비교 벤치마크 (시점 스냅샷 vs 유효 구간)
+
+같은 합성 스냅샷/이벤트 데이터로 PIT 조회를 두 레이아웃에서 비교:
+- 시점 스냅샷 (현재): created_at만 사용. 엔티티별 "t 이하 최신 행 + TTL" 조회
+    window   Feast PostgreSQL offline store와 같은 TTL 범위 조인 + ROW_NUMBER
+    lateral  (user_id, created_at) B-tree 역순 조회 LIMIT 1
+- 유효 구간: valid_from / valid_to_ttl (validity_intervals.py)
+    gist     (user_id, tsrange(valid_from, valid_to_ttl)) GiST 인덱스 + 구간 포함 조인
+    btree    (user_id, valid_from) B-tree + 구간 조건 조인
+
+pandas에서는 두 레이아웃의 결과가 같은지(merge_asof + tolerance vs 구간 조회) 확인하고
+시간을 재며, --postgres면 세션 임시 테이블로 SQL 조회 시간과 인덱스 크기를 측정함.
+GiST 인덱스에는 btree_gist 확장이 필요함 (없으면 gist 항목은 건너뜀).
+
+사용 예:
+    python3 scripts/benchmark_validity_intervals.py
+    python3 scripts/benchmark_validity_intervals.py --entities 20000 --days 180 --density 0.3 --postgres
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmark_entity_keys import FEATURE_COLUMNS, copy_frame, generate_tables, timed
+from validity_intervals import add_validity_intervals, feature_view_ttls, gist_index_sql, interval_lookup
+
+DEFAULT_TTL = feature_view_ttls().get('user_features', timedelta(days=90))
+
+POINT_QUERIES = {
+    'window': """
+        SELECT row_id, total_transactions
+        FROM (
+            SELECT e.row_id, f.total_transactions,
+                   ROW_NUMBER() OVER (PARTITION BY e.row_id ORDER BY f.created_at DESC) AS rn
+            FROM bench_events e
+            JOIN bench_snapshots f
+              ON f.user_id = e.user_id
+             AND f.created_at <= e.event_timestamp
+             AND f.created_at >= e.event_timestamp - %(ttl)s
+        ) ranked
+        WHERE rn = 1
+    """,
+    'lateral': """
+        SELECT e.row_id, f.total_transactions
+        FROM bench_events e
+        LEFT JOIN LATERAL (
+            SELECT total_transactions FROM bench_snapshots f
+            WHERE f.user_id = e.user_id
+              AND f.created_at <= e.event_timestamp
+              AND f.created_at >= e.event_timestamp - %(ttl)s
+            ORDER BY f.created_at DESC
+            LIMIT 1
+        ) f ON true
+    """,
+}
+
+INTERVAL_QUERIES = {
+    'gist': """
+        SELECT e.row_id, f.total_transactions
+        FROM bench_events e
+        LEFT JOIN bench_snapshots f
+          ON f.user_id = e.user_id
+         AND tsrange(f.valid_from, f.valid_to_ttl) @> e.event_timestamp
+    """,
+    'btree': """
+        SELECT e.row_id, f.total_transactions
+        FROM bench_events e
+        LEFT JOIN bench_snapshots f
+          ON f.user_id = e.user_id
+         AND f.valid_from <= e.event_timestamp
+         AND (f.valid_to_ttl IS NULL OR e.event_timestamp < f.valid_to_ttl)
+    """,
+}
+
+
+def make_snapshots(n_entities: int, days: int, n_events: int, density: float, ttl: timedelta, seed: int = 42):
+    """일별 스냅샷 중 density 비율만 남긴 테이블 (거래가 없는 날은 스냅샷도 없음) + 유효 구간"""
+    snapshots, events = generate_tables(n_entities, days, n_events, seed)
+    rng = np.random.default_rng(seed + 1)
+    snapshots = snapshots[rng.random(len(snapshots)) < density].reset_index(drop=True)
+    return add_validity_intervals(snapshots, 'user_id', ttl), events
+
+
+def bench_pandas(snapshots: pd.DataFrame, events: pd.DataFrame, ttl: timedelta, repeats: int) -> Dict:
+    """merge_asof + TTL tolerance (시점 스냅샷) vs 구간 조회, 결과 일치 확인"""
+    def point():
+        left = events.reset_index(drop=True).assign(_row=lambda d: d.index).sort_values('event_timestamp', kind='mergesort')
+        right = snapshots[['user_id', 'created_at'] + FEATURE_COLUMNS].sort_values('created_at', kind='mergesort')
+        return pd.merge_asof(left, right, left_on='event_timestamp', right_on='created_at', by='user_id',
+                             direction='backward', tolerance=pd.Timedelta(ttl)).sort_values('_row')
+
+    def interval():
+        return interval_lookup(events, snapshots, 'user_id', FEATURE_COLUMNS)
+
+    expected, actual = point(), interval()
+    # Feast(및 tolerance)는 created_at + ttl 시각을 포함하고 구간은 미포함이므로 그 경계만 제외하고 비교
+    boundary = (expected['created_at'] + pd.Timedelta(ttl) == expected['event_timestamp']).to_numpy()
+    lhs = expected['total_transactions'].to_numpy(dtype=float)[~boundary]
+    rhs = actual['total_transactions'].to_numpy(dtype=float)[~boundary]
+    mismatches = int((~((lhs == rhs) | (np.isnan(lhs) & np.isnan(rhs)))).sum())
+
+    return {
+        'matched_rows': int(actual['total_transactions'].notna().sum()),
+        'mismatches': mismatches,
+        'boundary_rows': int(boundary.sum()),
+        'point': timed(point, repeats),
+        'interval': timed(interval, repeats),
+    }
+
+
+def _run_queries(cur, queries: Dict[str, str], params: Dict, repeats: int) -> Dict:
+    result = {}
+    for name, query in queries.items():
+        cur.execute(query, params)  # 캐시 워밍업
+        rows = cur.fetchall()
+        timing = timed(lambda: (cur.execute(query, params), cur.fetchall()), repeats)
+        values = [r[1] for r in rows if r[1] is not None]
+        result[name] = {**timing, 'rows': len(rows), 'matched_rows': len(values), 'checksum': int(sum(values))}
+    return result
+
+
+def bench_postgres(snapshots: pd.DataFrame, events: pd.DataFrame, ttl: timedelta, repeats: int) -> Dict:
+    """세션 임시 테이블로 두 레이아웃의 SQL PIT 조회 / 인덱스 크기 측정"""
+    import psycopg2
+    from service_clients import get_postgres_pool
+
+    pool = get_postgres_pool(maxconn=1, statement_timeout_ms=0, application_name="mmp-benchmark-validity")
+    result = {'indexes': {}}
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS btree_gist WITH SCHEMA public")
+                conn.commit()
+                has_gist = True
+            except psycopg2.Error as e:
+                conn.rollback()
+                print(f"  btree_gist 확장을 만들 수 없어 GiST 항목을 건너뜁니다: {e.pgerror or e}")
+                has_gist = False
+
+            cur.execute("DROP TABLE IF EXISTS bench_snapshots, bench_events")
+            cur.execute("""
+                CREATE TEMP TABLE bench_snapshots (
+                    user_id BIGINT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    total_transactions INTEGER,
+                    avg_amount DECIMAL(10,2),
+                    amount_7d DECIMAL(12,2),
+                    fraud_count INTEGER,
+                    valid_from TIMESTAMP NOT NULL,
+                    valid_to TIMESTAMP,
+                    valid_to_ttl TIMESTAMP
+                )
+            """)
+            cur.execute("""
+                CREATE TEMP TABLE bench_events (
+                    row_id BIGINT PRIMARY KEY,
+                    user_id BIGINT NOT NULL,
+                    event_timestamp TIMESTAMP NOT NULL
+                )
+            """)
+            copy_frame(cur, 'bench_snapshots', snapshots[['user_id', 'created_at'] + FEATURE_COLUMNS
+                                                   + ['valid_from', 'valid_to', 'valid_to_ttl']])
+            copy_frame(cur, 'bench_events', events[['row_id', 'user_id', 'event_timestamp']])
+
+            def build_index(name, ddl):
+                t0 = time.perf_counter()
+                cur.execute(ddl)
+                cur.execute("ANALYZE bench_snapshots")
+                cur.execute("SELECT pg_relation_size(%s)", (name,))
+                result['indexes'][name] = {'build_s': time.perf_counter() - t0, 'bytes': int(cur.fetchone()[0])}
+
+            cur.execute("ANALYZE bench_events")
+            params = {'ttl': ttl}
+
+            # 현재 레이아웃: (user_id, created_at) B-tree
+            build_index('bench_user_created', "CREATE INDEX bench_user_created ON bench_snapshots(user_id, created_at)")
+            result['point'] = _run_queries(cur, POINT_QUERIES, params, repeats)
+            cur.execute("DROP INDEX bench_user_created")
+
+            result['interval'] = {}
+            if has_gist:
+                build_index('bench_validity', gist_index_sql('bench_snapshots', 'user_id', 'bench_validity'))
+                result['interval'].update(_run_queries(cur, {'gist': INTERVAL_QUERIES['gist']}, params, repeats))
+                cur.execute("DROP INDEX bench_validity")
+
+            build_index('bench_user_valid_from',
+                        "CREATE INDEX bench_user_valid_from ON bench_snapshots(user_id, valid_from) INCLUDE (valid_to_ttl)")
+            result['interval'].update(_run_queries(cur, {'btree': INTERVAL_QUERIES['btree']}, params, repeats))
+        conn.rollback()
+    return result
+
+
+def print_results(results: Dict, meta: Dict):
+    print("\n" + "=" * 72)
+    print(f"스냅샷 레이아웃 비교 (스냅샷 {meta['snapshot_rows']:,}행, 이벤트 {meta['events']:,}행, "
+          f"TTL {meta['ttl_days']}일)")
+    print("=" * 72)
+
+    pandas_result = results['pandas']
+    print(f"pandas (결과 일치: 불일치 {pandas_result['mismatches']:,}행, "
+          f"TTL 경계 {pandas_result['boundary_rows']:,}행 제외, 매칭 {pandas_result['matched_rows']:,}행)")
+    for name in ('point', 'interval'):
+        print(f"  {name:<24} {pandas_result[name]['min_s'] * 1000:>10.1f}ms")
+
+    if 'postgres' not in results:
+        return
+    pg = results['postgres']
+    baseline = pg['point']['window']['min_s']
+    print("PostgreSQL PIT 조회 (min, window 대비)")
+    for layout in ('point', 'interval'):
+        for name, r in pg[layout].items():
+            print(f"  {layout + '/' + name:<24} {r['min_s'] * 1000:>10.1f}ms {baseline / r['min_s']:>7.2f}x"
+                  f"   매칭 {r['matched_rows']:,}행, checksum {r['checksum']}")
+    print("인덱스")
+    for name, r in pg['indexes'].items():
+        print(f"  {name:<24} {r['bytes'] / 1024 / 1024:>9.2f}MB  생성 {r['build_s'] * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시점 스냅샷 vs 유효 구간 PIT 조회 비교")
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=180, help="기간 (일)")
+    parser.add_argument("--density", type=float, default=0.3, help="엔티티별로 스냅샷이 있는 날의 비율")
+    parser.add_argument("--events", type=int, default=50000, help="PIT 조회할 이벤트(엔티티 행) 수")
+    parser.add_argument("--ttl-days", type=int, default=DEFAULT_TTL.days,
+                        help="TTL (기본: feast/features.py의 user_transaction_features)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--postgres", action="store_true", help="PostgreSQL 임시 테이블로 SQL 조회 / 인덱스 크기도 측정")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    ttl = timedelta(days=args.ttl_days)
+    print("Generating synthetic snapshots...")
+    snapshots, events = make_snapshots(args.entities, args.days, args.events, args.density, ttl)
+
+    print("Benchmarking pandas lookups...")
+    results = {'pandas': bench_pandas(snapshots, events, ttl, args.repeats)}
+    if args.postgres:
+        print("Benchmarking PostgreSQL lookups...")
+        results['postgres'] = bench_postgres(snapshots, events, ttl, args.repeats)
+
+    meta = {'entities': args.entities, 'days': args.days, 'density': args.density, 'ttl_days': args.ttl_days,
+            'snapshot_rows': len(snapshots), 'events': len(events), 'repeats': args.repeats}
+    print_results(results, meta)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            **meta,
+            'measured_at': datetime.now().isoformat(timespec="seconds"),
+            'results': results,
+        }, indent=2))
+        print(f"\n결과 저장: {args.output}")
+
+    if results['pandas']['mismatches']:
+        print("\nError: 두 레이아웃의 조회 결과가 다릅니다")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+온라인(Redis) / 오프라인(PostgreSQL) 피처 일관성 검사기
+
+Feature View별로 N개 엔티티(또는 전체)를 골라:
+1. 오프라인: 엔티티 목록 전체에 대해 `DISTINCT ON` 쿼리 한 번으로
+   as-of 시점의 최신 스냅샷을 조회 (Feature View TTL 밖의 스냅샷은 제외, Feast와 동일)
+2. 온라인: feature_store.yaml에 설정된 레이아웃(기본 Redis 해시 / packed Redis 문자열)으로
+   키를 만들고, service_clients의 공용 Redis 풀로 배치 단위 파이프라인 HMGET / MGET을
+   여러 스레드에서 실행 (Redis 주소는 .env 설정을 따름, 단일 Redis만 지원)
+3. 피처별로 허용 오차를 두고 비교하여 불일치율과 처리량을 리포트
+
+엔티티 상태:
+- ok: 모든 피처 일치
+- expired: TTL 안의 스냅샷이 양쪽 모두 없음 (Feast도 값을 돌려주지 않으므로 불일치 아님)
+- missing_online: 오프라인 스냅샷은 있는데 Redis에 값이 없음 (materialize 누락)
+- missing_offline: Redis에 값은 있는데 as-of 시점 이전 오프라인 스냅샷이 없음
+- stale: Redis 값의 이벤트 시각이 오프라인 최신 스냅샷보다 이전 (materialize 이후 갱신됨)
+- value_mismatch: 같은 스냅샷인데 값이 다름
+
+사용 예:
+    python3 scripts/check_feature_consistency.py --view user_transaction_features --sample 5000
+    python3 scripts/check_feature_consistency.py --all --batch-size 1000 --workers 8
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from service_clients import get_postgres_pool, get_redis
+
+FEAST_REPO = Path(__file__).parent.parent / "feast"
+sys.path.insert(0, str(FEAST_REPO))  # feast/ 의 커스텀 online store 모듈
+
+# Feast 임포트
+try:
+    from feast import FeatureStore
+    from feast.infra.online_stores.helpers import _mmh3, _redis_key
+    from feast.protos.feast.types.EntityKey_pb2 import EntityKey as EntityKeyProto
+    from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+    from feast.type_map import feast_value_type_to_python_type
+    from feast.types import String
+    from google.protobuf.timestamp_pb2 import Timestamp
+    from packed_redis_online_store import PackedLayout, PackedRedisOnlineStoreConfig, packed_keys
+except ImportError:
+    print("Feast가 설치되어 있지 않습니다.")
+    print("설치: pip install feast[postgres]")
+    exit(1)
+
+DEFAULT_VIEWS = ['user_transaction_features', 'merchant_features']
+
+STATUS_OK = "ok"
+STATUS_EXPIRED = "expired"
+STATUS_MISSING_ONLINE = "missing_online"
+STATUS_MISSING_OFFLINE = "missing_offline"
+STATUS_STALE = "stale"
+STATUS_VALUE_MISMATCH = "value_mismatch"
+
+
+@dataclass
+class ConsistencyReport:
+    """Feature View 하나의 검사 결과"""
+    view: str
+    n_entities: int
+    status_counts: Dict[str, int]
+    feature_mismatches: Dict[str, int]
+    offline_seconds: float
+    online_seconds: float
+    compare_seconds: float
+    rows: pd.DataFrame
+
+    @property
+    def n_failed(self) -> int:
+        return self.n_entities - self.status_counts.get(STATUS_OK, 0) - self.status_counts.get(STATUS_EXPIRED, 0)
+
+    @property
+    def mismatch_rate(self) -> float:
+        return self.n_failed / self.n_entities if self.n_entities else 0.0
+
+    def print_report(self, max_examples: int = 5):
+        def rate(seconds):
+            return f"{self.n_entities / seconds:,.0f} entities/s" if seconds > 0 else "-"
+
+        print(f"\n[{self.view}] 엔티티 {self.n_entities:,}개, 불일치율 {self.mismatch_rate:.2%}")
+        print(f"  오프라인 조회: {self.offline_seconds:.2f}s ({rate(self.offline_seconds)})")
+        print(f"  온라인 조회:   {self.online_seconds:.2f}s ({rate(self.online_seconds)})")
+        print(f"  비교:          {self.compare_seconds:.2f}s")
+        for status, count in sorted(self.status_counts.items(), key=lambda kv: -kv[1]):
+            print(f"  - {status:<16} {count:>10,} ({count / max(self.n_entities, 1):.2%})")
+
+        if any(self.feature_mismatches.values()):
+            print("  피처별 값 불일치:")
+            for name, count in self.feature_mismatches.items():
+                if count:
+                    print(f"    - {name:<24} {count:>10,} ({count / max(self.n_entities, 1):.2%})")
+
+        failed = self.rows[self.rows['status'] != STATUS_OK]
+        if len(failed) and max_examples:
+            print("  예시:")
+            print(failed.head(max_examples).to_string(index=False))
+
+
+def _entity_value(value) -> 'ValueProto':
+    if isinstance(value, (int, np.integer)):
+        return ValueProto(int64_val=int(value))
+    return ValueProto(string_val=str(value))
+
+
+def _decode_value(raw: Optional[bytes]):
+    if raw is None:
+        return None
+    proto = ValueProto()
+    proto.ParseFromString(raw)
+    return _proto_value(proto)
+
+
+def _proto_value(proto: Optional['ValueProto']):
+    if proto is None or proto.WhichOneof("val") is None:
+        return None
+    return feast_value_type_to_python_type(proto)
+
+
+def _decode_timestamp(raw: Optional[bytes]) -> Optional[datetime]:
+    if raw is None:
+        return None
+    ts = Timestamp()
+    ts.ParseFromString(raw)
+    return ts.ToDatetime()
+
+
+def _ttl_start(view, as_of: datetime) -> Optional[datetime]:
+    """as_of 기준 TTL 구간 시작 (TTL이 없으면 None)"""
+    if view.ttl and view.ttl.total_seconds() > 0:
+        return as_of - view.ttl
+    return None
+
+
+def sample_entities(view, n: Optional[int], seed: int = 42) -> List:
+    """오프라인 소스의 고유 엔티티 중 n개 (None이면 전체)"""
+    join_key = view.entity_columns[0].name
+    query = f"SELECT DISTINCT {join_key} FROM {view.batch_source.get_table_query_string()} src"
+    with get_postgres_pool().cursor() as cur:
+        cur.execute(query)
+        entities = sorted(row[0] for row in cur.fetchall())
+    if n is None or n >= len(entities):
+        return entities
+    rng = np.random.default_rng(seed)
+    return [entities[i] for i in sorted(rng.choice(len(entities), size=n, replace=False))]
+
+
+def fetch_offline(view, entities: List, as_of: datetime) -> pd.DataFrame:
+    """엔티티별 as-of 최신 스냅샷 (단일 set-based 쿼리, TTL 밖의 스냅샷 제외)"""
+    join_key = view.entity_columns[0].name
+    ts_field = view.batch_source.timestamp_field
+    columns = ", ".join(f.name for f in view.features)
+    ttl_start = _ttl_start(view, as_of)
+    query = f"""
+        SELECT DISTINCT ON ({join_key}) {join_key}, {columns}, {ts_field} AS event_timestamp
+        FROM {view.batch_source.get_table_query_string()} src
+        WHERE {join_key} = ANY(%s) AND {ts_field} <= %s
+          {f"AND {ts_field} >= %s" if ttl_start else ""}
+        ORDER BY {join_key}, {ts_field} DESC
+    """
+    params = (list(entities), as_of) + ((ttl_start,) if ttl_start else ())
+    with get_postgres_pool().cursor() as cur:
+        cur.execute(query, params)
+        names = [d[0] for d in cur.description]
+        return pd.DataFrame(cur.fetchall(), columns=names)
+
+
+def fetch_online(store, view, entities: List, batch_size: int = 500, workers: int = 4) -> pd.DataFrame:
+    """공용 Redis 풀로 배치 단위 값 조회 (feature_store.yaml의 레이아웃에 맞춰 키/디코딩)
+
+    기본 store는 배치당 파이프라인 HMGET, packed store는 배치당 MGET 한 번.
+    """
+    join_key = view.entity_columns[0].name
+    names = [f.name for f in view.features]
+    config = store.config
+    version = config.entity_key_serialization_version
+    client = get_redis()
+
+    packed = isinstance(config.online_store, PackedRedisOnlineStoreConfig)
+    if packed:
+        layout = PackedLayout(view, float64=config.online_store.float_precision == "float64")
+    fields = [_mmh3(f"{view.name}:{name}") for name in names] + [f"_ts:{view.name}"]
+
+    def read_batch(chunk):
+        keys = [EntityKeyProto(join_keys=[join_key], entity_values=[_entity_value(e)]) for e in chunk]
+        if packed:
+            rows = []
+            for blob in client.mget(packed_keys(config, view, keys)):
+                ts, values = layout.unpack(bytes(blob), names) if blob else (None, None)
+                rows.append((ts.replace(tzinfo=None) if ts else None,
+                             [_proto_value(values[name]) for name in names] if values else [None] * len(names)))
+            return rows
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(_redis_key(config.project, key, entity_key_serialization_version=version), fields)
+        return [(_decode_timestamp(row[-1]), [_decode_value(raw) for raw in row[:-1]]) for row in pipe.execute()]
+
+    chunks = [entities[i:i + batch_size] for i in range(0, len(entities), batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = [row for batch in pool.map(read_batch, chunks) for row in batch]
+
+    data = {join_key: list(entities)}
+    for i, name in enumerate(names):
+        data[name] = [values[i] for _, values in results]
+    data['event_timestamp'] = [ts for ts, _ in results]
+    return pd.DataFrame(data)
+
+
+def _values_equal(offline: pd.Series, online: pd.Series, numeric: bool, rtol: float, atol: float) -> np.ndarray:
+    both_null = offline.isna().to_numpy() & online.isna().to_numpy()
+    if numeric:
+        a = pd.to_numeric(offline, errors='coerce').to_numpy(dtype='float64')
+        b = pd.to_numeric(online, errors='coerce').to_numpy(dtype='float64')
+        return np.isclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+    return both_null | (offline.astype(str).to_numpy() == online.astype(str).to_numpy())
+
+
+def compare(view, offline: pd.DataFrame, online: pd.DataFrame, rtol: float = 1e-6, atol: float = 1e-6,
+            ttl_start: Optional[datetime] = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """엔티티별 상태와 피처별 불일치 수
+
+    ttl_start 이전 이벤트의 온라인 값은 Feast 기준으로 만료된 값이므로 오프라인 스냅샷이
+    없으면 expired, 있으면 stale로 분류함.
+    """
+    join_key = view.entity_columns[0].name
+    merged = online.merge(offline, on=join_key, how='left', suffixes=('_online', '_offline'), indicator=True)
+
+    has_offline = (merged['_merge'] == 'both').to_numpy()
+    online_ts = pd.to_datetime(merged['event_timestamp_online'])
+    offline_ts = pd.to_datetime(merged['event_timestamp_offline'])
+    has_online = online_ts.notna().to_numpy()
+    live_online = has_online & (online_ts >= ttl_start).to_numpy() if ttl_start is not None else has_online
+    stale = has_online & has_offline & (online_ts < offline_ts).to_numpy()
+
+    mismatch_any = np.zeros(len(merged), dtype=bool)
+    feature_mismatches = {}
+    comparable = has_online & has_offline & ~stale
+    for f in view.features:
+        equal = _values_equal(merged[f"{f.name}_offline"], merged[f"{f.name}_online"],
+                              numeric=f.dtype != String, rtol=rtol, atol=atol)
+        bad = comparable & ~equal
+        feature_mismatches[f.name] = int(bad.sum())
+        mismatch_any |= bad
+
+    status = np.select(
+        [~live_online & ~has_offline, ~has_online, ~has_offline, stale, mismatch_any],
+        [STATUS_EXPIRED, STATUS_MISSING_ONLINE, STATUS_MISSING_OFFLINE, STATUS_STALE, STATUS_VALUE_MISMATCH],
+        default=STATUS_OK,
+    )
+    rows = pd.DataFrame({
+        join_key: merged[join_key],
+        'status': status,
+        'online_timestamp': online_ts,
+        'offline_timestamp': offline_ts,
+    })
+    return rows, feature_mismatches
+
+
+def check_view(store, view_name: str, sample: Optional[int], as_of: datetime, batch_size: int,
+               workers: int, rtol: float, atol: float, seed: int = 42) -> ConsistencyReport:
+    view = store.get_feature_view(view_name)
+    entities = sample_entities(view, sample, seed)
+
+    t0 = time.perf_counter()
+    offline = fetch_offline(view, entities, as_of)
+    t1 = time.perf_counter()
+    online = fetch_online(store, view, entities, batch_size, workers)
+    t2 = time.perf_counter()
+    rows, feature_mismatches = compare(view, offline, online, rtol, atol, ttl_start=_ttl_start(view, as_of))
+    t3 = time.perf_counter()
+
+    return ConsistencyReport(
+        view=view_name,
+        n_entities=len(entities),
+        status_counts=rows['status'].value_counts().to_dict(),
+        feature_mismatches=feature_mismatches,
+        offline_seconds=t1 - t0,
+        online_seconds=t2 - t1,
+        compare_seconds=t3 - t2,
+        rows=rows,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="온라인/오프라인 피처 일관성 검사")
+    parser.add_argument("--view", action="append", help=f"검사할 Feature View (기본: {', '.join(DEFAULT_VIEWS)})")
+    parser.add_argument("--sample", type=int, default=10000, help="뷰별 검사할 엔티티 수")
+    parser.add_argument("--all", action="store_true", help="모든 엔티티 검사")
+    parser.add_argument("--as-of", type=pd.Timestamp, default=None,
+                        help="오프라인 비교 기준 시각 (기본: 현재, 마지막 materialize 종료 시각 권장)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Redis 파이프라인당 키 수")
+    parser.add_argument("--workers", type=int, default=4, help="동시 Redis 파이프라인 수")
+    parser.add_argument("--rtol", type=float, default=1e-6)
+    parser.add_argument("--atol", type=float, default=1e-6)
+    parser.add_argument("--max-mismatch-rate", type=float, default=0.0,
+                        help="허용 불일치율 (초과 시 종료 코드 1)")
+    args = parser.parse_args()
+
+    store = FeatureStore(repo_path=str(FEAST_REPO))
+    as_of = args.as_of.to_pydatetime() if args.as_of is not None else datetime.utcnow()
+
+    print("=" * 60)
+    print(f"온라인/오프라인 피처 일관성 검사 (as-of {as_of:%Y-%m-%d %H:%M:%S})")
+    print("=" * 60)
+
+    failed = False
+    for view_name in args.view or DEFAULT_VIEWS:
+        report = check_view(store, view_name, None if args.all else args.sample, as_of,
+                            args.batch_size, args.workers, args.rtol, args.atol)
+        report.print_report()
+        failed |= report.mismatch_rate > args.max_mismatch_rate
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
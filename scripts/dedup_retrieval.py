@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+엔티티 키 중복 제거 Historical Retrieval
+
+get_historical_features에 거래 행을 그대로 넘기면 같은 사용자 / 같은 스냅샷 구간의
+행들이 모두 따로 Point-in-Time Join됨. user_features는 하루에 한 번만 바뀌므로
+대부분의 행이 이미 조회한 스냅샷을 다시 찾는 셈.
+
+이 래퍼는:
+1. 요청된 Feature View별로 오프라인 소스의 스냅샷 시각만 (엔티티 키 + timestamp) 조회
+2. 각 행이 PIT Join에서 선택될 스냅샷(`ts <= event_timestamp`, `event_timestamp - ts <= ttl`인
+   최신 스냅샷, 없으면 NaT)을 merge_asof로 계산
+3. (엔티티 키들, 뷰별 선택 스냅샷) 조합이 같은 행을 하나로 합쳐 대표 행만 PIT Join
+4. 결과를 원래 행 순서로 벡터화 인덱싱하여 다시 펼침
+
+동등성: Feast의 PIT Join 결과는 뷰마다 (엔티티 키, 선택된 스냅샷)만의 함수이므로
+두 행의 키와 뷰별 선택 스냅샷이 모두 같으면 피처 값도 같음. 대표 행은 그룹의
+구성원이므로 같은 스냅샷을 선택함. 스냅샷 구간을 날짜 단위로 가정하지 않고
+실제 스냅샷 시각과 TTL에서 계산하므로 스냅샷 주기와 무관하게 성립함.
+On-Demand 피처는 요청 필드(금액 등)가 행마다 다르므로 키에 넣지 않고, 펼친 결과 전체에
+Feast와 같은 변환(transform_arrow)을 한 번 적용함.
+--verify로 전체 행 PIT Join 결과와 직접 비교 가능.
+
+사용 예:
+    python3 scripts/dedup_retrieval.py --sample 20000 --verify
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from service_clients import get_postgres_pool
+
+FEAST_REPO = Path(__file__).parent.parent / "feast"
+DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
+sys.path.insert(0, str(FEAST_REPO))  # feast/ 의 커스텀 online store / 파생 피처 모듈
+
+# Feast 임포트
+try:
+    from feast import FeatureStore
+    from feast.errors import FeatureViewNotFoundException
+except ImportError:
+    print("Feast가 설치되어 있지 않습니다.")
+    print("설치: pip install feast[postgres]")
+    exit(1)
+
+DEDUP_KEY = "__dedup_key"
+SNAPSHOT_TS = "__snapshot_ts"
+
+DEFAULT_FEATURES = [
+    "user_transaction_features:total_transactions",
+    "user_transaction_features:avg_amount",
+    "user_transaction_features:transactions_7d",
+    "user_transaction_features:transactions_30d",
+    "user_transaction_features:fraud_count",
+    "user_demographics:age",
+    "user_demographics:city_pop",
+]
+
+
+@dataclass
+class DedupReport:
+    """중복 제거 결과"""
+    n_rows: int
+    n_keys: int
+    snapshot_seconds: float
+    join_seconds: float
+    fanout_seconds: float
+    transform_seconds: float
+    views: Dict[str, int] = field(default_factory=dict)  # 뷰별 조회한 스냅샷 시각 수
+    verify_mismatches: Optional[int] = None
+    verify_seconds: Optional[float] = None
+
+    @property
+    def reduction_ratio(self) -> float:
+        return self.n_rows / self.n_keys if self.n_keys else 1.0
+
+    def print_report(self):
+        print(f"\n[중복 제거 retrieval] {self.n_rows:,}행 -> {self.n_keys:,}개 키 "
+              f"(감소 비율 {self.reduction_ratio:.2f}x)")
+        print(f"  스냅샷 시각 조회: {self.snapshot_seconds:.2f}s "
+              f"({', '.join(f'{v} {n:,}개' for v, n in self.views.items())})")
+        print(f"  PIT Join (축소된 entity_df): {self.join_seconds:.2f}s")
+        print(f"  결과 펼치기: {self.fanout_seconds:.3f}s")
+        if self.transform_seconds:
+            print(f"  On-Demand 변환 (전체 행): {self.transform_seconds:.3f}s")
+        if self.verify_mismatches is not None:
+            result = "동일" if self.verify_mismatches == 0 else f"{self.verify_mismatches:,}개 값 불일치"
+            print(f"  전체 행 PIT Join과 비교 ({self.verify_seconds:.2f}s): {result}")
+
+
+def _naive_utc(values: pd.Series) -> pd.Series:
+    """Feast와 같은 기준(타임존 없는 값은 UTC)으로 맞춘 타임존 없는 timestamp"""
+    values = pd.to_datetime(values)
+    if values.dt.tz is not None:
+        values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+    return values
+
+
+def resolve_views(store: FeatureStore, features: List[str]) -> Tuple[Dict, Dict]:
+    """피처 참조 -> PIT Join 대상 Feature View들과 On-Demand Feature View들"""
+    views, odfvs = {}, {}
+    for name in dict.fromkeys(ref.split(":")[0] for ref in features):
+        try:
+            views[name] = store.get_feature_view(name)
+        except FeatureViewNotFoundException:
+            odfvs[name] = store.get_on_demand_feature_view(name)
+    return views, odfvs
+
+
+def load_snapshot_times(view, entity_df: pd.DataFrame) -> pd.DataFrame:
+    """entity_df에 등장하는 엔티티의 스냅샷 시각 (엔티티 키 + SNAPSHOT_TS)"""
+    join_keys = [c.name for c in view.entity_columns]
+    ts_field = view.batch_source.timestamp_field
+    conditions = " AND ".join(f"{k} = ANY(%s)" for k in join_keys)
+    query = f"""
+        SELECT DISTINCT {', '.join(join_keys)}, {ts_field}
+        FROM {view.batch_source.get_table_query_string()} src
+        WHERE {conditions}
+    """
+    params = [entity_df[k].drop_duplicates().tolist() for k in join_keys]
+    with get_postgres_pool().cursor() as cur:
+        cur.execute(query, params)
+        return pd.DataFrame(cur.fetchall(), columns=join_keys + [SNAPSHOT_TS])
+
+
+def assign_snapshots(entity_df: pd.DataFrame, view, snapshots: pd.DataFrame) -> pd.Series:
+    """행별로 PIT Join에서 선택될 스냅샷 시각 (TTL 밖이거나 없으면 NaT)"""
+    join_keys = [c.name for c in view.entity_columns]
+    rows = pd.DataFrame({k: entity_df[k].to_numpy() for k in join_keys})
+    rows['event_timestamp'] = _naive_utc(entity_df['event_timestamp']).to_numpy()
+    rows['__row'] = np.arange(len(rows))
+
+    snapshots = snapshots.assign(**{SNAPSHOT_TS: _naive_utc(snapshots[SNAPSHOT_TS])})
+    matched = pd.merge_asof(
+        rows.sort_values('event_timestamp'),
+        snapshots.sort_values(SNAPSHOT_TS),
+        left_on='event_timestamp', right_on=SNAPSHOT_TS,
+        by=join_keys, direction='backward', allow_exact_matches=True,
+    ).sort_values('__row')
+
+    selected = matched[SNAPSHOT_TS]
+    if view.ttl:
+        selected = selected.where(matched['event_timestamp'] - selected <= view.ttl)
+    return pd.Series(selected.to_numpy(), index=entity_df.index)
+
+
+def dedup_keys(entity_df: pd.DataFrame, views: Dict,
+               snapshot_loader: Callable = load_snapshot_times) -> Tuple[np.ndarray, Dict[str, int]]:
+    """행별 중복 제거 키 번호 (같은 번호 = 같은 PIT Join 결과)"""
+    entity_columns = sorted({c.name for view in views.values() for c in view.entity_columns})
+    key_frame = entity_df[entity_columns].copy()
+    snapshot_counts = {}
+    for name, view in views.items():
+        snapshots = snapshot_loader(view, entity_df)
+        snapshot_counts[name] = len(snapshots)
+        key_frame[f"{SNAPSHOT_TS}:{name}"] = assign_snapshots(entity_df, view, snapshots)
+    key_ids = key_frame.groupby(list(key_frame.columns), sort=False, dropna=False).ngroup().to_numpy()
+    return key_ids, snapshot_counts
+
+
+def apply_on_demand(result: pd.DataFrame, odfvs: Dict, features: List[str],
+                    full_feature_names: bool = False) -> pd.DataFrame:
+    """펼친 결과 전체에 On-Demand 변환을 한 번에 적용 (RetrievalJob.to_arrow와 같은 방식)"""
+    table = pa.Table.from_pandas(result, preserve_index=False)
+    added = {}
+    for name, odfv in odfvs.items():
+        requested = [ref.split(":")[1] for ref in features if ref.split(":")[0] == name]
+        wanted = {f"{name}__{f}" if full_feature_names else f for f in requested}
+        transformed = odfv.transform_arrow(table, full_feature_names)
+        for column in transformed.column_names:
+            if column in wanted:
+                added[column] = transformed[column].to_pandas()
+    return pd.concat([result, pd.DataFrame(added).set_axis(result.index)], axis=1)
+
+
+def get_historical_features_dedup(store: FeatureStore, entity_df: pd.DataFrame, features: List[str],
+                                  verify: bool = False, snapshot_loader: Callable = load_snapshot_times,
+                                  full_feature_names: bool = False) -> Tuple[pd.DataFrame, DedupReport]:
+    """get_historical_features와 같은 결과를 중복 제거된 entity_df로 계산
+
+    반환 DataFrame은 entity_df의 모든 컬럼(원래 순서/인덱스) 뒤에 피처 컬럼이 붙은 형태.
+    On-Demand 피처는 행마다 요청 필드가 달라 키로 묶을 수 없으므로, 펼친 뒤 전체 행에
+    벡터화 변환을 한 번 적용함 (변환 입력이 되는 소스 피처는 Feast와 마찬가지로
+    features에 함께 요청되어 있어야 함).
+    """
+    t0 = time.perf_counter()
+    views, odfvs = resolve_views(store, features)
+    key_ids, snapshot_counts = dedup_keys(entity_df, views, snapshot_loader)
+    entity_columns = sorted({c.name for view in views.values() for c in view.entity_columns})
+
+    first = ~pd.Series(key_ids).duplicated().to_numpy()
+    reduced = entity_df.loc[first, entity_columns + ['event_timestamp']].copy()
+    reduced[DEDUP_KEY] = key_ids[first]
+    t1 = time.perf_counter()
+
+    batch_features = [ref for ref in features if ref.split(":")[0] in views]
+    joined = store.get_historical_features(entity_df=reduced, features=batch_features,
+                                           full_feature_names=full_feature_names).to_df()
+    t2 = time.perf_counter()
+
+    feature_columns = [c for c in joined.columns if c not in reduced.columns]
+    # 유효한 스냅샷이 없는 행을 결과에서 빼는 offline store(file/dask)도 있으므로
+    # 없는 키는 null로 채움 (PostgreSQL store의 LEFT JOIN 결과와 동일)
+    fanned = joined.set_index(DEDUP_KEY)[feature_columns].reindex(key_ids).set_axis(entity_df.index)
+    result = pd.concat([entity_df, fanned], axis=1)
+    t3 = time.perf_counter()
+    if odfvs:
+        result = apply_on_demand(result, odfvs, features, full_feature_names)
+    t4 = time.perf_counter()
+
+    report = DedupReport(
+        n_rows=len(entity_df),
+        n_keys=len(reduced),
+        snapshot_seconds=t1 - t0,
+        join_seconds=t2 - t1,
+        fanout_seconds=t3 - t2,
+        transform_seconds=(t4 - t3) if odfvs else 0.0,
+        views=snapshot_counts,
+    )
+    if verify:
+        t5 = time.perf_counter()
+        feature_columns = [c for c in result.columns if c not in entity_df.columns]
+        report.verify_mismatches = count_mismatches(store, entity_df, features, result, feature_columns,
+                                                    full_feature_names=full_feature_names)
+        report.verify_seconds = time.perf_counter() - t5
+    return result, report
+
+
+def count_mismatches(store: FeatureStore, entity_df: pd.DataFrame, features: List[str],
+                     result: pd.DataFrame, feature_columns: List[str], full_feature_names: bool = False) -> int:
+    """전체 행 PIT Join 결과와 비교한 불일치 값 수 (NaN끼리는 일치로 봄)"""
+    full_input = entity_df.copy()
+    full_input['__row'] = np.arange(len(entity_df))
+    full = store.get_historical_features(entity_df=full_input, features=features,
+                                         full_feature_names=full_feature_names).to_df()
+    full = full.set_index('__row')[feature_columns].reindex(np.arange(len(entity_df))).reset_index(drop=True)
+    ours = result[feature_columns].reset_index(drop=True)
+    both_null = full.isna() & ours.isna()
+    equal = (full == ours).fillna(False).astype(bool) | both_null
+    return int((~equal).to_numpy().sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="엔티티 키 중복 제거 Historical Retrieval")
+    parser.add_argument("--sample", type=int, default=10000, help="transactions.csv에서 뽑을 거래 수")
+    parser.add_argument("--feature", action="append", help="피처 참조 (기본: test_point_in_time_join과 동일)")
+    parser.add_argument("--verify", action="store_true", help="전체 행 PIT Join과 결과 비교")
+    args = parser.parse_args()
+
+    transactions = pd.read_csv(DATA_DIR / "transactions.csv", parse_dates=['event_timestamp'])
+    entity_df = transactions.sample(n=min(args.sample, len(transactions)), random_state=42)
+    entity_df = entity_df.sort_values('event_timestamp').reset_index(drop=True)
+
+    store = FeatureStore(repo_path=str(FEAST_REPO))
+    result, report = get_historical_features_dedup(store, entity_df, args.feature or DEFAULT_FEATURES,
+                                                   verify=args.verify)
+    report.print_report()
+    sys.exit(1 if report.verify_mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
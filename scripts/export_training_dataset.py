@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+학습 데이터셋 분할 / Parquet 샤드 저장
+
+PIT 조회로 만든 학습 프레임을 event_timestamp 기준 train / val / test로 나누고
+(경계 시각을 기준으로 자르므로 같은 시각의 행이 두 분할에 걸치지 않아 시간 누출 없음),
+분할마다 고정 크기 Parquet 샤드로 저장한 뒤 manifest.json을 작성함.
+
+- 샤드는 분할 안에서 시간 순서로 연속된 구간 (row group 통계로 시간 범위 필터링 가능)
+- 샤드 안에서는 fraud 행과 정상 행을 별도 row group으로 저장하고, manifest에
+  샤드/row group별 행 수, fraud 수, 시간 범위를 기록
+- 데이터 로더 워커 N개는 shards_for_worker()로 서로 겹치지 않는 샤드를 나눠 읽고,
+  iter_batches(stratified=True)를 쓰면 배치마다 샤드의 fraud 비율을 유지한 순서로 읽음
+- 출력은 임시 디렉토리에 쓴 뒤 교체하므로 중간 상태의 데이터셋이 남지 않음
+
+출력 구조:
+    training_dataset/
+        manifest.json
+        train/part-00000.parquet ...
+        val/part-00000.parquet
+        test/part-00000.parquet
+
+사용 예:
+    python3 scripts/export_training_dataset.py --input data/processed/training_dataset.csv
+    python3 scripts/export_training_dataset.py --input training.csv --val 0.15 --test 0.15 --shard-rows 20000
+
+로더에서 사용:
+    from export_training_dataset import iter_batches
+    for batch in iter_batches(manifest_path, 'train', worker=rank, num_workers=world_size, stratified=True):
+        ...
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+TIME_COLUMN = 'event_timestamp'
+LABEL_COLUMN = 'is_fraud'
+SPLITS = ('train', 'val', 'test')
+
+DEFAULT_VAL_FRACTION = 0.1
+DEFAULT_TEST_FRACTION = 0.1
+DEFAULT_SHARD_ROWS = 50_000
+DEFAULT_ROW_GROUP_ROWS = 10_000
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow가 필요합니다: pip install pyarrow")
+
+
+def split_boundaries(timestamps: pd.Series, val_fraction: float, test_fraction: float) -> List[pd.Timestamp]:
+    """train/val, val/test 경계 시각 (행 비율 기준 분위수 시각, 경계 시각 행은 뒤 분할에 속함)"""
+    ordered = np.sort(timestamps.to_numpy())
+    n = len(ordered)
+    if n == 0:
+        # 행이 없는 export 구간은 모든 분할이 빈 상태로 export (경계는 의미 없음)
+        return [pd.Timestamp.max, pd.Timestamp.max]
+    cuts = [1.0 - val_fraction - test_fraction, 1.0 - test_fraction]
+    # 비율이 0인 뒤 분할은 비어 있도록 마지막 시각 다음으로
+    return [pd.Timestamp(ordered[int(n * c)]) if int(n * c) < n else pd.Timestamp(ordered[-1]) + pd.Timedelta(1, 'ns')
+            for c in cuts]
+
+
+def assign_splits(df: pd.DataFrame, boundaries: List[pd.Timestamp]) -> pd.Series:
+    """행별 분할 이름 (ts < b0: train, b0 <= ts < b1: val, b1 <= ts: test)"""
+    index = np.searchsorted(np.array([b.to_datetime64() for b in boundaries], dtype='datetime64[ns]'),
+                            df[TIME_COLUMN].to_numpy(dtype='datetime64[ns]'), side='right')
+    return pd.Series(np.asarray(SPLITS, dtype=object)[index], index=df.index)
+
+
+def _time_range(frame: pd.DataFrame) -> Dict:
+    if frame.empty:
+        return {'ts_min': None, 'ts_max': None}
+    return {'ts_min': frame[TIME_COLUMN].min().isoformat(), 'ts_max': frame[TIME_COLUMN].max().isoformat()}
+
+
+def write_shard(frame: pd.DataFrame, path: Path, row_group_rows: int, schema: 'pa.Schema') -> Dict:
+    """샤드 하나 저장. fraud 행 row group이 앞에 오고, 각 클래스 안에서는 시간 순서"""
+    row_groups = []
+    with pq.ParquetWriter(path, schema, compression='zstd', write_statistics=True) as writer:
+        for label in (1, 0):
+            part = frame[frame[LABEL_COLUMN] == label]
+            for start in range(0, len(part), row_group_rows):
+                chunk = part.iloc[start:start + row_group_rows]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False),
+                                   row_group_size=row_group_rows)
+                row_groups.append({'index': len(row_groups), 'rows': len(chunk),
+                                   'is_fraud': bool(label), **_time_range(chunk)})
+    return {
+        'rows': len(frame),
+        'fraud_rows': int(frame[LABEL_COLUMN].sum()),
+        'bytes': path.stat().st_size,
+        **_time_range(frame),
+        'row_groups': row_groups,
+    }
+
+
+def export_training_dataset(df: pd.DataFrame, output_dir: Path,
+                            val_fraction: float = DEFAULT_VAL_FRACTION,
+                            test_fraction: float = DEFAULT_TEST_FRACTION,
+                            shard_rows: int = DEFAULT_SHARD_ROWS,
+                            row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+                            meta: Optional[Dict] = None) -> Dict:
+    """학습 프레임을 시간 기준 분할 + Parquet 샤드로 저장하고 manifest 반환"""
+    _require_pyarrow()
+    if val_fraction < 0 or test_fraction < 0 or val_fraction + test_fraction >= 1:
+        raise ValueError(f"분할 비율이 잘못되었습니다: val={val_fraction}, test={test_fraction}")
+    output_dir = Path(output_dir)
+
+    df = df.copy()
+    df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN])
+    df = df.sort_values(TIME_COLUMN, kind='stable').reset_index(drop=True)
+    boundaries = split_boundaries(df[TIME_COLUMN], val_fraction, test_fraction)
+    splits = assign_splits(df, boundaries)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+
+    tmp_dir = output_dir.with_name(f"{output_dir.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'created_at': datetime.now().isoformat(timespec="seconds"),
+        'time_column': TIME_COLUMN,
+        'label_column': LABEL_COLUMN,
+        'boundaries': {'train_end': boundaries[0].isoformat(), 'val_end': boundaries[1].isoformat()},
+        'shard_rows': shard_rows,
+        'row_group_rows': row_group_rows,
+        'columns': {field.name: str(field.type) for field in schema},
+        'meta': meta or {},
+        'splits': {},
+    }
+    try:
+        for split in SPLITS:
+            part = df[splits == split]
+            (tmp_dir / split).mkdir(parents=True)
+            shards = []
+            for number, start in enumerate(range(0, len(part), shard_rows)):
+                relative = Path(split) / f"part-{number:05d}.parquet"
+                shard = write_shard(part.iloc[start:start + shard_rows], tmp_dir / relative, row_group_rows, schema)
+                shards.append({'path': str(relative), **shard})
+            manifest['splits'][split] = {
+                'rows': len(part),
+                'fraud_rows': int(part[LABEL_COLUMN].sum()),
+                **_time_range(part),
+                'shards': shards,
+            }
+        (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+
+        # 완성된 디렉토리로 교체
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+        os.replace(tmp_dir, output_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+
+def load_manifest(path: Path) -> Dict:
+    path = Path(path)
+    return json.loads((path / MANIFEST_NAME if path.is_dir() else path).read_text())
+
+
+def shards_for_worker(manifest: Dict, split: str, worker: int, num_workers: int) -> List[Dict]:
+    """워커별로 겹치지 않는 샤드 목록 (행 수 기준 greedy 균형 배분, 모든 워커에서 같은 결과)"""
+    if not 0 <= worker < num_workers:
+        raise ValueError(f"worker는 0 ~ {num_workers - 1} 사이여야 합니다: {worker}")
+    loads = [0] * num_workers
+    assigned: List[List[Dict]] = [[] for _ in range(num_workers)]
+    shards = sorted(manifest['splits'][split]['shards'], key=lambda s: (-s['rows'], s['path']))
+    for shard in shards:
+        target = loads.index(min(loads))
+        assigned[target].append(shard)
+        loads[target] += shard['rows']
+    return sorted(assigned[worker], key=lambda s: s['path'])
+
+
+def iter_batches(manifest_path: Path, split: str, worker: int = 0, num_workers: int = 1,
+                 batch_size: int = 1024, stratified: bool = False,
+                 columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """워커에 배정된 샤드를 배치 단위로 읽음
+
+    stratified=True면 fraud row group과 정상 row group을 함께 읽어, 배치마다 샤드의
+    fraud 비율만큼 fraud 행을 섞어서 내보냄 (fraud 행이 샤드 앞쪽에 몰리지 않음).
+    """
+    _require_pyarrow()
+    manifest_path = Path(manifest_path)
+    root = manifest_path if manifest_path.is_dir() else manifest_path.parent
+    manifest = load_manifest(manifest_path)
+    for shard in shards_for_worker(manifest, split, worker, num_workers):
+        parquet = pq.ParquetFile(root / shard['path'])
+        if not stratified or shard['fraud_rows'] in (0, shard['rows']):
+            for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+            continue
+
+        fraud_groups = [g['index'] for g in shard['row_groups'] if g['is_fraud']]
+        normal_groups = [g['index'] for g in shard['row_groups'] if not g['is_fraud']]
+        fraud = parquet.read_row_groups(fraud_groups, columns=columns).to_pandas()
+        fraud_rate = shard['fraud_rows'] / shard['rows']
+        normal_per_batch = max(1, round(batch_size * (1 - fraud_rate)))
+        taken = 0
+        normal_seen = 0
+        normal_total = shard['rows'] - shard['fraud_rows']
+        for batch in parquet.iter_batches(batch_size=normal_per_batch, row_groups=normal_groups, columns=columns):
+            normal = batch.to_pandas()
+            normal_seen += len(normal)
+            # 지금까지 읽은 정상 행 비율만큼 fraud 행을 배분 (마지막 배치에서 남은 fraud 모두 포함)
+            upto = math.ceil(len(fraud) * normal_seen / normal_total)
+            yield pd.concat([fraud.iloc[taken:upto], normal], ignore_index=True)
+            taken = upto
+        if taken < len(fraud):
+            yield fraud.iloc[taken:].reset_index(drop=True)
+
+
+def print_manifest(manifest: Dict):
+    print(f"분할 경계: train < {manifest['boundaries']['train_end']} <= val < "
+          f"{manifest['boundaries']['val_end']} <= test")
+    print(f"  {'split':<6} {'rows':>10} {'fraud':>8} {'rate':>7} {'shards':>7}  기간")
+    for split, info in manifest['splits'].items():
+        rate = info['fraud_rows'] / info['rows'] if info['rows'] else 0.0
+        print(f"  {split:<6} {info['rows']:>10,} {info['fraud_rows']:>8,} {rate:>7.2%} "
+              f"{len(info['shards']):>7}  {info['ts_min']} ~ {info['ts_max']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학습 데이터셋 시간 기준 분할 / Parquet 샤드 저장")
+    parser.add_argument("--input", type=Path, default=DATA_DIR / "training_dataset.csv")
+    parser.add_argument("--output", type=Path, default=DATA_DIR / "training_dataset")
+    parser.add_argument("--val", type=float, default=DEFAULT_VAL_FRACTION, help="검증 분할 비율 (행 기준)")
+    parser.add_argument("--test", type=float, default=DEFAULT_TEST_FRACTION, help="테스트 분할 비율 (행 기준)")
+    parser.add_argument("--shard-rows", type=int, default=DEFAULT_SHARD_ROWS)
+    parser.add_argument("--row-group-rows", type=int, default=DEFAULT_ROW_GROUP_ROWS)
+    args = parser.parse_args()
+
+    if pa is None:
+        print("pyarrow가 설치되어 있지 않습니다.")
+        print("설치: pip install pyarrow")
+        exit(1)
+
+    df = pd.read_csv(args.input, parse_dates=[TIME_COLUMN])
+    manifest = export_training_dataset(df, args.output, args.val, args.test, args.shard_rows,
+                                       args.row_group_rows, meta={'source': str(args.input)})
+    print_manifest(manifest)
+    print(f"\n저장: {args.output}/{MANIFEST_NAME}")
+
+
+if __name__ == "__main__":
+    main()
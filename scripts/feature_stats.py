@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+피처 분포 통계 (병합 가능한 단일 패스 스케치) / 빌드 간 드리프트 비교
+
+user_features / merchant_features / category_features의 수치 피처마다 다음을 계산:
+- count / null 비율 / 평균 / 분산 / 최소 / 최대 (Chan 병렬 알고리즘으로 병합)
+- KLL 분위수 스케치 (rank 오차 약 1.7/k, 기본 k=200이면 약 ±1%)
+- 로그 버킷 히스토그램 (버킷 경계가 데이터와 무관하게 고정되어 있어 그대로 합산 가능)
+
+테이블을 청크 단위로 한 번만 읽으며 정렬/전체 복사가 없으므로, 전체 스냅샷 테이블에
+pandas quantile을 돌리는 것보다 가볍고 샤드/일자별 결과를 merge로 합칠 수 있음.
+
+전처리 DAG의 feature_stats 단계가 빌드마다 계산하여 data/processed/feature_stats.json에
+저장하고, 이전 빌드 통계와 비교한 드리프트 리포트를 출력함. 비교 지표:
+- PSI: 이전 빌드 분위수(10분위) 구간 기준 Population Stability Index
+- KS: 두 KLL CDF의 최대 차이
+- 평균 이동 (이전 표준편차 단위) / null 비율 변화
+
+사용 예:
+    python3 scripts/feature_stats.py profile --input data/processed/user_features.csv --table user_features -o uf.json
+    python3 scripts/feature_stats.py merge day1.json day2.json -o merged.json
+    python3 scripts/feature_stats.py compare old.json data/processed/feature_stats.json
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_K = 200
+CHUNK_ROWS = 100_000
+
+# 로그 버킷 히스토그램: 버킷 i = (GAMMA^(i-1), GAMMA^i], 절댓값이 ZERO_THRESHOLD 이하는 0 버킷
+HISTOGRAM_GAMMA = 1.25
+ZERO_THRESHOLD = 1e-9
+
+# 드리프트 판정 기본 임계값
+PSI_WARN = 0.1
+PSI_DRIFT = 0.2
+KS_DRIFT = 0.1
+NULL_RATE_DRIFT = 0.05
+PSI_BINS = 10
+
+# 통계를 계산하지 않는 컬럼 (키 / 타임스탬프)
+SKIP_COLUMNS = {'user_id', 'merchant_id', 'category', 'primary_category', 'created_at', 'event_timestamp',
+                'valid_from', 'valid_to', 'valid_to_ttl'}
+
+
+class KLLSketch:
+    """KLL 분위수 스케치 (Karnin, Lang, Liberty 2016)
+
+    레벨 h의 항목은 가중치 2^h를 가짐. 레벨이 용량을 넘으면 정렬 후 홀수/짝수 번째 중
+    하나를 무작위로 골라 위 레벨로 올림(compaction). 용량은 위 레벨일수록 크고
+    아래로 갈수록 2/3씩 줄어듦. 두 스케치는 레벨별로 이어 붙인 뒤 compaction하면 병합됨.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # 홀수 개면 하나는 현재 레벨에 남김
+                keep = items[:len(items) % 2]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.integers(0, 2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                level = 0 if level == 0 else level - 1  # 레벨 수가 늘면 아래 레벨 용량도 바뀜
+                continue
+            level += 1
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items, cumulative = self._weighted()
+        ranks = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        return items[np.minimum(ranks, len(items) - 1)]
+
+    def cdf(self, points: Iterable[float]) -> np.ndarray:
+        """P(X <= x) 추정"""
+        points = np.asarray(list(points), dtype=np.float64)
+        if self.n == 0:
+            return np.full(len(points), np.nan)
+        items, cumulative = self._weighted()
+        index = np.searchsorted(items, points, side='right')
+        return np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0) / cumulative[-1]
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'n': self.n, 'levels': [lv.tolist() for lv in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'KLLSketch':
+        sketch = cls(k=data['k'])
+        sketch.n = data['n']
+        sketch.levels = [np.asarray(lv, dtype=np.float64) for lv in data['levels']] or [np.empty(0)]
+        return sketch
+
+
+def histogram_buckets(values: np.ndarray) -> np.ndarray:
+    """로그 버킷 번호 (양수 i, 음수 -i, 0 버킷은 0)"""
+    magnitude = np.abs(values)
+    index = np.ceil(np.log(np.maximum(magnitude, ZERO_THRESHOLD)) / math.log(HISTOGRAM_GAMMA)).astype(np.int64)
+    index = index - int(math.ceil(math.log(ZERO_THRESHOLD) / math.log(HISTOGRAM_GAMMA))) + 1  # 1부터 시작
+    index[magnitude <= ZERO_THRESHOLD] = 0
+    return np.where(values < 0, -index, index)
+
+
+def bucket_bounds(bucket: int):
+    """버킷 번호 -> (하한, 상한]"""
+    if bucket == 0:
+        return -ZERO_THRESHOLD, ZERO_THRESHOLD
+    offset = int(math.ceil(math.log(ZERO_THRESHOLD) / math.log(HISTOGRAM_GAMMA))) - 1
+    exponent = abs(bucket) + offset
+    low, high = HISTOGRAM_GAMMA ** (exponent - 1), HISTOGRAM_GAMMA ** exponent
+    return (low, high) if bucket > 0 else (-high, -low)
+
+
+class ColumnStats:
+    """수치 컬럼 하나의 병합 가능한 통계"""
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        self.rows = 0
+        self.nulls = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = KLLSketch(k, seed)
+        self.histogram: Dict[int, int] = {}
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        self.rows += len(values)
+        self.nulls += len(values) - len(valid)
+        if len(valid) == 0:
+            return
+        chunk_mean = float(valid.mean())
+        chunk_m2 = float(((valid - chunk_mean) ** 2).sum())
+        self._merge_moments(len(valid), chunk_mean, chunk_m2, float(valid.min()), float(valid.max()))
+        self.sketch.update(valid)
+        buckets, counts = np.unique(histogram_buckets(valid), return_counts=True)
+        for bucket, count in zip(buckets.tolist(), counts.tolist()):
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+    def _merge_moments(self, n: int, mean: float, m2: float, lo: float, hi: float):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min, self.max = min(self.min, lo), max(self.max, hi)
+
+    def merge(self, other: 'ColumnStats') -> 'ColumnStats':
+        self.rows += other.rows
+        self.nulls += other.nulls
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        self.sketch.merge(other.sketch)
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def null_rate(self) -> float:
+        return self.nulls / self.rows if self.rows else float('nan')
+
+    def summary(self) -> Dict:
+        p01, p50, p99 = self.sketch.quantiles([0.01, 0.5, 0.99])
+        return {
+            'rows': self.rows, 'null_rate': self.null_rate, 'mean': self.mean if self.count else None,
+            'std': math.sqrt(self.variance) if self.count > 1 else None,
+            'min': self.min if self.count else None, 'max': self.max if self.count else None,
+            'p01': float(p01), 'p50': float(p50), 'p99': float(p99),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'rows': self.rows, 'nulls': self.nulls, 'count': self.count,
+            'mean': self.mean, 'm2': self.m2,
+            'min': self.min if self.count else None, 'max': self.max if self.count else None,
+            'sketch': self.sketch.to_dict(),
+            'histogram': {str(b): c for b, c in sorted(self.histogram.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ColumnStats':
+        stats = cls()
+        stats.rows, stats.nulls, stats.count = data['rows'], data['nulls'], data['count']
+        stats.mean, stats.m2 = data['mean'], data['m2']
+        stats.min = data['min'] if data['min'] is not None else math.inf
+        stats.max = data['max'] if data['max'] is not None else -math.inf
+        stats.sketch = KLLSketch.from_dict(data['sketch'])
+        stats.histogram = {int(b): c for b, c in data['histogram'].items()}
+        return stats
+
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    return [c for c in df.columns
+            if c not in SKIP_COLUMNS and (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c]))]
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], k: int = DEFAULT_K, seed: int = 0) -> Dict[str, ColumnStats]:
+    """DataFrame 청크를 한 번씩만 읽어 컬럼별 통계 계산 (컬럼 목록은 첫 청크 기준)"""
+    stats: Dict[str, ColumnStats] = {}
+    for chunk in chunks:
+        if not stats:
+            stats = {c: ColumnStats(k, seed) for c in numeric_columns(chunk)}
+        for column, column_stats in stats.items():
+            column_stats.update(chunk[column].to_numpy(dtype=np.float64, na_value=np.nan))
+    return stats
+
+
+def profile_frame(df: pd.DataFrame, k: int = DEFAULT_K, chunk_rows: int = CHUNK_ROWS) -> Dict[str, ColumnStats]:
+    return profile_chunks((df.iloc[i:i + chunk_rows] for i in range(0, max(len(df), 1), chunk_rows)), k)
+
+
+def profile_tables(**tables: pd.DataFrame) -> pd.DataFrame:
+    """전처리 DAG 단계: 테이블별 컬럼 통계 (table, feature, stats JSON) DataFrame"""
+    rows = []
+    for table, df in tables.items():
+        for feature, stats in profile_frame(df).items():
+            rows.append({'table': table, 'feature': feature, 'stats': json.dumps(stats.to_dict())})
+    return pd.DataFrame(rows, columns=['table', 'feature', 'stats'])
+
+
+def frame_to_profile(frame: pd.DataFrame) -> Dict[str, Dict[str, ColumnStats]]:
+    profile: Dict[str, Dict[str, ColumnStats]] = {}
+    for row in frame.itertuples(index=False):
+        profile.setdefault(row.table, {})[row.feature] = ColumnStats.from_dict(json.loads(row.stats))
+    return profile
+
+
+def save_profile(profile: Dict[str, Dict[str, ColumnStats]], path: Path, meta: Optional[Dict] = None):
+    payload = {
+        'meta': meta or {},
+        'tables': {table: {feature: stats.to_dict() for feature, stats in columns.items()}
+                   for table, columns in profile.items()},
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(payload))
+
+
+def load_profile(path: Path) -> Dict[str, Dict[str, ColumnStats]]:
+    payload = json.loads(Path(path).read_text())
+    return {table: {feature: ColumnStats.from_dict(data) for feature, data in columns.items()}
+            for table, columns in payload['tables'].items()}
+
+
+def merge_profiles(profiles: List[Dict[str, Dict[str, ColumnStats]]]) -> Dict[str, Dict[str, ColumnStats]]:
+    """샤드/일자별 통계 병합 (같은 테이블/피처끼리)"""
+    merged: Dict[str, Dict[str, ColumnStats]] = {}
+    for profile in profiles:
+        for table, columns in profile.items():
+            for feature, stats in columns.items():
+                target = merged.setdefault(table, {})
+                if feature in target:
+                    target[feature].merge(stats)
+                else:
+                    target[feature] = ColumnStats.from_dict(stats.to_dict())
+    return merged
+
+
+def psi(base: ColumnStats, current: ColumnStats, bins: int = PSI_BINS) -> float:
+    """이전 분포의 분위수 구간 기준 PSI (두 KLL CDF로 구간 비율 계산)"""
+    if base.count == 0 or current.count == 0:
+        return float('nan')
+    edges = np.unique(base.sketch.quantiles(np.linspace(0, 1, bins + 1)[1:-1]))
+    base_p = np.diff(np.concatenate([[0.0], base.sketch.cdf(edges), [1.0]]))
+    current_p = np.diff(np.concatenate([[0.0], current.sketch.cdf(edges), [1.0]]))
+    base_p, current_p = np.maximum(base_p, 1e-4), np.maximum(current_p, 1e-4)
+    return float(np.sum((current_p - base_p) * np.log(current_p / base_p)))
+
+
+def ks_statistic(base: ColumnStats, current: ColumnStats) -> float:
+    """두 KLL CDF의 최대 차이 (양쪽 스케치 항목 위치에서 평가)"""
+    if base.count == 0 or current.count == 0:
+        return float('nan')
+    points = np.unique(np.concatenate(base.sketch.levels + current.sketch.levels))
+    return float(np.max(np.abs(base.sketch.cdf(points) - current.sketch.cdf(points))))
+
+
+def compare_profiles(base: Dict[str, Dict[str, ColumnStats]], current: Dict[str, Dict[str, ColumnStats]],
+                     psi_drift: float = PSI_DRIFT, ks_drift: float = KS_DRIFT,
+                     null_rate_drift: float = NULL_RATE_DRIFT) -> pd.DataFrame:
+    """피처별 드리프트 지표 (status: ok / warn / drift / new / removed)"""
+    rows = []
+    for table in sorted(set(base) | set(current)):
+        features = set(base.get(table, {})) | set(current.get(table, {}))
+        for feature in sorted(features):
+            b, c = base.get(table, {}).get(feature), current.get(table, {}).get(feature)
+            row = {'table': table, 'feature': feature}
+            if b is None or c is None:
+                row['status'] = 'new' if b is None else 'removed'
+                rows.append(row)
+                continue
+            base_std = math.sqrt(b.variance) if b.count > 1 else float('nan')
+            row.update({
+                'psi': psi(b, c),
+                'ks': ks_statistic(b, c),
+                'mean_shift_std': (c.mean - b.mean) / base_std if base_std and base_std > 0 else float('nan'),
+                'null_rate_delta': c.null_rate - b.null_rate,
+                'rows_base': b.rows,
+                'rows_current': c.rows,
+            })
+            if (row['psi'] > psi_drift or row['ks'] > ks_drift
+                    or abs(row['null_rate_delta']) > null_rate_drift):
+                row['status'] = 'drift'
+            elif row['psi'] > PSI_WARN:
+                row['status'] = 'warn'
+            else:
+                row['status'] = 'ok'
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def print_drift_report(report: pd.DataFrame, only_flagged: bool = False):
+    if report.empty:
+        print("비교할 피처가 없습니다")
+        return
+    shown = report[report['status'] != 'ok'] if only_flagged else report
+    print(f"  {'table':<20} {'feature':<26} {'PSI':>7} {'KS':>6} {'Δmean(σ)':>9} {'Δnull':>7}  status")
+    for row in shown.itertuples(index=False):
+        if row.status in ('new', 'removed'):
+            print(f"  {row.table:<20} {row.feature:<26} {'':>7} {'':>6} {'':>9} {'':>7}  {row.status}")
+            continue
+        print(f"  {row.table:<20} {row.feature:<26} {row.psi:>7.3f} {row.ks:>6.3f} "
+              f"{row.mean_shift_std:>9.2f} {row.null_rate_delta:>7.3f}  {row.status}")
+    counts = report['status'].value_counts().to_dict()
+    print("  " + ", ".join(f"{status} {n}" for status, n in sorted(counts.items())))
+
+
+def print_profile(profile: Dict[str, Dict[str, ColumnStats]]):
+    for table, columns in profile.items():
+        print(f"\n[{table}]")
+        print(f"  {'feature':<26} {'rows':>9} {'null':>6} {'mean':>12} {'std':>12} {'p01':>12} {'p50':>12} {'p99':>12}")
+        for feature, stats in columns.items():
+            s = summary_cells(stats.summary())
+            print(f"  {feature:<26} {s['rows']:>9} {s['null_rate']:>6} {s['mean']:>12} {s['std']:>12} "
+                  f"{s['p01']:>12} {s['p50']:>12} {s['p99']:>12}")
+
+
+def summary_cells(summary: Dict) -> Dict[str, str]:
+    cells = {}
+    for key, value in summary.items():
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            cells[key] = "-"
+        elif key == 'rows':
+            cells[key] = f"{value:,}"
+        elif key == 'null_rate':
+            cells[key] = f"{value:.3f}"
+        else:
+            cells[key] = f"{value:,.4g}"
+    return cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description="피처 분포 스케치 통계 / 드리프트 비교")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_profile = sub.add_parser("profile", help="CSV를 청크 단위로 한 번 읽어 통계 계산")
+    p_profile.add_argument("--input", type=Path, required=True)
+    p_profile.add_argument("--table", help="테이블 이름 (기본: 파일 이름)")
+    p_profile.add_argument("--k", type=int, default=DEFAULT_K, help="KLL 정확도 파라미터")
+    p_profile.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    p_profile.add_argument("-o", "--output", type=Path, required=True)
+
+    p_merge = sub.add_parser("merge", help="샤드/일자별 통계 파일 병합")
+    p_merge.add_argument("inputs", type=Path, nargs="+")
+    p_merge.add_argument("-o", "--output", type=Path, required=True)
+
+    p_compare = sub.add_parser("compare", help="두 빌드의 통계 비교 (드리프트가 있으면 종료 코드 1)")
+    p_compare.add_argument("base", type=Path)
+    p_compare.add_argument("current", type=Path)
+    p_compare.add_argument("--psi", type=float, default=PSI_DRIFT)
+    p_compare.add_argument("--ks", type=float, default=KS_DRIFT)
+    p_compare.add_argument("--flagged", action="store_true", help="ok가 아닌 피처만 출력")
+
+    p_show = sub.add_parser("show", help="통계 파일 요약 출력")
+    p_show.add_argument("path", type=Path)
+
+    args = parser.parse_args()
+
+    if args.command == "profile":
+        table = args.table or args.input.stem
+        chunks = pd.read_csv(args.input, chunksize=args.chunk_rows)
+        profile = {table: profile_chunks(chunks, k=args.k)}
+        save_profile(profile, args.output, meta={'source': str(args.input)})
+        print_profile(profile)
+        print(f"\n통계 저장: {args.output}")
+    elif args.command == "merge":
+        profile = merge_profiles([load_profile(p) for p in args.inputs])
+        save_profile(profile, args.output, meta={'merged_from': [str(p) for p in args.inputs]})
+        print_profile(profile)
+        print(f"\n병합 결과 저장: {args.output}")
+    elif args.command == "compare":
+        report = compare_profiles(load_profile(args.base), load_profile(args.current),
+                                  psi_drift=args.psi, ks_drift=args.ks)
+        print_drift_report(report, only_flagged=args.flagged)
+        if (report['status'] == 'drift').any():
+            sys.exit(1)
+    elif args.command == "show":
+        print_profile(load_profile(args.path))
+
+
+if __name__ == "__main__":
+    main()
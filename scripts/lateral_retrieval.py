@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+LATERAL 인덱스 조회 기반 Historical Retrieval (PostgreSQL)
+
+Feast PostgreSQL offline store의 PIT SQL은 entity_df 전체를 업로드한 뒤 Feature View 테이블과
+TTL 범위로 조인하고, 정렬 + 윈도우 순위로 최신 행을 고름. 그래서 generate_sql_load_script가
+만든 (user_id, created_at) 인덱스를 거의 쓰지 못함.
+
+이 경로는 Feature View마다 엔티티 행당 인덱스 역순 조회 한 번으로 PIT Join을 함:
+1. entity_df의 엔티티 키 + event_timestamp만 COPY로 세션 임시 테이블에 업로드 (ANALYZE 포함)
+2. 뷰마다 LEFT JOIN LATERAL (... WHERE key = e.key AND ts <= e.event_timestamp
+   AND ts >= e.event_timestamp - ttl ORDER BY ts DESC LIMIT 1)
+3. 결과를 COPY TO STDOUT(CSV)로 받아 entity_df 행 순서로 붙이고 On-Demand 변환 적용
+
+반환 컬럼은 get_historical_features와 같음 (entity_df 컬럼 + 요청 순서의 피처 컬럼,
+full_feature_names 지원). 값 타입은 Feature View 스키마로 캐스팅함 (DECIMAL -> float64).
+TTL 경계(event_timestamp - created_at == ttl)는 Feast와 같이 포함함.
+--verify로 Feast 결과와 직접 비교, --explain으로 실행 계획(인덱스 사용 여부) 확인 가능.
+
+사용 예:
+    python3 scripts/lateral_retrieval.py --sample 20000 --verify
+    python3 scripts/lateral_retrieval.py --sample 1000 --explain
+"""
+
+import argparse
+import io
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dedup_retrieval import (DATA_DIR, DEFAULT_FEATURES, FEAST_REPO, _naive_utc, apply_on_demand, count_mismatches,
+                             resolve_views)
+from service_clients import get_postgres_pool
+
+sys.path.insert(0, str(FEAST_REPO))
+
+# Feast 임포트
+try:
+    from feast import FeatureStore
+    from feast.types import Bool, Float32, Float64, Int32, Int64, String, UnixTimestamp
+except ImportError:
+    print("Feast가 설치되어 있지 않습니다.")
+    print("설치: pip install feast[postgres]")
+    exit(1)
+
+ENTITY_TABLE = "lateral_entity_df"
+ROW_ID = "__row"
+
+# Feature View 스키마 타입 -> 결과 캐스팅 타입
+SQL_CASTS = {
+    Float32: "double precision", Float64: "double precision",
+    Int32: "bigint", Int64: "bigint",
+    Bool: "boolean", String: "text", UnixTimestamp: "timestamp",
+}
+
+
+@dataclass
+class LateralReport:
+    """LATERAL retrieval 단계별 시간"""
+    n_rows: int
+    upload_seconds: float
+    join_seconds: float
+    transform_seconds: float
+    verify_mismatches: Optional[int] = None
+    verify_seconds: Optional[float] = None
+
+    @property
+    def total_seconds(self) -> float:
+        return self.upload_seconds + self.join_seconds + self.transform_seconds
+
+    def print_report(self):
+        print(f"\n[LATERAL retrieval] {self.n_rows:,}행, 총 {self.total_seconds:.2f}s")
+        print(f"  entity_df 업로드 (COPY + ANALYZE): {self.upload_seconds:.2f}s")
+        print(f"  LATERAL PIT Join + 결과 수신: {self.join_seconds:.2f}s")
+        if self.transform_seconds:
+            print(f"  On-Demand 변환: {self.transform_seconds:.3f}s")
+        if self.verify_mismatches is not None:
+            result = "동일" if self.verify_mismatches == 0 else f"{self.verify_mismatches:,}개 값 불일치"
+            print(f"  Feast get_historical_features와 비교 ({self.verify_seconds:.2f}s): {result}")
+
+
+def _join_keys(view) -> List[str]:
+    # entity_columns는 레지스트리에서 읽은 뷰에만 채워져 있으므로 없으면 Entity 이름(= 조인 키) 사용
+    return [c.name for c in view.entity_columns] or list(view.entities)
+
+
+def _entity_columns(views: Dict) -> List[str]:
+    """entity_df에서 필요한 엔티티 컬럼 (join_key_map 반영)"""
+    columns = []
+    for view in views.values():
+        for key in _join_keys(view):
+            column = view.projection.join_key_map.get(key, key)
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def _sql_type(values: pd.Series) -> str:
+    return "BIGINT" if pd.api.types.is_integer_dtype(values) else "TEXT"
+
+
+def upload_entity_df(cur, entity_df: pd.DataFrame, entity_columns: List[str]):
+    """엔티티 키 + event_timestamp + 행 번호를 임시 테이블로 COPY (트랜잭션 종료 시 삭제)"""
+    upload = pd.DataFrame({ROW_ID: np.arange(len(entity_df), dtype=np.int64)})
+    for column in entity_columns:
+        upload[column] = entity_df[column].to_numpy()
+    upload['event_timestamp'] = _naive_utc(entity_df['event_timestamp']).to_numpy()
+
+    columns = ", ".join([f"{ROW_ID} BIGINT PRIMARY KEY"]
+                        + [f"{c} {_sql_type(upload[c])}" for c in entity_columns]
+                        + ["event_timestamp TIMESTAMP NOT NULL"])
+    cur.execute(f"CREATE TEMP TABLE {ENTITY_TABLE} ({columns}) ON COMMIT DROP")
+
+    buffer = io.StringIO()
+    upload.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {ENTITY_TABLE} ({', '.join(upload.columns)}) FROM STDIN WITH CSV", buffer)
+    cur.execute(f"ANALYZE {ENTITY_TABLE}")
+
+
+def build_lateral_query(views: Dict, features: List[str], full_feature_names: bool = False) -> Tuple[str, List[str]]:
+    """뷰별 LATERAL 인덱스 조회 조인 SQL과 결과 피처 컬럼 이름 (요청 순서)"""
+    selects, joins, output = [], [], []
+    for i, (name, view) in enumerate(views.items()):
+        alias = f"v{i}"
+        requested = [ref.split(":")[1] for ref in features if ref.split(":")[0] == name]
+        fields = {f.name: f for f in view.features}
+        ts_field = view.batch_source.timestamp_field
+
+        conditions = [f"src.{key} = e.{view.projection.join_key_map.get(key, key)}" for key in _join_keys(view)]
+        conditions.append(f"src.{ts_field} <= e.event_timestamp")
+        if view.ttl and view.ttl.total_seconds() > 0:
+            conditions.append(f"src.{ts_field} >= e.event_timestamp - interval '{int(view.ttl.total_seconds())} seconds'")
+
+        joins.append(f"""
+        LEFT JOIN LATERAL (
+            SELECT {', '.join(f'src.{f}' for f in requested)}
+            FROM {view.batch_source.get_table_query_string()} src
+            WHERE {' AND '.join(conditions)}
+            ORDER BY src.{ts_field} DESC
+            LIMIT 1
+        ) {alias} ON true""")
+
+        prefix = view.projection.name_to_use()
+        for feature in requested:
+            column = f"{prefix}__{feature}" if full_feature_names else feature
+            cast = SQL_CASTS.get(fields[feature].dtype)
+            value = f"{alias}.{feature}::{cast}" if cast else f"{alias}.{feature}"
+            selects.append(f'{value} AS "{column}"')
+            output.append(column)
+
+    query = (f"SELECT e.{ROW_ID}, {', '.join(selects)}\n"
+             f"        FROM {ENTITY_TABLE} e{''.join(joins)}\n"
+             f"        ORDER BY e.{ROW_ID}")
+    return query, output
+
+
+def fetch_frame(cur, query: str) -> pd.DataFrame:
+    """COPY (query) TO STDOUT으로 결과를 CSV 스트림으로 받아 DataFrame으로 변환"""
+    buffer = io.StringIO()
+    cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '\\N')", buffer)
+    buffer.seek(0)
+    # 빈 문자열과 NULL을 구분하기 위해 '\N'만 결측으로 처리
+    return pd.read_csv(buffer, na_values=['\\N'], keep_default_na=False)
+
+
+def get_historical_features_lateral(store: FeatureStore, entity_df: pd.DataFrame, features: List[str],
+                                    verify: bool = False, full_feature_names: bool = False,
+                                    explain: bool = False) -> Tuple[pd.DataFrame, LateralReport]:
+    """get_historical_features와 같은 결과를 뷰별 LATERAL 인덱스 조회로 계산
+
+    반환 DataFrame은 entity_df의 모든 컬럼(원래 순서/인덱스) 뒤에 피처 컬럼이 붙은 형태.
+    On-Demand 피처의 입력이 되는 소스 피처는 Feast와 마찬가지로 features에 함께 요청해야 함.
+    """
+    views, odfvs = resolve_views(store, features)
+    entity_columns = _entity_columns(views)
+    query, feature_columns = build_lateral_query(views, features, full_feature_names)
+
+    t0 = time.perf_counter()
+    with get_postgres_pool().connection() as conn:
+        with conn.cursor() as cur:
+            upload_entity_df(cur, entity_df, entity_columns)
+            t1 = time.perf_counter()
+            if explain:
+                cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}")
+                print("\n".join(row[0] for row in cur.fetchall()))
+            joined = fetch_frame(cur, query)
+    t2 = time.perf_counter()
+
+    fanned = joined[feature_columns].set_axis(entity_df.index)
+    result = pd.concat([entity_df, fanned], axis=1)
+    if odfvs:
+        result = apply_on_demand(result, odfvs, features, full_feature_names)
+    t3 = time.perf_counter()
+
+    report = LateralReport(
+        n_rows=len(entity_df),
+        upload_seconds=t1 - t0,
+        join_seconds=t2 - t1,
+        transform_seconds=(t3 - t2) if odfvs else 0.0,
+    )
+    if verify:
+        t4 = time.perf_counter()
+        columns = [c for c in result.columns if c not in entity_df.columns]
+        report.verify_mismatches = count_mismatches(store, entity_df, features, result, columns,
+                                                    full_feature_names=full_feature_names)
+        report.verify_seconds = time.perf_counter() - t4
+    return result, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LATERAL 인덱스 조회 기반 Historical Retrieval")
+    parser.add_argument("--sample", type=int, default=10000, help="transactions.csv에서 뽑을 거래 수")
+    parser.add_argument("--feature", action="append", help="피처 참조 (기본: test_point_in_time_join과 동일)")
+    parser.add_argument("--full-feature-names", action="store_true")
+    parser.add_argument("--verify", action="store_true", help="Feast get_historical_features 결과와 비교")
+    parser.add_argument("--explain", action="store_true", help="EXPLAIN ANALYZE 실행 계획 출력")
+    args = parser.parse_args()
+
+    transactions = pd.read_csv(DATA_DIR / "transactions.csv", parse_dates=['event_timestamp'])
+    entity_df = transactions.sample(n=min(args.sample, len(transactions)), random_state=42)
+    entity_df = entity_df.sort_values('event_timestamp').reset_index(drop=True)
+
+    store = FeatureStore(repo_path=str(FEAST_REPO))
+    result, report = get_historical_features_lateral(store, entity_df, args.feature or DEFAULT_FEATURES,
+                                                     verify=args.verify, explain=args.explain,
+                                                     full_feature_names=args.full_feature_names)
+    report.print_report()
+    sys.exit(1 if report.verify_mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
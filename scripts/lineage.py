@@ -0,0 +1,291 @@
+"""
+데이터셋 빌드 / 학습 데이터 생성의 MLflow lineage 기록
+
+파라미터, 태그, 메트릭을 메모리에 모았다가 MlflowClient.log_batch로 한 번에
+전송하여 HTTP 왕복을 최소화함 (배치 제한: 메트릭 1000, 파라미터/태그 각 100개).
+아티팩트 업로드는 log_artifact 호출 즉시 백그라운드 스레드에 제출되므로, 파일이
+쓰인 직후 호출하면 이후 파이프라인 단계와 겹쳐 진행됨. close() 시점에 남은 업로드를 기다림.
+(업로드 중인 파일은 close() 전까지 수정하면 안 됨)
+
+MLFLOW_TRACKING_URI가 설정되지 않았거나 mlflow가 설치되어 있지 않으면 아무것도
+기록하지 않음. 로컬 파일 저장소로도 동작:
+    MLFLOW_TRACKING_URI=file:///tmp/mlruns python3 scripts/prepare_fraud_data.py
+(최신 mlflow 클라이언트는 파일 저장소에 MLFLOW_ALLOW_FILE_STORE=true가 필요하며,
+ sqlite:///mlflow.db도 같은 용도로 사용 가능)
+
+자체 점검 (임시 file: 저장소에 run을 기록하고 FINISHED/FAILED 상태, 파라미터, 메트릭,
+아티팩트를 확인, 실패 시 종료 코드 1):
+    python3 scripts/lineage.py --self-test
+
+환경 변수:
+- MLFLOW_TRACKING_URI: 추적 서버 (예: http://localhost:5000)
+- MLFLOW_EXPERIMENT_NAME: 실험 이름 (기본: fraud-detection-data)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    from mlflow.entities import Metric, Param, RunTag
+    from mlflow.tracking import MlflowClient
+except ImportError:
+    MlflowClient = None
+
+try:
+    from mlflow.utils.validation import MAX_PARAM_VAL_LENGTH
+except ImportError:
+    MAX_PARAM_VAL_LENGTH = 500
+
+DEFAULT_EXPERIMENT = "fraud-detection-data"
+
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_TAGS_PER_BATCH = 100
+MAX_ENTITIES_PER_BATCH = 1000
+
+_INVALID_KEY_CHARS = re.compile(r"[^0-9A-Za-z_\-./]+")
+
+
+def metric_key(*parts: str) -> str:
+    """MLflow 키로 쓸 수 없는 문자를 '_'로 치환 (예: 'sample (cached)')"""
+    return ".".join(_INVALID_KEY_CHARS.sub("_", str(p)).strip("_") for p in parts)
+
+
+def dataset_digest(df: pd.DataFrame) -> str:
+    """DataFrame 내용 해시 (컬럼 이름/순서 + 행 값, 인덱스 제외)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(map(str, df.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class LineageLogger:
+    """MLflow run 하나에 대한 배치/비동기 기록기"""
+
+    def __init__(self, run_name: str, experiment: Optional[str] = None,
+                 tracking_uri: Optional[str] = None, tags: Optional[Dict] = None):
+        self.run_name = run_name
+        self.tracking_uri = tracking_uri or os.getenv("MLFLOW_TRACKING_URI")
+        self.experiment = experiment or os.getenv("MLFLOW_EXPERIMENT_NAME", DEFAULT_EXPERIMENT)
+        self.client = None
+        self.run_id: Optional[str] = None
+
+        self._params: Dict[str, str] = {}
+        self._tags: Dict[str, str] = dict(tags or {})
+        self._metrics: List = []
+        self._uploads: List[Future] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tmp_dir: Optional[tempfile.TemporaryDirectory] = None
+
+        if not self.tracking_uri:
+            return
+        if MlflowClient is None:
+            print("Warning: mlflow가 설치되어 있지 않아 lineage를 기록하지 않습니다 (pip install mlflow-skinny)")
+            return
+        try:
+            self.client = MlflowClient(tracking_uri=self.tracking_uri)
+            experiment = self.client.get_experiment_by_name(self.experiment)
+            experiment_id = (experiment.experiment_id if experiment is not None
+                             else self.client.create_experiment(self.experiment))
+            run = self.client.create_run(experiment_id, run_name=run_name)
+            self.run_id = run.info.run_id
+        except Exception as e:
+            print(f"Warning: MLflow run 생성 실패 ({self.tracking_uri}): {e}")
+            self.client = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(status="FAILED" if exc_type else "FINISHED")
+        return False
+
+    # --- 버퍼링 (flush 전까지 네트워크 호출 없음) ---
+
+    def log_params(self, params: Dict):
+        for key, value in params.items():
+            value = value if isinstance(value, str) else json.dumps(value, default=str)
+            self._params[metric_key(key)] = value[:MAX_PARAM_VAL_LENGTH]
+
+    def set_tags(self, tags: Dict):
+        for key, value in tags.items():
+            self._tags[metric_key(key)] = str(value)
+
+    def log_metrics(self, metrics: Dict, step: int = 0):
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            if value is None:
+                continue
+            self._metrics.append((metric_key(key), float(value), timestamp, step))
+
+    def log_profiler(self, profiler):
+        """StageProfiler의 단계별 시간/메모리/행 수를 메트릭으로 추가"""
+        for stage in profiler.stages:
+            prefix = metric_key("stage", stage.name)
+            self.log_metrics({
+                f"{prefix}.wall_seconds": stage.wall_seconds,
+                f"{prefix}.cpu_seconds": stage.cpu_seconds,
+                f"{prefix}.peak_rss_mb": stage.peak_rss_mb,
+                f"{prefix}.rss_delta_mb": stage.rss_delta_mb,
+                f"{prefix}.tracemalloc_peak_mb": stage.tracemalloc_peak_mb,
+                f"{prefix}.rows_in": stage.rows_in,
+                f"{prefix}.rows_out": stage.rows_out,
+            })
+        self.set_tags({"pipeline.run_id": profiler.run_id})
+
+    def flush(self):
+        """버퍼의 파라미터/태그/메트릭을 log_batch로 전송"""
+        params, tags, metrics = self._params, self._tags, self._metrics
+        self._params, self._tags, self._metrics = {}, {}, []
+        if not self.enabled:
+            return
+        params = [Param(k, v) for k, v in params.items()]
+        tags = [RunTag(k, v) for k, v in tags.items()]
+        metrics = [Metric(k, v, ts, step) for k, v, ts, step in metrics]
+
+        try:
+            while params or tags or metrics:
+                batch_params = params[:MAX_PARAMS_TAGS_PER_BATCH]
+                batch_tags = tags[:MAX_PARAMS_TAGS_PER_BATCH]
+                room = min(MAX_METRICS_PER_BATCH,
+                           MAX_ENTITIES_PER_BATCH - len(batch_params) - len(batch_tags))
+                batch_metrics = metrics[:room]
+                self.client.log_batch(self.run_id, metrics=batch_metrics,
+                                      params=batch_params, tags=batch_tags)
+                params = params[len(batch_params):]
+                tags = tags[len(batch_tags):]
+                metrics = metrics[len(batch_metrics):]
+        except Exception as e:
+            print(f"Warning: MLflow log_batch 실패: {e}")
+
+    # --- 아티팩트 (백그라운드 업로드) ---
+
+    def log_artifact(self, path: Path, artifact_path: Optional[str] = None):
+        """파일 업로드를 바로 백그라운드 스레드에 제출 (파일은 close() 전까지 그대로 유지되어야 함)"""
+        if not self.enabled:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-artifacts")
+        self._uploads.append(self._executor.submit(
+            self.client.log_artifact, self.run_id, str(path), artifact_path))
+
+    def log_dict(self, obj: Dict, filename: str, artifact_path: Optional[str] = None):
+        """dict를 JSON 아티팩트로 업로드 (백그라운드)"""
+        if not self.enabled:
+            return
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="lineage-")
+        path = Path(self._tmp_dir.name) / filename
+        path.write_text(json.dumps(obj, indent=2, ensure_ascii=False, default=str))
+        self.log_artifact(path, artifact_path)
+
+    def close(self, status: str = "FINISHED"):
+        """남은 기록 전송, 업로드 완료 대기 후 run 종료"""
+        self.flush()
+        if self._executor is not None:
+            for future in self._uploads:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Warning: MLflow 아티팩트 업로드 실패: {e}")
+            self._executor.shutdown()
+            self._executor = None
+        self._uploads.clear()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+        if self.enabled:
+            try:
+                self.client.set_terminated(self.run_id, status=status)
+            except Exception as e:
+                print(f"Warning: MLflow run 종료 실패: {e}")
+            print(f"MLflow lineage: {self.tracking_uri} (experiment={self.experiment}, run_id={self.run_id})")
+            self.client = None
+
+
+def self_test() -> int:
+    """임시 file: 저장소에 run을 기록하고 상태/파라미터/메트릭/아티팩트를 확인 (실패 시 1)"""
+    if MlflowClient is None:
+        print("Error: mlflow가 설치되어 있지 않습니다 (pip install mlflow-skinny)")
+        return 1
+    # mlflow 3.x는 이 변수 없이는 파일 저장소를 거부함
+    os.environ["MLFLOW_ALLOW_FILE_STORE"] = "true"
+    failures = []
+
+    def check(ok: bool, message: str):
+        print(f"  [{'ok' if ok else 'FAIL'}] {message}")
+        if not ok:
+            failures.append(message)
+
+    with tempfile.TemporaryDirectory(prefix="lineage-self-test-") as tmp:
+        uri = (Path(tmp) / "mlruns").as_uri()
+        print(f"Lineage self-test: {uri}")
+        report_path = Path(tmp) / "report.json"
+        report_path.write_text(json.dumps({'stages': []}))
+
+        n_metrics = MAX_METRICS_PER_BATCH + 10  # log_batch 분할 확인
+        with LineageLogger("lineage-self-test", tracking_uri=uri, tags={'mmp.kind': 'self_test'}) as lineage:
+            check(lineage.enabled, "run 생성")
+            lineage.log_params({'sample_size': 100, 'feature_refs': ["view:a", "view:b"]})
+            lineage.log_metrics({'rows': 100, f"{metric_key('stage', 'sample (cached)')}.wall_seconds": 0.5})
+            for step in range(n_metrics):
+                lineage.log_metrics({'loss': 1.0 / (step + 1)}, step=step)
+            lineage.log_artifact(report_path, "profiles")
+            lineage.log_dict({'stage_keys': {'sample': 'abc'}}, "lineage.json")
+        finished_id = lineage.run_id
+
+        failed_id = None
+        try:
+            with LineageLogger("lineage-self-test-failed", tracking_uri=uri) as lineage:
+                failed_id = lineage.run_id
+                raise RuntimeError("self-test")
+        except RuntimeError:
+            pass
+
+        client = MlflowClient(tracking_uri=uri)
+        run = client.get_run(finished_id)
+        check(run.info.status == "FINISHED", f"run 상태 FINISHED ({run.info.status})")
+        check(run.data.params.get('sample_size') == "100"
+              and run.data.params.get('feature_refs') == '["view:a", "view:b"]', "파라미터")
+        check(run.data.tags.get('mmp.kind') == "self_test", "태그")
+        check(run.data.metrics.get('rows') == 100.0
+              and 'stage.sample_cached.wall_seconds' in run.data.metrics, "메트릭 (키 정리 포함)")
+        history = client.get_metric_history(finished_id, 'loss')
+        check(len(history) == n_metrics, f"메트릭 이력 {len(history)}/{n_metrics} (배치 분할)")
+        artifacts = {a.path for a in client.list_artifacts(finished_id)}
+        artifacts |= {a.path for a in client.list_artifacts(finished_id, "profiles")}
+        check({"lineage.json", "profiles/report.json"} <= artifacts, f"아티팩트 ({sorted(artifacts)})")
+        failed_status = client.get_run(failed_id).info.status if failed_id else None
+        check(failed_status == "FAILED", f"예외 시 run 상태 FAILED ({failed_status})")
+
+    print("Lineage self-test 통과" if not failures else f"Lineage self-test 실패 {len(failures)}건")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MLflow lineage 기록기")
+    parser.add_argument("--self-test", action="store_true",
+                        help="임시 file: 추적 저장소에 기록하고 결과를 확인")
+    args = parser.parse_args()
+    if not args.self_test:
+        parser.print_help()
+        sys.exit(2)
+    sys.exit(self_test())
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,15 @@ POSTGRES_DB="${POSTGRES_DB:-mlpipeline}"
 POSTGRES_USER="${POSTGRES_USER:-mluser}"
 POSTGRES_PASSWORD="${POSTGRES_PASSWORD:-mlpassword}"
 
+# 단계별 프로파일링 (scripts/pipeline_profiler.py)
+# PIPELINE_RUN_ID를 공유하면 prepare/load/PIT 리포트를 한 실행으로 묶어 볼 수 있음
+export PIPELINE_RUN_ID="${PIPELINE_RUN_ID:-$(date +%Y%m%d_%H%M%S)}"
+profiled() {
+    local stage="$1"
+    shift
+    python3 "${SCRIPT_DIR}/pipeline_profiler.py" run --run-name load_fraud_data --stage "${stage}" -- "$@"
+}
+
 echo "=============================================="
 echo "Fraud Detection 데이터 로드 시작"
 echo "=============================================="
@@ -40,7 +49,7 @@ echo ""
 
 # 테이블 생성
 echo "테이블 생성 중..."
-PGPASSWORD="${POSTGRES_PASSWORD}" psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -f "${DATA_DIR}/create_tables.sql"
+PGPASSWORD="${POSTGRES_PASSWORD}" profiled create_tables psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -f "${DATA_DIR}/create_tables.sql"
 echo ""
 
 # CSV 데이터 로드
@@ -48,29 +57,29 @@ echo "CSV 데이터 로드 중..."
 
 # transactions 테이블
 echo "  - transactions 로드..."
-PGPASSWORD="${POSTGRES_PASSWORD}" psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.transactions(transaction_id, user_id, merchant_id, category, amount, is_fraud, event_timestamp, lat, long, merch_lat, merch_long) FROM '${DATA_DIR}/transactions.csv' WITH CSV HEADER;"
+PGPASSWORD="${POSTGRES_PASSWORD}" profiled load_transactions psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.transactions(transaction_id, user_id, merchant_id, category, amount, is_fraud, event_timestamp, lat, long, merch_lat, merch_long) FROM '${DATA_DIR}/transactions.csv' WITH CSV HEADER;"
 
 # user_demographics 테이블
 echo "  - user_demographics 로드..."
-PGPASSWORD="${POSTGRES_PASSWORD}" psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.user_demographics(user_id, gender, city, state, zip_code, lat, long, city_pop, job, dob, age, created_at) FROM '${DATA_DIR}/user_demographics.csv' WITH CSV HEADER;"
+PGPASSWORD="${POSTGRES_PASSWORD}" profiled load_user_demographics psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.user_demographics(user_id, gender, city, state, zip_code, lat, long, city_pop, job, dob, created_at, age, valid_from, valid_to, valid_to_ttl) FROM '${DATA_DIR}/user_demographics.csv' WITH CSV HEADER;"
 
 # user_features 테이블
 echo "  - user_features 로드..."
-PGPASSWORD="${POSTGRES_PASSWORD}" psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.user_features(user_id, total_transactions, total_amount, avg_amount, max_amount, min_amount, std_amount, transactions_7d, amount_7d, avg_amount_7d, transactions_30d, amount_30d, avg_amount_30d, unique_merchants, unique_categories, fraud_count, created_at) FROM '${DATA_DIR}/user_features.csv' WITH CSV HEADER;"
+PGPASSWORD="${POSTGRES_PASSWORD}" profiled load_user_features psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.user_features(user_id, total_transactions, total_amount, avg_amount, max_amount, min_amount, std_amount, transactions_7d, amount_7d, avg_amount_7d, transactions_30d, amount_30d, avg_amount_30d, unique_merchants, unique_categories, fraud_count, created_at, valid_from, valid_to, valid_to_ttl) FROM '${DATA_DIR}/user_features.csv' WITH CSV HEADER;"
 
 # merchant_features 테이블
 echo "  - merchant_features 로드..."
-PGPASSWORD="${POSTGRES_PASSWORD}" psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.merchant_features(merchant_id, avg_transaction_amount, std_transaction_amount, min_transaction_amount, max_transaction_amount, total_transactions, fraud_count, fraud_rate, primary_category, lat, long, created_at) FROM '${DATA_DIR}/merchant_features.csv' WITH CSV HEADER;"
+PGPASSWORD="${POSTGRES_PASSWORD}" profiled load_merchant_features psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.merchant_features(merchant_id, avg_transaction_amount, std_transaction_amount, min_transaction_amount, max_transaction_amount, total_transactions, fraud_count, fraud_rate, primary_category, lat, long, created_at, valid_from, valid_to, valid_to_ttl) FROM '${DATA_DIR}/merchant_features.csv' WITH CSV HEADER;"
 
 # category_features 테이블
 echo "  - category_features 로드..."
-PGPASSWORD="${POSTGRES_PASSWORD}" psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.category_features(category, avg_amount, std_amount, min_amount, max_amount, total_transactions, fraud_count, fraud_rate, created_at) FROM '${DATA_DIR}/category_features.csv' WITH CSV HEADER;"
+PGPASSWORD="${POSTGRES_PASSWORD}" profiled load_category_features psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" -c "\COPY features.category_features(category, avg_amount, std_amount, min_amount, max_amount, total_transactions, fraud_count, fraud_rate, created_at, valid_from, valid_to, valid_to_ttl) FROM '${DATA_DIR}/category_features.csv' WITH CSV HEADER;"
 
 echo ""
 
 # 통계 업데이트
 echo "테이블 통계 업데이트..."
-PGPASSWORD="${POSTGRES_PASSWORD}" psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" << EOF
+PGPASSWORD="${POSTGRES_PASSWORD}" profiled analyze psql -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}" << EOF
 ANALYZE features.transactions;
 ANALYZE features.user_demographics;
 ANALYZE features.user_features;
@@ -100,3 +109,4 @@ echo ""
 echo "=============================================="
 echo "데이터 로드 완료!"
 echo "=============================================="
+python3 "${SCRIPT_DIR}/pipeline_profiler.py" summary --run-id "${PIPELINE_RUN_ID}"
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+로컬 스택 서비스 지연 시간 메트릭 익스포터 (Prometheus text format)
+
+test-integration.py는 한 번 통과/실패만 확인하므로, 실제 작업에 영향을 주는 지연 시간을
+계속 보기 위한 작은 데몬. dev-contract.yml의 provides_services에 선언된 서비스를
+주기적으로 조회하고 결과를 로컬 포트의 /metrics로 노출함.
+
+프로브:
+- postgresql: features.user_features PIT 포인트 조회 (user_id, created_at 인덱스 사용)
+- redis: GET (존재하지 않는 프로브 키, 쓰기 없음) / HGETALL (Feast online store 해시 키)
+- mlflow: 계약의 health_check 경로 / experiments search API
+
+메트릭:
+- mmp_probe_latency_seconds: 누적 히스토그램 (_bucket/_sum/_count)
+- mmp_probe_latency_window_seconds{quantile}: 최근 --window초 p50/p90/p99/max
+- mmp_probe_errors_total / mmp_probe_up: 에러 수 / 마지막 프로브 성공 여부
+- mmp_pool_*: service_clients 공용 풀 메트릭 (대여 수, 대기 시간 등)
+- mmp_exporter_cpu_seconds_total: 익스포터 자신의 CPU 사용 시간
+
+부하 테스트와 함께 돌려도 영향이 적도록 스레드 하나가 프로브를 순서대로 실행하고
+(주기당 서비스별 요청 1~2개), 연결은 공용 풀 / HTTP keep-alive 세션으로 재사용함.
+조회 키는 샘플링하여 돌아가며 사용. Redis 해시 키는 --resample초마다 다시 샘플링하며,
+해시 키가 하나도 없으면 HGETALL 프로브를 건너뜀 (빈 키 조회 지연을 기록하지 않음).
+익스포터는 어떤 서비스에도 쓰지 않음.
+
+사용 예:
+    python3 scripts/metrics_exporter.py                 # http://127.0.0.1:9108/metrics
+    python3 scripts/metrics_exporter.py --interval 5 --window 300 --port 9200
+    python3 scripts/metrics_exporter.py --once          # 한 주기 실행 후 메트릭 출력
+
+Prometheus 설정 예:
+    scrape_configs:
+      - job_name: mmp-local-dev
+        static_configs:
+          - targets: ['host.docker.internal:9108']
+"""
+
+import argparse
+import itertools
+import sys
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from service_clients import CONTRACT_PATH, get_postgres_pool, get_redis_pool, get_settings, pool_metrics
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+# 누적 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+WINDOW_QUANTILES = (0.5, 0.9, 0.99)
+
+# service_clients.PoolStats.snapshot() 항목 중 누적 값
+POOL_COUNTERS = ('checkouts', 'errors', 'timeouts', 'discarded', 'wait_seconds_total')
+
+# 계약 파일을 읽을 수 없을 때 사용하는 서비스 목록
+DEFAULT_SERVICES = [
+    {'name': 'mlflow', 'port': 5001, 'health_check': '/health'},
+    {'name': 'postgresql', 'port': 5432},
+    {'name': 'redis', 'port': 6379},
+]
+
+# GET 프로브용 키. 만들지 않으므로 항상 없는 키 조회 (운영 online store에도 쓰지 않음)
+REDIS_PROBE_KEY = "mmp:metrics_exporter:probe"
+SAMPLE_KEYS = 100
+RESAMPLE_SECONDS = 300.0
+
+
+class ProbeSkipped(Exception):
+    """조회할 대상이 아직 없음 (에러로 집계하지 않고 이번 주기를 건너뜀)"""
+
+
+def contract_services(path: Path = CONTRACT_PATH) -> List[Dict]:
+    """dev-contract.yml의 provides_services"""
+    if yaml is None or not Path(path).exists():
+        return list(DEFAULT_SERVICES)
+    with open(path) as f:
+        contract = yaml.safe_load(f) or {}
+    return list(contract.get('provides_services', DEFAULT_SERVICES))
+
+
+class RollingLatency:
+    """누적 히스토그램 + 최근 window초 샘플 (스레드 안전)"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # 마지막은 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.up = 0
+        self._recent = deque()  # (monotonic 시각, 지연 시간)
+
+    def observe(self, seconds: float, now: float):
+        with self._lock:
+            self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.up = 1
+            self._recent.append((now, seconds))
+            self._trim(now)
+
+    def error(self, now: float):
+        with self._lock:
+            self.errors += 1
+            self.up = 0
+            self._trim(now)
+
+    def _trim(self, now: float):
+        while self._recent and self._recent[0][0] < now - self.window:
+            self._recent.popleft()
+
+    def snapshot(self, now: float) -> Dict:
+        with self._lock:
+            self._trim(now)
+            recent = np.fromiter((s for _, s in self._recent), dtype=np.float64, count=len(self._recent))
+            return {
+                'buckets': list(itertools.accumulate(self.buckets)),
+                'count': self.count,
+                'sum': self.total,
+                'errors': self.errors,
+                'up': self.up,
+                'window': {q: float(np.quantile(recent, q)) for q in WINDOW_QUANTILES} if len(recent) else {},
+                'window_max': float(recent.max()) if len(recent) else None,
+                'window_count': len(recent),
+            }
+
+
+class Probe:
+    """서비스 요청 하나. setup()은 성공할 때까지 매 주기 다시 시도
+
+    setup_every가 있으면 성공한 뒤에도 그 간격(초)마다 setup()을 다시 실행 (키 재샘플링).
+    """
+
+    def __init__(self, name: str, service: str, call: Callable[[], None],
+                 setup: Optional[Callable[[], None]] = None, setup_every: Optional[float] = None):
+        self.name = name
+        self.service = service
+        self.call = call
+        self._setup = setup
+        self.setup_every = setup_every
+        self.ready = setup is None
+        self._setup_at = 0.0
+
+    def ensure_ready(self):
+        now = time.monotonic()
+        if self.ready and self.setup_every is not None and now - self._setup_at >= self.setup_every:
+            self.ready = False
+        if not self.ready:
+            self._setup_at = now
+            self._setup()
+            self.ready = True
+
+
+def postgres_probes(timeout: float) -> List[Probe]:
+    """features.user_features PIT 포인트 조회 (샘플 user_id를 돌아가며 사용)"""
+    state = {'user_ids': None}
+
+    def pool():
+        # 공용 풀을 처음 만드는 호출이므로 익스포터용 작은 풀 / 짧은 statement_timeout 지정
+        return get_postgres_pool(maxconn=1, statement_timeout_ms=int(timeout * 1000),
+                                 acquire_timeout=timeout, application_name="mmp-metrics-exporter")
+
+    def setup():
+        with pool().cursor() as cur:
+            cur.execute("SELECT DISTINCT user_id FROM features.user_features LIMIT %s", (SAMPLE_KEYS,))
+            user_ids = [row[0] for row in cur.fetchall()] or [None]
+        state['user_ids'] = itertools.cycle(user_ids)
+
+    def call():
+        with pool().cursor() as cur:
+            cur.execute(
+                "SELECT * FROM features.user_features WHERE user_id = %s AND created_at <= now() "
+                "ORDER BY created_at DESC LIMIT 1",
+                (next(state['user_ids']),),
+            )
+            cur.fetchall()
+
+    return [Probe('pg_user_features_pit', 'postgresql', call, setup)]
+
+
+def redis_probes(timeout: float, resample: float = RESAMPLE_SECONDS) -> List[Probe]:
+    """GET (없는 키) / HGETALL (Feast online store 해시 키를 돌아가며 사용, resample초마다 재샘플링)"""
+    state = {'keys': None}
+
+    def get_redis():
+        # 공용 풀을 처음 만드는 호출이므로 익스포터용 작은 풀 / 짧은 소켓 타임아웃 지정
+        return get_redis_pool(max_connections=2, acquire_timeout=timeout, socket_timeout=timeout).client
+
+    def setup_hgetall():
+        keys = list(itertools.islice(get_redis().scan_iter(count=1000, _type="HASH"), SAMPLE_KEYS))
+        if not keys:
+            raise ProbeSkipped("해시 키 없음 - feast materialize 전")
+        state['keys'] = itertools.cycle(keys)
+
+    return [
+        Probe('redis_get', 'redis', lambda: get_redis().get(REDIS_PROBE_KEY)),
+        Probe('redis_hgetall', 'redis', lambda: get_redis().hgetall(next(state['keys'])),
+              setup_hgetall, setup_every=resample),
+    ]
+
+
+def mlflow_probes(base_url: str, health_path: str, timeout: float) -> List[Probe]:
+    """health_check 경로 / experiments search API (keep-alive 세션 재사용)"""
+    base_url = base_url.rstrip('/')
+    session = requests.Session() if requests is not None else None
+
+    def get(path: str):
+        url = base_url + path
+        if session is not None:
+            response = session.get(url, timeout=timeout)
+            response.raise_for_status()
+            return
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+
+    return [
+        Probe('mlflow_health', 'mlflow', lambda: get(health_path)),
+        Probe('mlflow_experiments_search', 'mlflow',
+              lambda: get("/api/2.0/mlflow/experiments/search?max_results=1")),
+    ]
+
+
+def build_probes(services: List[Dict], timeout: float, only: Optional[List[str]] = None,
+                 resample: float = RESAMPLE_SECONDS) -> List[Probe]:
+    """계약에 선언된 서비스의 프로브 목록"""
+    settings = get_settings()
+    probes = []
+    for service in services:
+        name = service.get('name')
+        if name == 'postgresql':
+            probes += postgres_probes(timeout)
+        elif name == 'redis':
+            probes += redis_probes(timeout, resample)
+        elif name == 'mlflow':
+            base_url = settings.mlflow_tracking_uri or f"http://localhost:{service.get('port', 5000)}"
+            probes += mlflow_probes(base_url, service.get('health_check', '/health'), timeout)
+        else:
+            print(f"Warning: 프로브가 정의되지 않은 서비스 '{name}' - 건너뜀")
+    if only:
+        probes = [p for p in probes if p.name in only or p.service in only]
+    return probes
+
+
+class ProbeRunner(threading.Thread):
+    """interval마다 모든 프로브를 순서대로 실행 (고정 일정, 밀린 주기는 건너뜀)"""
+
+    def __init__(self, probes: List[Probe], interval: float, window: float, verbose: bool = False):
+        super().__init__(name="probe-runner", daemon=True)
+        self.probes = probes
+        self.interval = interval
+        self.verbose = verbose
+        self.latency = {p.name: RollingLatency(window) for p in probes}
+        self.cycles = 0
+        self._stop_event = threading.Event()
+
+    def run_once(self):
+        for probe in self.probes:
+            try:
+                probe.ensure_ready()  # 키 샘플링 등은 지연 시간에 포함하지 않음
+                start = time.perf_counter()
+                probe.call()
+            except ProbeSkipped as e:
+                if self.verbose:
+                    print(f"  {probe.name}: 건너뜀 ({e})", file=sys.stderr)
+            except Exception as e:
+                self.latency[probe.name].error(time.monotonic())
+                if self.verbose:
+                    print(f"  {probe.name}: {type(e).__name__}: {e}", file=sys.stderr)
+            else:
+                self.latency[probe.name].observe(time.perf_counter() - start, time.monotonic())
+        self.cycles += 1
+
+    def run(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            self.run_once()
+            next_tick += self.interval
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now + self.interval
+            self._stop_event.wait(next_tick - now)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render_metrics(runner: ProbeRunner) -> str:
+    """Prometheus text exposition format (0.0.4)"""
+    now = time.monotonic()
+    snapshots = {p: (p.service, runner.latency[p.name].snapshot(now)) for p in runner.probes}
+    lines = [
+        "# HELP mmp_probe_latency_seconds Service probe latency.",
+        "# TYPE mmp_probe_latency_seconds histogram",
+    ]
+    for probe, (service, s) in snapshots.items():
+        base = dict(probe=probe.name, service=service)
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), s['buckets']):
+            lines.append(f"mmp_probe_latency_seconds_bucket{_labels(**base, le=bound)} {count}")
+        lines.append(f"mmp_probe_latency_seconds_sum{_labels(**base)} {s['sum']:.9f}")
+        lines.append(f"mmp_probe_latency_seconds_count{_labels(**base)} {s['count']}")
+
+    lines += [
+        "# HELP mmp_probe_latency_window_seconds Probe latency quantiles over the rolling window.",
+        "# TYPE mmp_probe_latency_window_seconds gauge",
+    ]
+    for probe, (service, s) in snapshots.items():
+        for q, value in s['window'].items():
+            lines.append(f"mmp_probe_latency_window_seconds"
+                         f"{_labels(probe=probe.name, service=service, quantile=q)} {value:.9f}")
+        if s['window_max'] is not None:
+            lines.append(f"mmp_probe_latency_window_seconds"
+                         f"{_labels(probe=probe.name, service=service, quantile='max')} {s['window_max']:.9f}")
+
+    for metric, key, kind, help_text in (
+        ("mmp_probe_errors_total", 'errors', "counter", "Failed probes."),
+        ("mmp_probe_up", 'up', "gauge", "1 if the last probe succeeded."),
+        ("mmp_probe_window_samples", 'window_count', "gauge", "Successful probes in the rolling window."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for probe, (service, s) in snapshots.items():
+            lines.append(f"{metric}{_labels(probe=probe.name, service=service)} {s[key]}")
+
+    pools = pool_metrics()
+    for key in next(iter(pools.values()), {}):
+        kind = "counter" if key in POOL_COUNTERS else "gauge"
+        metric = f"mmp_pool_{key}" + ("_total" if kind == "counter" and not key.endswith("_total") else "")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines += [f"{metric}{_labels(pool=pool)} {stats[key]}" for pool, stats in pools.items()]
+
+    lines += [
+        "# HELP mmp_exporter_cpu_seconds_total CPU time used by the exporter process.",
+        "# TYPE mmp_exporter_cpu_seconds_total counter",
+        f"mmp_exporter_cpu_seconds_total {time.process_time():.6f}",
+        "# TYPE mmp_exporter_probe_cycles_total counter",
+        f"mmp_exporter_probe_cycles_total {runner.cycles}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def make_handler(runner: ProbeRunner):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = render_metrics(runner).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # 스크레이프마다 로그를 남기지 않음
+
+    return MetricsHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 스택 서비스 지연 시간 Prometheus 익스포터")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9108)
+    parser.add_argument("--interval", type=float, default=1.0, help="프로브 주기 (초)")
+    parser.add_argument("--window", type=float, default=60.0, help="분위수 계산 구간 (초)")
+    parser.add_argument("--timeout", type=float, default=2.0, help="프로브별 타임아웃 (초)")
+    parser.add_argument("--resample", type=float, default=RESAMPLE_SECONDS,
+                        help="Redis 해시 키 재샘플링 주기 (초)")
+    parser.add_argument("--probes", nargs="+", help="실행할 프로브 또는 서비스 이름 (기본: 전체)")
+    parser.add_argument("--once", action="store_true", help="한 주기만 실행하고 메트릭 출력")
+    parser.add_argument("--verbose", action="store_true", help="프로브 에러 출력")
+    args = parser.parse_args()
+
+    probes = build_probes(contract_services(), args.timeout, args.probes, args.resample)
+    if not probes:
+        print("실행할 프로브가 없습니다.")
+        exit(1)
+    runner = ProbeRunner(probes, args.interval, args.window, verbose=args.verbose or args.once)
+
+    if args.once:
+        runner.run_once()
+        print(render_metrics(runner), end="")
+        return
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(runner))
+    runner.start()
+    print(f"프로브 {len(probes)}개 ({', '.join(p.name for p in probes)}), 주기 {args.interval}s")
+    print(f"메트릭: http://{args.host}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
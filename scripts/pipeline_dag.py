@@ -0,0 +1,313 @@
+"""
+데이터 준비 파이프라인 DAG 실행기
+
+각 단계(Stage)는 입력 아티팩트 이름과 자신의 출력(단계 이름)을 선언하며,
+출력은 다음 값의 해시로 주소가 매겨진 캐시에 저장됨:
+- 단계 함수의 코드 (함수가 참조하는 로컬 함수/클래스/모듈/상수까지 포함)
+- 단계 파라미터 (예: 원본 파일 fingerprint, 샘플 크기)
+- 입력 아티팩트의 키 (입력 데이터가 바뀌면 하위 단계 키도 모두 바뀜)
+
+키가 같은 아티팩트가 이미 있으면 단계를 건너뛰고, use_cache=False면 캐시를 읽지 않고
+모든 단계를 다시 실행한 뒤 결과로 캐시 항목을 덮어씀.
+
+jobs > 1이면 캐시를 놓친 단계 중 서로 의존하지 않는 것들을 프로세스 풀에서 동시에 실행함.
+단계 함수는 대부분 GIL을 잡는 pandas/Python 루프이므로 스레드로는 실제로 겹쳐 실행되지 않음.
+작업 프로세스는 입력 아티팩트를 캐시 파일에서 읽고 결과를 캐시에 저장하며, 부모 프로세스는
+대상 아티팩트만 다시 읽음 (단계 함수는 모듈 최상위 함수여야 함). 단계별 측정값은 작업
+프로세스에서 기록되므로 peak RSS도 단계별 값이 됨. jobs=1이면 현재 프로세스에서 순서대로 실행.
+
+사용 예:
+    pipeline = Pipeline([
+        Stage('sample', load_and_sample_data, params={'source': fingerprint}),
+        Stage('transactions', prepare_transactions, inputs=('sample',)),
+    ], cache_dir=CACHE_DIR, profiler=profiler)
+    results = pipeline.run(targets=['transactions'], jobs=4)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import types
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from pipeline_profiler import StageProfiler
+
+try:
+    import pyarrow  # noqa: F401  (feather 저장에 필요)
+    ARTIFACT_SUFFIX = ".arrow"
+except ImportError:
+    ARTIFACT_SUFFIX = ".pkl"
+
+LOCAL_DIR = Path(__file__).resolve().parent
+_SIMPLE_TYPES = (int, float, str, bool, type(None), tuple, Path)
+
+
+@dataclass
+class Stage:
+    """파이프라인 단계. 출력 아티팩트 이름은 단계 이름과 같음"""
+    name: str
+    func: Callable
+    inputs: Tuple[str, ...] = ()
+    params: Dict = field(default_factory=dict)
+
+
+def _is_local(filename: Optional[str]) -> bool:
+    return bool(filename) and Path(filename).resolve().parent == LOCAL_DIR
+
+
+def _code_names(code: types.CodeType) -> Iterable[str]:
+    """코드 객체(중첩 함수/컴프리헨션 포함)가 참조하는 전역 이름"""
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _code_names(const)
+
+
+def _source_file(obj) -> Optional[str]:
+    try:
+        return inspect.getsourcefile(obj)
+    except TypeError:
+        return None
+
+
+def _member_functions(member) -> List[Callable]:
+    """클래스 속성에서 코드가 있는 함수 (메서드, static/classmethod, property)"""
+    if isinstance(member, (staticmethod, classmethod)):
+        member = member.__func__
+    if isinstance(member, property):
+        return [f for f in (member.fget, member.fset, member.fdel) if f is not None]
+    return [member] if inspect.isfunction(member) else []
+
+
+def code_fingerprint(func: Callable) -> str:
+    """단계 함수의 코드 버전 해시
+
+    함수 소스와 함께, 함수가 참조하는 같은 디렉토리(scripts/)의 함수, 클래스(메서드와
+    상위 클래스 포함), 모듈 파일, 로컬 클래스 인스턴스의 클래스, 단순 상수(SAMPLE_SIZE 등)를
+    재귀적으로 포함함. 외부 라이브러리는 제외.
+    """
+    digest = hashlib.sha256()
+    seen = set()
+
+    def visit(obj, name):
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        if inspect.ismodule(obj):
+            if _is_local(getattr(obj, '__file__', None)):
+                digest.update(Path(obj.__file__).read_bytes())
+        elif inspect.isfunction(obj):
+            if not _is_local(obj.__code__.co_filename):
+                return
+            digest.update(inspect.getsource(obj).encode())
+            for ref in _code_names(obj.__code__):
+                if ref in obj.__globals__:
+                    visit(obj.__globals__[ref], ref)
+        elif inspect.isclass(obj):
+            if not _is_local(_source_file(obj)):
+                return
+            digest.update(inspect.getsource(obj).encode())
+            for base in obj.__mro__[1:]:
+                visit(base, base.__name__)
+            for member in vars(obj).values():
+                for method in _member_functions(member):
+                    visit(method, method.__name__)
+        elif isinstance(obj, _SIMPLE_TYPES):
+            digest.update(f"{name}={obj!r}".encode())
+        elif _is_local(_source_file(type(obj))):
+            visit(type(obj), type(obj).__name__)
+
+    visit(func, func.__name__)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """키로 주소가 매겨진 DataFrame 아티팩트 저장소"""
+
+    def __init__(self, root: Path, keep: int = 3):
+        self.root = Path(root)
+        self.keep = keep
+
+    def path(self, name: str, key: str) -> Path:
+        return self.root / f"{name}-{key[:16]}{ARTIFACT_SUFFIX}"
+
+    def exists(self, name: str, key: str) -> bool:
+        return self.path(name, key).exists()
+
+    def load(self, name: str, key: str) -> pd.DataFrame:
+        path = self.path(name, key)
+        os.utime(path)  # 최근 사용 표시 (정리 기준)
+        if ARTIFACT_SUFFIX == ".arrow":
+            return pd.read_feather(path)
+        return pd.read_pickle(path)
+
+    def save(self, name: str, key: str, df: pd.DataFrame):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(name, key)
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        df = df.reset_index(drop=True)
+        if ARTIFACT_SUFFIX == ".arrow":
+            df.to_feather(tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self._prune(name)
+
+    def _prune(self, name: str):
+        """단계별로 최근 사용한 `keep`개 버전만 유지"""
+        versions = sorted(self.root.glob(f"{name}-*{ARTIFACT_SUFFIX}"),
+                          key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in versions[self.keep:]:
+            stale.unlink(missing_ok=True)
+
+
+def _execute_in_worker(func: Callable, store_root: Path, name: str, key: str,
+                       inputs: List[Tuple[str, str]], profiler_config: Optional[Dict]):
+    """프로세스 풀 작업: 입력을 캐시에서 읽어 단계를 실행하고 결과를 캐시에 저장. StageRecord 반환"""
+    store = ArtifactStore(store_root)
+    args = [store.load(dep, dep_key) for dep, dep_key in inputs]
+    rows_in = sum(len(a) for a in args) if args else None
+    profiler = StageProfiler(**profiler_config) if profiler_config is not None else None
+    with (profiler.stage(func.__name__, rows_in=rows_in) if profiler else nullcontext(None)) as record:
+        df = func(*args)
+        if record is not None:
+            record.set_rows(rows_out=df)
+            record.extra.update(cache='miss', pid=os.getpid())
+    store.save(name, key, df)
+    return record
+
+
+class Pipeline:
+    """Stage DAG 실행기"""
+
+    def __init__(self, stages: List[Stage], cache_dir: Path, profiler=None, use_cache: bool = True):
+        self.stages = {s.name: s for s in stages}
+        self.store = ArtifactStore(cache_dir)
+        self.profiler = profiler
+        self.use_cache = use_cache
+        for stage in stages:
+            for name in stage.inputs:
+                if name not in self.stages:
+                    raise ValueError(f"단계 '{stage.name}'의 입력 '{name}'을(를) 만드는 단계가 없습니다")
+
+    def closure(self, targets: Iterable[str]) -> List[str]:
+        """대상 단계와 그 상위 단계들 (위상 정렬 순서)"""
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"순환 의존성: {name}")
+            if name not in self.stages:
+                raise ValueError(f"알 수 없는 단계: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].inputs:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def keys(self, order: List[str]) -> Dict[str, str]:
+        """단계별 캐시 키 (코드 + 파라미터 + 입력 키)"""
+        keys = {}
+        for name in order:
+            stage = self.stages[name]
+            payload = json.dumps({
+                'stage': name,
+                'code': code_fingerprint(stage.func),
+                'params': stage.params,
+                'inputs': {dep: keys[dep] for dep in stage.inputs},
+            }, sort_keys=True, default=str)
+            keys[name] = hashlib.sha256(payload.encode()).hexdigest()
+        return keys
+
+    def run(self, targets: Iterable[str], jobs: int = 1) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """대상 아티팩트 생성. (결과 DataFrame, 캐시 키) 반환"""
+        targets = list(targets)
+        order = self.closure(targets)
+        keys = self.keys(order)
+
+        cached = {n for n in order if self.use_cache and self.store.exists(n, keys[n])}
+        to_run = [n for n in order if n not in cached]
+        needed = set(targets) | {dep for n in to_run for dep in self.stages[n].inputs}
+        to_load = [n for n in order if n in cached and n in needed]
+
+        for name in order:
+            state = "cached" if name in cached else "run"
+            print(f"  [{state:>6}] {name} ({keys[name][:12]})")
+
+        if jobs > 1 and len(to_run) > 1:
+            self._run_processes(to_run, keys, jobs)
+            results = {t: self._load(t, keys[t], cached=t in cached) for t in targets}
+            return results, keys
+
+        results: Dict[str, pd.DataFrame] = {}
+        for name in order:
+            if name in to_load:
+                results[name] = self._load(name, keys[name])
+            elif name in to_run:
+                results[name] = self._execute(name, keys[name], [results[d] for d in self.stages[name].inputs])
+
+        return {t: results[t] for t in targets}, keys
+
+    def _run_processes(self, to_run: List[str], keys: Dict[str, str], jobs: int):
+        """to_run 단계를 프로세스 풀에서 의존성 순서대로 실행 (결과는 캐시 파일로만 전달)"""
+        finished = {n for n in keys if n not in to_run}
+        profiler_config = self.profiler.worker_config() if self.profiler is not None else None
+        with ProcessPoolExecutor(max_workers=min(jobs, len(to_run))) as pool:
+            pending = {}
+            waiting = list(to_run)
+            while pending or waiting:
+                for name in [n for n in waiting if all(d in finished for d in self.stages[n].inputs)]:
+                    waiting.remove(name)
+                    stage = self.stages[name]
+                    inputs = [(dep, keys[dep]) for dep in stage.inputs]
+                    pending[pool.submit(_execute_in_worker, stage.func, self.store.root, name, keys[name],
+                                        inputs, profiler_config)] = name
+                if not pending:
+                    raise RuntimeError(f"실행할 수 없는 단계: {waiting}")
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    record = future.result()
+                    if record is not None:
+                        self.profiler.add_record(record)
+                    finished.add(name)
+
+    def _stage_context(self, name: str, rows_in=None):
+        if self.profiler is None:
+            return nullcontext(None)
+        return self.profiler.stage(name, rows_in=rows_in)
+
+    def _load(self, name: str, key: str, cached: bool = True) -> pd.DataFrame:
+        """캐시 적중 아티팩트, 또는 작업 프로세스가 저장한 결과 읽기"""
+        with self._stage_context(f"{name} ({'cached' if cached else 'load'})") as record:
+            df = self.store.load(name, key)
+            if record is not None:
+                record.set_rows(rows_out=df)
+                record.extra['cache'] = 'hit' if cached else 'worker'
+        return df
+
+    def _execute(self, name: str, key: str, args: List[pd.DataFrame]) -> pd.DataFrame:
+        stage = self.stages[name]
+        rows_in = sum(len(a) for a in args) if args else None
+        with self._stage_context(stage.func.__name__, rows_in=rows_in) as record:
+            df = stage.func(*args)
+            if record is not None:
+                record.set_rows(rows_out=df)
+                record.extra['cache'] = 'miss'
+        # --no-cache도 결과를 저장해 다음 실행이 이전 아티팩트를 쓰지 않도록 함
+        self.store.save(name, key, df)
+        return df
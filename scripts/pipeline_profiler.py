@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+데이터 파이프라인 단계별 프로파일링 도구
+
+각 단계(stage)에 대해 다음 항목을 측정하여 JSON 실행 리포트로 저장:
+- Wall / CPU 시간
+- Peak RSS (가능하면 단계별로 리셋된 high-water mark) / RSS 증감
+- (선택) tracemalloc peak (Python 할당 기준, 할당마다 오버헤드가 커서 기본 비활성화)
+- 입력/출력 행 수
+- (선택) 단계별 cProfile / pyinstrument 덤프
+
+Python 코드에서 사용:
+    profiler = StageProfiler("prepare_fraud_data")
+    with profiler.stage("compute_user_features", rows_in=len(df)) as stage:
+        user_features = compute_user_features(df)
+        stage.rows_out = len(user_features)
+    profiler.write_report()
+
+셸 스크립트에서 사용 (명령 하나를 한 단계로 측정):
+    python3 scripts/pipeline_profiler.py run --run-name load_fraud_data \\
+        --stage load_transactions -- psql ...
+
+환경 변수:
+- PIPELINE_RUN_ID: 여러 스크립트의 리포트를 하나의 실행으로 묶는 ID
+- PIPELINE_PROFILE_DIR: 리포트 저장 디렉토리 (기본: data/processed/profiles)
+- PIPELINE_PROFILER: 단계별 덤프 방식 (cprofile | pyinstrument)
+- PIPELINE_TRACEMALLOC: 1로 설정하면 tracemalloc 할당 추적 (prepare_fraud_data.py --trace-alloc과 같음).
+  추적 중에는 pandas 단계가 몇 배 느려지므로 시간 측정용 실행과 분리해서 사용
+
+전체 실행 요약 (prepare → load → PIT 조회):
+    python3 scripts/pipeline_profiler.py summary --run-id <PIPELINE_RUN_ID>
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / "data" / "processed" / "profiles"
+
+# Linux는 ru_maxrss를 KB 단위로, macOS는 byte 단위로 보고함
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+_MB = 1024 * 1024
+
+
+def default_run_id() -> str:
+    """환경 변수의 실행 ID 또는 현재 시각 기반 ID"""
+    return os.getenv("PIPELINE_RUN_ID") or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def default_profile_dir() -> Path:
+    return Path(os.getenv("PIPELINE_PROFILE_DIR", str(DEFAULT_PROFILE_DIR)))
+
+
+def _reset_peak_rss() -> bool:
+    """프로세스 peak RSS(VmHWM) 리셋 (Linux 전용, 실패 시 False)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes() -> int:
+    """현재 peak RSS (VmHWM, 없으면 ru_maxrss)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """현재 RSS (VmRSS, Linux 전용)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _count_rows(obj) -> Optional[int]:
+    """DataFrame/리스트/정수에서 행 수 추출"""
+    if obj is None:
+        return None
+    if isinstance(obj, int):
+        return obj
+    if isinstance(obj, dict):
+        return sum(_count_rows(v) or 0 for v in obj.values())
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+@dataclass
+class StageRecord:
+    """단계 하나의 측정 결과"""
+    name: str
+    started_at: str = ""
+    status: str = "running"
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    peak_rss_is_stage_local: bool = False
+    rss_delta_mb: Optional[float] = None
+    tracemalloc_peak_mb: Optional[float] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    profile_path: Optional[str] = None
+    error: Optional[str] = None
+    extra: Dict = field(default_factory=dict)
+
+    def set_rows(self, rows_in=None, rows_out=None):
+        """행 수 기록 (DataFrame을 그대로 넘겨도 됨)"""
+        if rows_in is not None:
+            self.rows_in = _count_rows(rows_in)
+        if rows_out is not None:
+            self.rows_out = _count_rows(rows_out)
+
+
+class StageProfiler:
+    """파이프라인 실행 하나에 대한 단계별 측정기"""
+
+    def __init__(self, run_name: str, run_id: Optional[str] = None,
+                 output_dir: Optional[Path] = None, profiler: Optional[str] = None,
+                 trace_memory: Optional[bool] = None):
+        self.run_name = run_name
+        self.run_id = run_id or default_run_id()
+        self.output_dir = Path(output_dir) if output_dir else default_profile_dir()
+        self.profiler = (profiler if profiler is not None else os.getenv("PIPELINE_PROFILER", "")).lower() or None
+        if trace_memory is None:
+            trace_memory = os.getenv("PIPELINE_TRACEMALLOC", "0") == "1"
+        self.trace_memory = trace_memory
+        self.meta: Dict = {}
+        self.stages: List[StageRecord] = []
+        self._lock = threading.Lock()
+        self._started_at = datetime.now()
+        self._t0 = time.perf_counter()
+
+        if self.profiler not in (None, "cprofile", "pyinstrument"):
+            print(f"Warning: 알 수 없는 PIPELINE_PROFILER '{self.profiler}' - 덤프 비활성화")
+            self.profiler = None
+
+    def worker_config(self) -> Dict:
+        """다른 프로세스에서 같은 실행의 StageProfiler를 만들 인자 (StageProfiler(**config))"""
+        return {
+            "run_name": self.run_name,
+            "run_id": self.run_id,
+            "output_dir": self.output_dir,
+            "profiler": self.profiler or "",
+            "trace_memory": self.trace_memory,
+        }
+
+    def add_record(self, record: StageRecord):
+        """다른 프로세스에서 측정한 단계 결과 추가"""
+        with self._lock:
+            self.stages.append(record)
+
+    @property
+    def report_path(self) -> Path:
+        return self.output_dir / f"{self.run_id}_{self.run_name}.json"
+
+    @contextmanager
+    def stage(self, name: str, rows_in=None):
+        """단계 측정 컨텍스트. yield된 StageRecord에 rows_out 등을 기록
+
+        tracemalloc/peak RSS는 프로세스 전역 값이므로 단계를 동시에 실행하면
+        메모리 수치는 겹쳐서 측정됨 (시간 측정은 영향 없음).
+        """
+        record = StageRecord(name=name, started_at=datetime.now().isoformat(timespec="seconds"))
+        record.set_rows(rows_in=rows_in)
+        with self._lock:
+            self.stages.append(record)
+
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            else:
+                tracemalloc.reset_peak()
+        record.peak_rss_is_stage_local = _reset_peak_rss()
+        rss0 = _current_rss_bytes()
+
+        dump = self._start_dump()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield record
+            record.status = "ok"
+        except BaseException as e:
+            record.status = "error"
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.wall_seconds = round(time.perf_counter() - wall0, 4)
+            record.cpu_seconds = round(time.process_time() - cpu0, 4)
+            record.profile_path = self._stop_dump(dump, name)
+            record.peak_rss_mb = round(_peak_rss_bytes() / _MB, 1)
+            rss1 = _current_rss_bytes()
+            if rss0 is not None and rss1 is not None:
+                record.rss_delta_mb = round((rss1 - rss0) / _MB, 1)
+            if self.trace_memory and tracemalloc.is_tracing():
+                record.tracemalloc_peak_mb = round(tracemalloc.get_traced_memory()[1] / _MB, 1)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def _start_dump(self):
+        if self.profiler == "cprofile":
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+            return prof
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("Warning: pyinstrument가 설치되어 있지 않습니다 (pip install pyinstrument)")
+                self.profiler = None
+                return None
+            prof = Profiler()
+            prof.start()
+            return prof
+        return None
+
+    def _stop_dump(self, prof, stage_name: str) -> Optional[str]:
+        if prof is None:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.output_dir / f"{self.run_id}_{self.run_name}_{stage_name}"
+        if self.profiler == "cprofile":
+            prof.disable()
+            path = stem.with_suffix(".prof")
+            prof.dump_stats(str(path))
+        else:
+            prof.stop()
+            path = stem.with_suffix(".html")
+            path.write_text(prof.output_html())
+        return str(path)
+
+    def to_dict(self) -> Dict:
+        return {
+            "run_id": self.run_id,
+            "run_name": self.run_name,
+            "started_at": self._started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "total_wall_seconds": round(time.perf_counter() - self._t0, 4),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "meta": self.meta,
+            "stages": [asdict(s) for s in self.stages],
+        }
+
+    def write_report(self, path: Optional[Path] = None) -> Path:
+        """JSON 실행 리포트 저장"""
+        path = Path(path) if path else self.report_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+        return path
+
+    def print_summary(self):
+        print_stage_table(self.run_name, [asdict(s) for s in self.stages])
+
+
+def print_stage_table(run_name: str, stages: List[Dict]):
+    """단계별 측정 결과를 표 형태로 출력"""
+    print(f"\n[{run_name}] 단계별 프로파일")
+    print(f"  {'stage':<32} {'wall(s)':>9} {'cpu(s)':>9} {'rss(MB)':>9} {'Δrss(MB)':>9} {'py(MB)':>9} "
+          f"{'rows_in':>10} {'rows_out':>10}")
+    def fmt(value, spec):
+        width = int(re.search(r"\d+", spec).group())
+        return format(value, spec) if value is not None else "-".rjust(width)
+
+    for s in stages:
+        print(f"  {s['name']:<32} {fmt(s['wall_seconds'], '9.2f')} {fmt(s['cpu_seconds'], '9.2f')} "
+              f"{fmt(s['peak_rss_mb'], '9.1f')} {fmt(s.get('rss_delta_mb'), '+9.1f')} "
+              f"{fmt(s['tracemalloc_peak_mb'], '9.1f')} "
+              f"{fmt(s['rows_in'], '10,')} {fmt(s['rows_out'], '10,')}")
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+_COPY_ROWS = re.compile(r"^COPY (\d+)\s*$", re.MULTILINE)
+
+
+def run_command(args) -> int:
+    """외부 명령 하나를 단계로 측정하고 리포트에 추가 (셸 스크립트용)"""
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        print("Error: 실행할 명령이 없습니다")
+        return 2
+
+    profile_dir = Path(args.profile_dir) if args.profile_dir else default_profile_dir()
+    run_id = args.run_id or default_run_id()
+    report_path = profile_dir / f"{run_id}_{args.run_name}.json"
+    if report_path.exists():
+        with open(report_path) as f:
+            report = json.load(f)
+    else:
+        report = StageProfiler(args.run_name, run_id=run_id, output_dir=profile_dir).to_dict()
+
+    record = StageRecord(name=args.stage, started_at=datetime.now().isoformat(timespec="seconds"))
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    wall0 = time.perf_counter()
+    proc = subprocess.run(command, stdout=subprocess.PIPE)
+    record.wall_seconds = round(time.perf_counter() - wall0, 4)
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    output = proc.stdout.decode(errors="replace")
+    sys.stdout.write(output)
+    sys.stdout.flush()
+
+    record.cpu_seconds = round((after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime), 4)
+    # 자식 프로세스 전체의 high-water mark (단계별 리셋 불가)
+    record.peak_rss_mb = round(after.ru_maxrss * _MAXRSS_UNIT / _MB, 1)
+    copied = [int(n) for n in _COPY_ROWS.findall(output)]
+    record.rows_out = sum(copied) if copied else None
+    record.status = "ok" if proc.returncode == 0 else "error"
+    record.extra = {"command": command[0], "returncode": proc.returncode}
+
+    report["stages"].append(asdict(record))
+    report["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    report["total_wall_seconds"] = round(sum(s["wall_seconds"] for s in report["stages"]), 4)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return proc.returncode
+
+
+def summarize(args) -> int:
+    """실행 ID에 해당하는 모든 리포트를 모아 end-to-end 요약 출력"""
+    profile_dir = Path(args.profile_dir) if args.profile_dir else default_profile_dir()
+    run_id = args.run_id or default_run_id()
+    reports = []
+    for path in sorted(profile_dir.glob(f"{run_id}_*.json")):
+        with open(path) as f:
+            reports.append(json.load(f))
+    if not reports:
+        print(f"Error: 실행 ID '{run_id}'의 리포트가 없습니다: {profile_dir}")
+        return 1
+
+    reports.sort(key=lambda r: r.get("started_at", ""))
+    total = 0.0
+    for report in reports:
+        print_stage_table(report["run_name"], report["stages"])
+        total += sum(s["wall_seconds"] for s in report["stages"])
+    print(f"\n전체 단계 wall 시간 합계: {total:.2f}s ({len(reports)}개 리포트)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="데이터 파이프라인 단계별 프로파일링")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="외부 명령을 한 단계로 측정")
+    run.add_argument("--run-name", required=True)
+    run.add_argument("--stage", required=True)
+    run.add_argument("--run-id")
+    run.add_argument("--profile-dir")
+    run.add_argument("command", nargs=argparse.REMAINDER)
+
+    summary = sub.add_parser("summary", help="실행 ID의 리포트 요약")
+    summary.add_argument("--run-id")
+    summary.add_argument("--profile-dir")
+
+    args = parser.parse_args()
+    if args.cmd == "run":
+        sys.exit(run_command(args))
+    sys.exit(summarize(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,28 +5,83 @@ Fraud Detection 데이터 전처리 및 Feast용 피처 생성 스크립트
 이 스크립트는 Kaggle Credit Card Fraud Detection 데이터를 처리하여:
 1. 거래 이벤트 테이블 생성 (학습용 Entity DataFrame)
 2. 시간에 따라 변하는 사용자 피처 생성 (Point-in-Time Join용)
-3. 머천트/카테고리 피처 생성
+3. 머천트/카테고리 피처의 일별 스냅샷 생성
+4. 스냅샷 피처 테이블의 분포 통계(병합 가능한 스케치) 저장 및 이전 빌드와 드리프트 비교
+
+스냅샷 테이블은 유효 구간 컬럼(valid_from / valid_to / TTL로 잘린 valid_to_ttl)을 함께 가지며,
+PostgreSQL에서 GiST 인덱스로 구간 포함 조인을 할 수 있음 (validity_intervals.py).
+
+엔티티 키(user_id, merchant_id)는 feast/feature_store.yaml의 entity_key_type을 따르며,
+기본은 MD5 기반 문자열 키, int는 영구 키 사전 기반 int64 대리 키 (surrogate_keys.py).
+int 모드의 단계 캐시 키에는 키 사전 파일의 해시가 포함됨.
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
-import hashlib
+import argparse
+import json
+
+import raw_cache
+from feature_stats import (compare_profiles, frame_to_profile, load_profile, print_drift_report,
+                           profile_tables, save_profile)
+from lineage import LineageLogger
+from pipeline_dag import Pipeline, Stage
+from pipeline_profiler import StageProfiler
+from snapshot_engine import build_daily_snapshots
+from surrogate_keys import ENTITY_KEY_TYPE, KEY_TYPES, dictionary_digest, entity_keys, key_sql_type
+from validity_intervals import add_validity_intervals, feature_view_ttls
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 OUTPUT_DIR = DATA_DIR / "processed"
-OUTPUT_DIR.mkdir(exist_ok=True)
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+STAGE_CACHE_DIR = DATA_DIR / "cache" / "stages"
+BUILD_MANIFEST = OUTPUT_DIR / "build_manifest.json"
+STATS_DIR = OUTPUT_DIR / "stats"
+FEATURE_STATS = OUTPUT_DIR / "feature_stats.json"
+
+# 출력 테이블 (DAG 대상)
+TABLES = ['transactions', 'user_demographics', 'user_features', 'merchant_features', 'category_features']
+
+# 분포 통계 단계 (입력 테이블이 모두 대상일 때 함께 실행)
+STATS_STAGE = 'feature_stats'
+STATS_INPUTS = ('user_features', 'merchant_features', 'category_features')
+STATS_KEEP = 5
 
 # 샘플링 설정 (로컬 개발용)
 SAMPLE_SIZE = 50000  # 전체 대신 50K 샘플 사용
 RANDOM_STATE = 42
 
+# 머천트/카테고리 스냅샷 윈도우 (None이면 전체 기간 누적, 정수면 최근 N일)
+SNAPSHOT_WINDOW_DAYS = None
+
+# 스냅샷 테이블별 TTL (feast/features.py의 Feature View 정의, valid_to_ttl 계산용)
+SNAPSHOT_TTLS = feature_view_ttls()
+
 
 def load_and_sample_data():
     """데이터 로드 및 샘플링"""
     print("Loading data...")
-    train = pd.read_csv(DATA_DIR / "fraudTrain.csv")
+    source = DATA_DIR / "fraudTrain.csv"
+
+    if raw_cache.pa is None:
+        train = raw_cache.read_raw_csv(source)
+        sampled = train.iloc[sample_positions(train['is_fraud'].to_numpy())]
+    else:
+        # Arrow 캐시를 memory-map으로 열고 샘플링된 행만 pandas로 변환
+        table = raw_cache.load_raw_table(source)
+        sampled = table.take(sample_positions(table.column('is_fraud').to_numpy())).to_pandas()
+
+    sampled = sampled.sort_values('trans_date_trans_time', kind='mergesort').reset_index(drop=True)
+
+    print(f"Sampled: {len(sampled):,} rows, {sampled['is_fraud'].sum():,} frauds ({sampled['is_fraud'].mean():.2%})")
+    return sampled
+
+
+def sample_positions(is_fraud):
+    """샘플링할 원본 행 위치 (Fraud 비율 유지)"""
+    train = pd.DataFrame({'is_fraud': is_fraud})
 
     # Fraud 비율 유지하면서 샘플링
     fraud = train[train['is_fraud'] == 1]
@@ -37,23 +92,20 @@ def load_and_sample_data():
     n_fraud = min(len(fraud), int(SAMPLE_SIZE * fraud_ratio * 2))  # fraud 비율 약간 높임
     n_non_fraud = SAMPLE_SIZE - n_fraud
 
-    sampled = pd.concat([
+    return pd.concat([
         fraud.sample(n=n_fraud, random_state=RANDOM_STATE),
         non_fraud.sample(n=n_non_fraud, random_state=RANDOM_STATE)
-    ]).sort_values('trans_date_trans_time').reset_index(drop=True)
+    ]).index.to_numpy()
 
-    print(f"Sampled: {len(sampled):,} rows, {sampled['is_fraud'].sum():,} frauds ({sampled['is_fraud'].mean():.2%})")
-    return sampled
 
+def create_user_ids(cc_nums):
+    """신용카드 번호를 user_id로 변환 (개인정보 보호, ENTITY_KEY_TYPE에 따라 문자열/정수)"""
+    return entity_keys(cc_nums, 'user_id', ENTITY_KEY_TYPE)
 
-def create_user_id(cc_num):
-    """신용카드 번호를 user_id로 변환 (개인정보 보호)"""
-    return f"user_{hashlib.md5(str(cc_num).encode()).hexdigest()[:8]}"
 
-
-def create_merchant_id(merchant):
+def create_merchant_ids(merchants):
     """머천트명을 merchant_id로 변환"""
-    return f"merch_{hashlib.md5(str(merchant).encode()).hexdigest()[:8]}"
+    return entity_keys(merchants, 'merchant_id', ENTITY_KEY_TYPE)
 
 
 def prepare_transactions(df):
@@ -62,8 +114,8 @@ def prepare_transactions(df):
 
     transactions = pd.DataFrame({
         'transaction_id': df['trans_num'],
-        'user_id': df['cc_num'].apply(create_user_id),
-        'merchant_id': df['merchant'].apply(create_merchant_id),
+        'user_id': create_user_ids(df['cc_num']),
+        'merchant_id': create_merchant_ids(df['merchant']),
         'category': df['category'],
         'amount': df['amt'],
         'is_fraud': df['is_fraud'],
@@ -85,7 +137,7 @@ def prepare_user_demographics(df):
     first_txn = df.sort_values('trans_date_trans_time').groupby('cc_num').first().reset_index()
 
     demographics = pd.DataFrame({
-        'user_id': first_txn['cc_num'].apply(create_user_id),
+        'user_id': create_user_ids(first_txn['cc_num']),
         'gender': first_txn['gender'],
         'city': first_txn['city'],
         'state': first_txn['state'],
@@ -101,7 +153,7 @@ def prepare_user_demographics(df):
     # 나이 계산 (첫 거래 시점 기준)
     demographics['age'] = ((demographics['created_at'] - demographics['dob']).dt.days / 365.25).astype(int)
 
-    return demographics
+    return add_validity_intervals(demographics, 'user_id', SNAPSHOT_TTLS.get('user_demographics'))
 
 
 def compute_user_features(df):
@@ -110,7 +162,7 @@ def compute_user_features(df):
 
     df = df.copy()
     df['trans_date_trans_time'] = pd.to_datetime(df['trans_date_trans_time'])
-    df['user_id'] = df['cc_num'].apply(create_user_id)
+    df['user_id'] = create_user_ids(df['cc_num'])
     df = df.sort_values('trans_date_trans_time')
 
     # 일별로 피처 계산 (매일 업데이트되는 피처)
@@ -155,32 +207,43 @@ def compute_user_features(df):
                 'unique_merchants': history['merchant'].nunique(),
                 'unique_categories': history['category'].nunique(),
                 'fraud_count': history['is_fraud'].sum(),
-                'created_at': pd.Timestamp(current_date),
+                # 당일 거래가 모두 반영된 스냅샷이므로 다음 날 0시에 생성된 것으로 기록
+                # (당일 0시로 기록하면 같은 날 이후 거래가 PIT 조인에 누출됨)
+                'created_at': pd.Timestamp(current_date) + timedelta(days=1),
             }
             user_features_list.append(features)
 
     user_features = pd.DataFrame(user_features_list)
     print(f"Generated {len(user_features):,} user feature snapshots")
-    return user_features
+    return add_validity_intervals(user_features, 'user_id', SNAPSHOT_TTLS.get('user_features'))
 
 
 def prepare_merchant_features(df):
-    """머천트 피처 생성"""
+    """머천트 피처 생성 (일별 스냅샷, Point-in-Time Join용)"""
     print("Preparing merchant features...")
 
     df = df.copy()
-    df['merchant_id'] = df['merchant'].apply(create_merchant_id)
+    df['merchant_id'] = create_merchant_ids(df['merchant'])
+
+    snapshots = build_daily_snapshots(df, 'merchant_id', window_days=SNAPSHOT_WINDOW_DAYS)
 
-    merchant_stats = df.groupby('merchant_id').agg({
-        'amt': ['mean', 'std', 'min', 'max', 'count'],
-        'is_fraud': ['sum', 'mean'],
+    # 머천트 고정 속성 (첫 거래 기준)
+    attributes = df.groupby('merchant_id').agg({
         'category': 'first',
         'merch_lat': 'first',
         'merch_long': 'first',
-        'trans_date_trans_time': 'max',
     }).reset_index()
+    attributes.columns = ['merchant_id', 'primary_category', 'lat', 'long']
 
-    merchant_stats.columns = [
+    merchant_features = snapshots.rename(columns={
+        'mean': 'avg_transaction_amount',
+        'std': 'std_transaction_amount',
+        'min': 'min_transaction_amount',
+        'max': 'max_transaction_amount',
+        'count': 'total_transactions',
+    }).merge(attributes, on='merchant_id', how='left')
+
+    merchant_features = merchant_features[[
         'merchant_id',
         'avg_transaction_amount', 'std_transaction_amount',
         'min_transaction_amount', 'max_transaction_amount',
@@ -188,37 +251,66 @@ def prepare_merchant_features(df):
         'fraud_count', 'fraud_rate',
         'primary_category',
         'lat', 'long',
-        'last_transaction_time',
-    ]
-
-    merchant_stats['created_at'] = pd.to_datetime(merchant_stats['last_transaction_time'])
-    merchant_stats = merchant_stats.drop('last_transaction_time', axis=1)
+        'created_at',
+    ]]
 
-    return merchant_stats
+    print(f"Generated {len(merchant_features):,} merchant feature snapshots")
+    return add_validity_intervals(merchant_features, 'merchant_id', SNAPSHOT_TTLS.get('merchant_features'))
 
 
 def prepare_category_features(df):
-    """카테고리 피처 생성"""
+    """카테고리 피처 생성 (일별 스냅샷, Point-in-Time Join용)"""
     print("Preparing category features...")
 
-    category_stats = df.groupby('category').agg({
-        'amt': ['mean', 'std', 'min', 'max', 'count'],
-        'is_fraud': ['sum', 'mean'],
-        'trans_date_trans_time': 'max',
-    }).reset_index()
+    snapshots = build_daily_snapshots(df, 'category', window_days=SNAPSHOT_WINDOW_DAYS)
 
-    category_stats.columns = [
+    category_features = snapshots.rename(columns={
+        'mean': 'avg_amount',
+        'std': 'std_amount',
+        'min': 'min_amount',
+        'max': 'max_amount',
+        'count': 'total_transactions',
+    })[[
         'category',
         'avg_amount', 'std_amount', 'min_amount', 'max_amount',
         'total_transactions',
         'fraud_count', 'fraud_rate',
-        'last_transaction_time',
-    ]
+        'created_at',
+    ]]
+
+    print(f"Generated {len(category_features):,} category feature snapshots")
+    return add_validity_intervals(category_features, 'category', SNAPSHOT_TTLS.get('category_features'))
+
 
-    category_stats['created_at'] = pd.to_datetime(category_stats['last_transaction_time'])
-    category_stats = category_stats.drop('last_transaction_time', axis=1)
+def compute_feature_stats(user_features, merchant_features, category_features):
+    """스냅샷 피처 테이블의 분포 통계 (병합 가능한 스케치, feature_stats.py)"""
+    print("Computing feature statistics...")
+    stats = profile_tables(user_features=user_features, merchant_features=merchant_features,
+                           category_features=category_features)
+    print(f"Profiled {len(stats):,} features")
+    return stats
 
-    return category_stats
+
+def save_feature_stats(stats_frame, key, previous_key):
+    """빌드 키별 통계 파일 저장 + 이전 빌드와 드리프트 비교. 드리프트 피처 수 반환"""
+    profile = frame_to_profile(stats_frame)
+    path = STATS_DIR / f"feature_stats-{key[:16]}.json"
+    save_profile(profile, path, meta={'build_key': key})
+    save_profile(profile, FEATURE_STATS, meta={'build_key': key})
+    print(f"\n피처 통계 저장: {FEATURE_STATS}")
+
+    # 최근 STATS_KEEP개 빌드만 유지
+    versions = sorted(STATS_DIR.glob("feature_stats-*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in versions[STATS_KEEP:]:
+        stale.unlink(missing_ok=True)
+
+    previous = STATS_DIR / f"feature_stats-{previous_key[:16]}.json" if previous_key else None
+    if previous is None or previous == path or not previous.exists():
+        return None
+    report = compare_profiles(load_profile(previous), profile)
+    print(f"\n이전 빌드({previous_key[:12]}) 대비 피처 분포 드리프트:")
+    print_drift_report(report, only_flagged=True)
+    return int((report['status'] == 'drift').sum())
 
 
 def save_to_csv(data_dict):
@@ -237,6 +329,7 @@ def generate_sql_load_script(data_dict):
     sql_script = """-- Fraud Detection 데이터 로드 스크립트
 -- Point-in-Time Join을 위한 Feast Feature Store 데이터
 -- 생성일: {date}
+-- 엔티티 키 타입: {key_type}
 
 SET search_path TO features, public;
 
@@ -250,8 +343,8 @@ DROP TABLE IF EXISTS category_features CASCADE;
 -- 1. 거래 이벤트 테이블 (Entity DataFrame용)
 CREATE TABLE transactions (
     transaction_id VARCHAR(64) PRIMARY KEY,
-    user_id VARCHAR(20) NOT NULL,
-    merchant_id VARCHAR(20) NOT NULL,
+    user_id {user_key} NOT NULL,
+    merchant_id {merchant_key} NOT NULL,
     category VARCHAR(50),
     amount DECIMAL(10,2),
     is_fraud INTEGER,
@@ -264,7 +357,7 @@ CREATE TABLE transactions (
 
 -- 2. 사용자 인구통계 테이블
 CREATE TABLE user_demographics (
-    user_id VARCHAR(20) PRIMARY KEY,
+    user_id {user_key} PRIMARY KEY,
     gender VARCHAR(1),
     city VARCHAR(100),
     state VARCHAR(2),
@@ -275,13 +368,16 @@ CREATE TABLE user_demographics (
     job VARCHAR(100),
     dob DATE,
     age INTEGER,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    valid_from TIMESTAMP NOT NULL,
+    valid_to TIMESTAMP,
+    valid_to_ttl TIMESTAMP
 );
 
 -- 3. 사용자 피처 테이블 (시간에 따라 변함 - Point-in-Time Join용)
 CREATE TABLE user_features (
     id SERIAL PRIMARY KEY,
-    user_id VARCHAR(20) NOT NULL,
+    user_id {user_key} NOT NULL,
     total_transactions INTEGER,
     total_amount DECIMAL(12,2),
     avg_amount DECIMAL(10,2),
@@ -297,12 +393,16 @@ CREATE TABLE user_features (
     unique_merchants INTEGER,
     unique_categories INTEGER,
     fraud_count INTEGER,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    valid_from TIMESTAMP NOT NULL,
+    valid_to TIMESTAMP,
+    valid_to_ttl TIMESTAMP
 );
 
--- 4. 머천트 피처 테이블
+-- 4. 머천트 피처 테이블 (일별 스냅샷 - Point-in-Time Join용)
 CREATE TABLE merchant_features (
-    merchant_id VARCHAR(20) PRIMARY KEY,
+    id SERIAL PRIMARY KEY,
+    merchant_id {merchant_key} NOT NULL,
     avg_transaction_amount DECIMAL(10,2),
     std_transaction_amount DECIMAL(10,2),
     min_transaction_amount DECIMAL(10,2),
@@ -313,12 +413,16 @@ CREATE TABLE merchant_features (
     primary_category VARCHAR(50),
     lat DECIMAL(10,6),
     long DECIMAL(10,6),
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    valid_from TIMESTAMP NOT NULL,
+    valid_to TIMESTAMP,
+    valid_to_ttl TIMESTAMP
 );
 
--- 5. 카테고리 피처 테이블
+-- 5. 카테고리 피처 테이블 (일별 스냅샷 - Point-in-Time Join용)
 CREATE TABLE category_features (
-    category VARCHAR(50) PRIMARY KEY,
+    id SERIAL PRIMARY KEY,
+    category VARCHAR(50) NOT NULL,
     avg_amount DECIMAL(10,2),
     std_amount DECIMAL(10,2),
     min_amount DECIMAL(10,2),
@@ -326,7 +430,10 @@ CREATE TABLE category_features (
     total_transactions INTEGER,
     fraud_count INTEGER,
     fraud_rate DECIMAL(6,4),
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    valid_from TIMESTAMP NOT NULL,
+    valid_to TIMESTAMP,
+    valid_to_ttl TIMESTAMP
 );
 
 -- 인덱스 생성 (Point-in-Time Join 성능 최적화)
@@ -339,7 +446,16 @@ CREATE INDEX idx_user_features_created_at ON user_features(created_at);
 CREATE INDEX idx_user_features_user_created ON user_features(user_id, created_at);
 
 CREATE INDEX idx_merchant_features_created_at ON merchant_features(created_at);
+CREATE INDEX idx_merchant_features_merchant_created ON merchant_features(merchant_id, created_at);
 CREATE INDEX idx_category_features_created_at ON category_features(created_at);
+CREATE INDEX idx_category_features_category_created ON category_features(category, created_at);
+
+-- 유효 구간 인덱스 (구간 포함 조인: tsrange(valid_from, valid_to_ttl) @> event_timestamp)
+CREATE EXTENSION IF NOT EXISTS btree_gist WITH SCHEMA public;
+CREATE INDEX idx_user_demographics_validity ON user_demographics USING gist (user_id, tsrange(valid_from, valid_to_ttl));
+CREATE INDEX idx_user_features_validity ON user_features USING gist (user_id, tsrange(valid_from, valid_to_ttl));
+CREATE INDEX idx_merchant_features_validity ON merchant_features USING gist (merchant_id, tsrange(valid_from, valid_to_ttl));
+CREATE INDEX idx_category_features_validity ON category_features USING gist (category, tsrange(valid_from, valid_to_ttl));
 
 -- 완료 메시지
 DO $$
@@ -347,7 +463,8 @@ BEGIN
   RAISE NOTICE 'Fraud Detection 테이블 생성 완료';
   RAISE NOTICE 'CSV 파일을 COPY 명령으로 로드하세요';
 END $$;
-""".format(date=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+""".format(date=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), key_type=ENTITY_KEY_TYPE,
+           user_key=key_sql_type(ENTITY_KEY_TYPE), merchant_key=key_sql_type(ENTITY_KEY_TYPE))
 
     sql_path = OUTPUT_DIR / "create_tables.sql"
     with open(sql_path, 'w') as f:
@@ -357,34 +474,135 @@ END $$;
     return sql_script
 
 
-def main():
+def build_pipeline(profiler=None, use_cache=True):
+    """전처리 단계 DAG 정의"""
+    source = DATA_DIR / "fraudTrain.csv"
+    # 키 사전이 지워지거나 다시 만들어지면 이전 사전으로 만든 아티팩트를 쓰지 않도록 함
+    user_keys = dictionary_digest('user_id', ENTITY_KEY_TYPE)
+    merchant_keys = dictionary_digest('merchant_id', ENTITY_KEY_TYPE)
+    return Pipeline([
+        Stage('sample', load_and_sample_data,
+              params={'source': raw_cache.cache_key(raw_cache.source_fingerprint(source))}),
+        Stage('transactions', prepare_transactions, inputs=('sample',),
+              params={'user_keys': user_keys, 'merchant_keys': merchant_keys}),
+        Stage('user_demographics', prepare_user_demographics, inputs=('sample',),
+              params={'ttl': SNAPSHOT_TTLS.get('user_demographics'), 'user_keys': user_keys}),
+        Stage('user_features', compute_user_features, inputs=('sample',),
+              params={'ttl': SNAPSHOT_TTLS.get('user_features'), 'user_keys': user_keys}),
+        Stage('merchant_features', prepare_merchant_features, inputs=('sample',),
+              params={'ttl': SNAPSHOT_TTLS.get('merchant_features'), 'merchant_keys': merchant_keys}),
+        Stage('category_features', prepare_category_features, inputs=('sample',),
+              params={'ttl': SNAPSHOT_TTLS.get('category_features')}),
+        Stage(STATS_STAGE, compute_feature_stats, inputs=STATS_INPUTS),
+    ], cache_dir=STAGE_CACHE_DIR, profiler=profiler, use_cache=use_cache)
+
+
+def log_build_lineage(lineage, profiler, data_dict, keys, report_path):
+    """빌드 파라미터, 테이블별 행 수, 단계 시간을 MLflow에 기록"""
+    if not lineage.enabled:
+        return
+    source = raw_cache.source_fingerprint(DATA_DIR / "fraudTrain.csv")
+    lineage.log_params({
+        'sample_size': SAMPLE_SIZE,
+        'random_state': RANDOM_STATE,
+        'snapshot_window_days': SNAPSHOT_WINDOW_DAYS,
+        'entity_key_type': ENTITY_KEY_TYPE,
+        'source.size': source['size'],
+        'source.sample_hash': source['sample_hash'],
+    })
+    # 학습 데이터셋 run에서 같은 키로 빌드를 찾을 수 있도록 단계 키를 파라미터로 기록
+    lineage.log_params({f"build.{name}": key[:16] for name, key in keys.items()})
+    lineage.log_metrics({f"rows.{name}": len(df) for name, df in data_dict.items()})
+    lineage.log_profiler(profiler)
+    lineage.flush()
+
+    lineage.log_artifact(report_path, "profiles")
+    lineage.log_dict({
+        'stage_keys': keys,
+        'source': source,
+        'tables': {name: {'rows': len(df), 'columns': {c: str(t) for c, t in df.dtypes.items()}}
+                   for name, df in data_dict.items()},
+    }, "lineage.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fraud Detection 데이터 전처리")
+    parser.add_argument('--target', action='append', choices=TABLES,
+                        help="생성할 테이블 (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument('--jobs', type=int, default=4, help="동시에 실행할 단계 수 (2 이상이면 단계마다 별도 프로세스, 1이면 순서대로 실행)")
+    parser.add_argument('--no-cache', action='store_true', help="단계 캐시를 무시하고 모두 다시 실행 (결과로 캐시 갱신)")
+    parser.add_argument('--trace-alloc', action='store_true',
+                        help="단계별 tracemalloc 할당 추적 (느려지므로 메모리 분석용 실행에서만 사용)")
+    parser.add_argument('--key-type', choices=KEY_TYPES, default=ENTITY_KEY_TYPE,
+                        help="엔티티 키 타입 (string: MD5 문자열 키, int: 키 사전 기반 int64, "
+                             "기본: feast/feature_store.yaml의 entity_key_type)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global ENTITY_KEY_TYPE
+    args = parse_args(argv)
+    targets = args.target or TABLES
+    if args.key_type != ENTITY_KEY_TYPE:
+        print(f"Warning: --key-type {args.key_type}이(가) feature_store.yaml의 entity_key_type "
+              f"({ENTITY_KEY_TYPE})과 다릅니다. feast apply 전에 설정을 맞추세요")
+    # 단계 코드 해시에 포함되므로 키 타입이 바뀌면 단계가 다시 실행됨
+    ENTITY_KEY_TYPE = args.key_type
+
     print("=" * 60)
     print("Fraud Detection 데이터 전처리 시작")
     print("=" * 60)
 
-    # 데이터 로드 및 샘플링
-    df = load_and_sample_data()
-
-    # 테이블별 데이터 생성
-    transactions = prepare_transactions(df)
-    user_demographics = prepare_user_demographics(df)
-    user_features = compute_user_features(df)
-    merchant_features = prepare_merchant_features(df)
-    category_features = prepare_category_features(df)
-
-    data_dict = {
-        'transactions': transactions,
-        'user_demographics': user_demographics,
-        'user_features': user_features,
-        'merchant_features': merchant_features,
-        'category_features': category_features,
-    }
-
-    # CSV 저장
-    save_to_csv(data_dict)
-
-    # SQL 스크립트 생성
-    generate_sql_load_script(data_dict)
+    profiler = StageProfiler("prepare_fraud_data", trace_memory=args.trace_alloc or None)
+    profiler.meta.update({'sample_size': SAMPLE_SIZE, 'random_state': RANDOM_STATE,
+                          'targets': targets, 'jobs': args.jobs, 'entity_key_type': ENTITY_KEY_TYPE})
+
+    with LineageLogger("prepare_fraud_data", tags={'mmp.kind': 'data_build'}) as lineage:
+        # 단계 DAG 실행 (입력/코드가 바뀌지 않은 단계는 캐시 사용)
+        print("\nStage plan:")
+        pipeline = build_pipeline(profiler, use_cache=not args.no_cache)
+        with_stats = all(name in targets for name in STATS_INPUTS)
+        data_dict, keys = pipeline.run(targets + [STATS_STAGE] if with_stats else targets, jobs=args.jobs)
+        stats_frame = data_dict.pop(STATS_STAGE, None)
+        profiler.meta['stage_keys'] = keys
+
+        # 내용이 바뀐 테이블만 CSV로 저장
+        manifest = json.loads(BUILD_MANIFEST.read_text()) if BUILD_MANIFEST.exists() else {}
+        changed = {
+            name: df for name, df in data_dict.items()
+            if manifest.get(name) != keys[name] or not (OUTPUT_DIR / f"{name}.csv").exists()
+        }
+        if changed:
+            with profiler.stage('save_to_csv', rows_in=changed) as stage:
+                save_to_csv(changed)
+                stage.set_rows(rows_out=changed)
+            manifest.update({name: keys[name] for name in changed})
+            BUILD_MANIFEST.write_text(json.dumps(manifest, indent=2))
+        else:
+            print("\nCSV 변경 없음 (모든 대상 테이블이 최신)")
+
+        # 분포 통계 저장 / 이전 빌드와 비교
+        if stats_frame is not None and (manifest.get(STATS_STAGE) != keys[STATS_STAGE] or not FEATURE_STATS.exists()):
+            drifted = save_feature_stats(stats_frame, keys[STATS_STAGE], manifest.get(STATS_STAGE))
+            if drifted is not None:
+                lineage.log_metrics({'drift.features': drifted})
+            manifest[STATS_STAGE] = keys[STATS_STAGE]
+            BUILD_MANIFEST.write_text(json.dumps(manifest, indent=2))
+
+        # manifest / 통계 파일은 이후 바뀌지 않으므로 SQL 스크립트 생성과 겹쳐 업로드
+        lineage.log_artifact(BUILD_MANIFEST)
+        if FEATURE_STATS.exists():
+            lineage.log_artifact(FEATURE_STATS)
+
+        # SQL 스크립트 생성
+        with profiler.stage('generate_sql_load_script'):
+            generate_sql_load_script(data_dict)
+
+        profiler.print_summary()
+        report_path = profiler.write_report()
+        print(f"\n프로파일 리포트: {report_path}")
+
+        log_build_lineage(lineage, profiler, data_dict, keys, report_path)
 
     print("\n" + "=" * 60)
     print("전처리 완료!")
@@ -394,6 +612,8 @@ def main():
     print("1. Docker Compose로 PostgreSQL 시작")
     print("2. create_tables.sql 실행")
     print("3. CSV 파일을 COPY 명령으로 로드")
+    if ENTITY_KEY_TYPE == 'int':
+        print("4. feast/feature_store.yaml의 entity_key_type: int 확인 후 feast apply (Entity 값 타입 INT64)")
 
 
 if __name__ == "__main__":
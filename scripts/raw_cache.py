@@ -0,0 +1,110 @@
+"""
+원본 Kaggle CSV의 Arrow(Feather) 캐시
+
+최초 실행 시 CSV를 파싱하여 타임스탬프 컬럼(trans_date_trans_time, dob)까지
+타입이 확정된 비압축 Arrow IPC 파일로 저장하고, 이후 실행에서는 memory-map으로
+열어 zero-copy로 컬럼에 접근함. 캐시 키는 원본 파일의 크기/mtime과 앞뒤 1MiB의
+해시로 구성되어 원본이 바뀌면 자동으로 다시 만들어짐.
+
+pyarrow가 없으면 캐시 없이 pandas.read_csv로 동작함.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+CACHE_FORMAT_VERSION = 1
+TIMESTAMP_COLUMNS = ('trans_date_trans_time', 'dob')
+_HASH_CHUNK = 1 << 20
+
+
+def source_fingerprint(path: Path) -> Dict:
+    """원본 파일 식별 정보 (크기, mtime, 앞뒤 1MiB 해시)"""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(_HASH_CHUNK))
+        if stat.st_size > 2 * _HASH_CHUNK:
+            f.seek(-_HASH_CHUNK, os.SEEK_END)
+            digest.update(f.read(_HASH_CHUNK))
+    return {
+        'path': str(Path(path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sample_hash': digest.hexdigest(),
+        'format_version': CACHE_FORMAT_VERSION,
+    }
+
+
+def cache_key(fingerprint: Dict) -> str:
+    payload = json.dumps({k: v for k, v in fingerprint.items() if k != 'path'}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def default_cache_dir(source: Path) -> Path:
+    return Path(source).parent / "cache"
+
+
+def _parse_csv(source: Path) -> 'pa.Table':
+    """CSV를 Arrow 테이블로 파싱 (타임스탬프/날짜 타입 포함)"""
+    column_types = {name: pa.timestamp('s') for name in TIMESTAMP_COLUMNS}
+    table = pa_csv.read_csv(
+        source,
+        convert_options=pa_csv.ConvertOptions(column_types=column_types),
+    )
+    # pandas read_csv와 같은 이름으로 맞춤 (인덱스 컬럼)
+    names = ['Unnamed: 0' if name == '' else name for name in table.column_names]
+    return table.rename_columns(names)
+
+
+def load_raw_table(source: Path, cache_dir: Optional[Path] = None, verbose: bool = True) -> 'pa.Table':
+    """캐시된 Arrow 테이블을 memory-map으로 로드 (없거나 오래되면 새로 생성)"""
+    if pa is None:
+        raise ImportError("pyarrow가 필요합니다: pip install pyarrow")
+
+    source = Path(source)
+    cache_dir = Path(cache_dir) if cache_dir else default_cache_dir(source)
+    fingerprint = source_fingerprint(source)
+    cache_path = cache_dir / f"{source.stem}-{cache_key(fingerprint)}.arrow"
+
+    if not cache_path.exists():
+        if verbose:
+            print(f"Parsing {source.name} (Arrow 캐시 생성: {cache_path.name})...")
+        table = _parse_csv(source)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'mmp_source'] = json.dumps(fingerprint).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # 다른 실행과 충돌하지 않도록 임시 파일에 쓰고 원자적으로 교체
+        tmp_path = cache_path.with_suffix(f".tmp{os.getpid()}")
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, cache_path)
+
+        for stale in cache_dir.glob(f"{source.stem}-*.arrow"):
+            if stale != cache_path:
+                stale.unlink(missing_ok=True)
+    elif verbose:
+        print(f"Loading {source.name} from Arrow cache ({cache_path.name})...")
+
+    # 비압축 Feather는 memory-map 시 컬럼 버퍼를 복사하지 않음
+    return feather.read_table(cache_path, memory_map=True)
+
+
+def read_raw_csv(source: Path, cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """원본 CSV 전체를 pandas DataFrame으로 로드 (캐시 사용 가능 시 캐시 경유)"""
+    if pa is None:
+        print("Warning: pyarrow가 없어 Arrow 캐시 없이 CSV를 파싱합니다")
+        return pd.read_csv(source, parse_dates=list(TIMESTAMP_COLUMNS))
+    return load_raw_table(source, cache_dir).to_pandas()
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+거래 재생 부하 생성기 (스코어링 경로 온라인 피처 조회)
+
+data/processed/transactions.csv의 거래를 이벤트 시각 순서대로 재생하면서 거래마다
+user_id / merchant_id / category에 해당하는 온라인 피처 조회를 보냄.
+실제 트래픽과 같은 키 분포(핫 유저 포함)로 Redis와 서빙 계층의 용량을 산정하기 위한 도구.
+
+- 열린 루프(open loop): 각 요청은 예정 시각에 응답을 기다리지 않고 발사됨.
+  지연 시간은 예정 시각부터 측정하므로, 시스템이 밀려 요청이 늦게 나가면
+  그 대기 시간도 지연에 포함됨 (coordinated omission 방지)
+- 속도: --speedup (이벤트 시각 간격을 N배 압축) 또는 --qps (고정 초당 요청 수)
+- 조회 방식:
+  - store: feature_store.yaml에 설정된 online store의 online_read_async를
+           Feature View별로 동시에 호출 (Redis 직접 경로)
+  - feast: FeatureStore.get_online_features_async (서빙 계층 오버헤드 포함)
+- 구간(--interval)마다 처리량, 에러율, 미스율, p50/p99/max 출력, 종료 시 전체/뷰별 요약
+
+부하 생성기 자체는 이벤트 루프 하나(uvloop 설치 시 사용)에서 동작하므로, lag(예정 대비
+발사 지연)가 계속 커지면 생성기 CPU가 한계인 것. 이때는 --processes로 거래를
+라운드로빈으로 나눠 같은 시각 축에서 여러 프로세스로 재생함 (결과는 히스토그램 합산).
+
+사용 예:
+    python3 scripts/replay_load.py --speedup 86400 --limit 50000
+    python3 scripts/replay_load.py --qps 2000 --duration 60 --mode feast --output replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FEAST_REPO = Path(__file__).parent.parent / "feast"
+DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
+sys.path.insert(0, str(FEAST_REPO))  # feast/ 의 커스텀 online store 모듈
+
+# Feast 임포트
+try:
+    from feast import FeatureStore
+    from feast.infra.online_stores.helpers import get_online_store_from_config
+    from feast.protos.feast.types.EntityKey_pb2 import EntityKey as EntityKeyProto
+    from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+except ImportError:
+    print("Feast가 설치되어 있지 않습니다.")
+    print("설치: pip install feast[postgres]")
+    exit(1)
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# 스코어링 시 조회하는 Feature View와 엔티티 컬럼
+LOOKUP_VIEWS = {
+    'user_demographics': 'user_id',
+    'user_transaction_features': 'user_id',
+    'merchant_features': 'merchant_id',
+    'category_features': 'category',
+}
+
+
+class LatencyHistogram:
+    """로그 버킷 지연 시간 히스토그램 (1us ~ 100s, 버킷 폭 ~4.7%)"""
+
+    BUCKETS_PER_DECADE = 50
+    MIN_SECONDS = 1e-6
+    DECADES = 8
+
+    def __init__(self):
+        self.counts = np.zeros(self.BUCKETS_PER_DECADE * self.DECADES + 1, dtype=np.int64)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        index = int(math.log10(max(seconds, self.MIN_SECONDS) / self.MIN_SECONDS) * self.BUCKETS_PER_DECADE)
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: 'LatencyHistogram'):
+        self.counts += other.counts
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def percentile(self, q: float) -> float:
+        """q 분위수 (버킷 상한값, 초)"""
+        n = self.count
+        if n == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), math.ceil(n * q / 100)))
+        return min(self.MIN_SECONDS * 10 ** ((index + 1) / self.BUCKETS_PER_DECADE), self.max)
+
+    def summary(self) -> Dict:
+        n = self.count
+        return {
+            'count': n,
+            'mean_ms': self.total / n * 1000 if n else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p90_ms': self.percentile(90) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'p999_ms': self.percentile(99.9) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class WindowStats:
+    """측정 구간 하나의 카운터 (프로세스별 결과를 merge로 합산)"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.sent = 0
+        self.ok = 0
+        self.errors: Counter = Counter()
+        self.misses = 0
+        self.elapsed = 0.0
+        self.interval = 0.0
+        self.lag = 0.0
+        self.in_flight = 0
+
+    def merge(self, other: 'WindowStats'):
+        self.latency.merge(other.latency)
+        self.sent += other.sent
+        self.ok += other.ok
+        self.errors.update(other.errors)
+        self.misses += other.misses
+        self.elapsed = max(self.elapsed, other.elapsed)
+        self.interval = max(self.interval, other.interval)
+        self.lag = max(self.lag, other.lag)
+        self.in_flight += other.in_flight
+
+    def record(self) -> Dict:
+        done = self.ok + sum(self.errors.values())
+        return {
+            'elapsed_seconds': round(self.elapsed, 3),
+            'sent': self.sent,
+            'completed': done,
+            'qps': done / self.interval if self.interval else 0.0,
+            'error_rate': sum(self.errors.values()) / done if done else 0.0,
+            'miss_rate': self.misses / (self.ok * len(LOOKUP_VIEWS)) if self.ok else 0.0,
+            'errors': dict(self.errors),
+            'in_flight': self.in_flight,
+            'lag_seconds': self.lag,
+            **self.latency.summary(),
+        }
+
+
+def load_transactions(path: Path, limit: Optional[int] = None, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """이벤트 시각 순으로 정렬된 거래 (조회 키 + 이벤트 시각만)"""
+    if not path.exists():
+        print(f"Error: 거래 파일이 없습니다: {path}")
+        print("먼저 실행: python3 scripts/prepare_fraud_data.py")
+        exit(1)
+    df = pd.read_csv(path, usecols=['user_id', 'merchant_id', 'category', 'event_timestamp'],
+                     parse_dates=['event_timestamp'])
+    df = df.sort_values('event_timestamp', kind='stable')
+    if start is not None:
+        df = df[df['event_timestamp'] >= start]
+    if limit:
+        df = df.head(limit)
+    return df.reset_index(drop=True)
+
+
+def build_schedule(df: pd.DataFrame, speedup: Optional[float], qps: Optional[float]) -> np.ndarray:
+    """거래별 발사 시각 (시작 기준 초)"""
+    if qps:
+        return np.arange(len(df), dtype=np.float64) / qps
+    event_seconds = (df['event_timestamp'] - df['event_timestamp'].iloc[0]).dt.total_seconds().to_numpy()
+    return event_seconds / speedup
+
+
+def key_distribution(df: pd.DataFrame) -> Dict:
+    """엔티티 키 분포 (핫 키 비중)"""
+    result = {}
+    for column in ('user_id', 'merchant_id', 'category'):
+        counts = df[column].value_counts()
+        top = max(1, len(counts) // 100)
+        result[column] = {
+            'unique': int(len(counts)),
+            'top1pct_share': float(counts.iloc[:top].sum() / len(df)),
+            'hottest': str(counts.index[0]),
+            'hottest_count': int(counts.iloc[0]),
+        }
+    return result
+
+
+def _entity_value(value) -> 'ValueProto':
+    # int64 대리 키(entity_key_type: int)면 int64_val로 직렬화해야 같은 Redis 키가 됨
+    if isinstance(value, (int, np.integer)):
+        return ValueProto(int64_val=int(value))
+    return ValueProto(string_val=str(value))
+
+
+def _is_miss(timestamp, values) -> bool:
+    # 기본 Redis store는 키가 없어도 epoch 타임스탬프 + 빈 ValueProto를 돌려줌
+    return not values or not any(v.WhichOneof("val") for v in values.values())
+
+
+class ReplayRunner:
+    """열린 루프 재생 + 구간별 통계 수집"""
+
+    def __init__(self, store: FeatureStore, mode: str, timeout: float, max_in_flight: int, verbose: bool = True):
+        self.store = store
+        self.mode = mode
+        self.timeout = timeout
+        self.verbose = verbose
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.window = WindowStats()
+        self.total = WindowStats()
+        self.view_latency = {name: LatencyHistogram() for name in LOOKUP_VIEWS}
+        self.windows: List[WindowStats] = []
+        self.max_lag = 0.0
+
+        self.views = {name: store.get_feature_view(name) for name in LOOKUP_VIEWS}
+        self.feature_refs = [f"{name}:{f.name}" for name, view in self.views.items() for f in view.features]
+        if mode == 'store':
+            self.online_store = get_online_store_from_config(store.config.online_store)
+
+    async def _read_view(self, name: str, entity_value) -> bool:
+        """Feature View 하나 조회, 미스 여부 반환"""
+        t0 = time.perf_counter()
+        key = EntityKeyProto(join_keys=[LOOKUP_VIEWS[name]], entity_values=[_entity_value(entity_value)])
+        [(timestamp, values)] = await self.online_store.online_read_async(self.store.config, self.views[name], [key])
+        self.view_latency[name].record(time.perf_counter() - t0)
+        return _is_miss(timestamp, values)
+
+    async def _lookup(self, row) -> int:
+        """거래 하나의 전체 조회, 미스 난 Feature View 수 반환"""
+        if self.mode == 'store':
+            misses = await asyncio.gather(*(self._read_view(name, row[column])
+                                            for name, column in LOOKUP_VIEWS.items()))
+            return sum(misses)
+        response = await self.store.get_online_features_async(
+            features=self.feature_refs,
+            entity_rows=[{'user_id': row['user_id'], 'merchant_id': row['merchant_id'], 'category': row['category']}],
+            full_feature_names=True,
+        )
+        result = response.to_dict()
+        return sum(1 for name, view in self.views.items()
+                   if all(result[f"{name}__{f.name}"][0] is None for f in view.features))
+
+    async def _fire(self, row, scheduled: float):
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                misses = await asyncio.wait_for(self._lookup(row), self.timeout)
+            # 예정 시각 기준 지연 (큐 대기 포함)
+            self.window.latency.record(time.perf_counter() - scheduled)
+            self.window.misses += misses
+            self.window.ok += 1
+        except asyncio.TimeoutError:
+            self.window.errors['timeout'] += 1
+        except Exception as e:
+            self.window.errors[type(e).__name__] += 1
+        finally:
+            self.in_flight -= 1
+
+    def _close_window(self, elapsed: float, interval: float, lag: float):
+        w = self.window
+        self.window = WindowStats()
+        w.elapsed, w.interval, w.lag, w.in_flight = elapsed, interval, lag, self.in_flight
+        self.total.merge(w)
+        self.windows.append(w)
+        if self.verbose:
+            print_window(w.record())
+
+    async def run(self, df: pd.DataFrame, schedule: np.ndarray, interval: float,
+                  duration: Optional[float], start_at: float):
+        """start_at(wall clock)부터 schedule대로 발사 (프로세스 간 시작 시각 정렬)"""
+        rows = df[['user_id', 'merchant_id', 'category']].to_dict('records')
+        start = time.perf_counter() + max(0.0, start_at - time.time())
+        await asyncio.sleep(max(0.0, start - time.perf_counter()))
+
+        tasks = set()
+        next_report = interval
+        for row, offset in zip(rows, schedule):
+            if duration and offset > duration:
+                break
+            now = time.perf_counter() - start
+            while now >= next_report:
+                self._close_window(next_report, interval, max(0.0, now - offset))
+                next_report += interval
+            if offset > now:
+                await asyncio.sleep(offset - now)
+            else:
+                self.max_lag = max(self.max_lag, now - offset)
+                if self.window.sent % 256 == 0:
+                    await asyncio.sleep(0)  # 밀린 경우에도 응답 처리 기회를 줌
+
+            task = asyncio.ensure_future(self._fire(row, start + offset))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            self.window.sent += 1
+
+        while tasks:
+            await asyncio.sleep(min(interval, max(0.0, start + next_report - time.perf_counter())))
+            now = time.perf_counter() - start
+            if now >= next_report:
+                self._close_window(next_report, interval, 0.0)
+                next_report += interval
+        elapsed = time.perf_counter() - start
+        if self.window.sent or self.window.ok or self.window.errors:
+            self._close_window(elapsed, max(elapsed - (next_report - interval), 1e-9), 0.0)
+        return elapsed
+
+
+def replay_partition(repo_path: str, mode: str, timeout: float, max_in_flight: int, df: pd.DataFrame,
+                     schedule: np.ndarray, interval: float, duration: Optional[float], start_at: float,
+                     verbose: bool) -> Dict:
+    """프로세스 하나의 재생 (구간/전체 통계를 병합 가능한 형태로 반환)"""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    store = FeatureStore(repo_path=repo_path)
+
+    async def replay():
+        runner = ReplayRunner(store, mode, timeout, max_in_flight, verbose)
+        elapsed = await runner.run(df, schedule, interval, duration, start_at)
+        return runner, elapsed
+
+    runner, elapsed = asyncio.run(replay())
+    return {
+        'windows': runner.windows,
+        'total': runner.total,
+        'view_latency': runner.view_latency,
+        'max_lag': runner.max_lag,
+        'elapsed': elapsed,
+    }
+
+
+def merge_partitions(parts: List[Dict]) -> Dict:
+    """프로세스별 결과를 구간 순서대로 합산 (히스토그램은 버킷 단위로 정확히 합쳐짐)"""
+    merged = parts[0]
+    for part in parts[1:]:
+        for i, window in enumerate(part['windows']):
+            if i < len(merged['windows']):
+                merged['windows'][i].merge(window)
+            else:
+                merged['windows'].append(window)
+        merged['total'].merge(part['total'])
+        for name, histogram in part['view_latency'].items():
+            merged['view_latency'][name].merge(histogram)
+        merged['max_lag'] = max(merged['max_lag'], part['max_lag'])
+        merged['elapsed'] = max(merged['elapsed'], part['elapsed'])
+    return merged
+
+
+def summarize(result: Dict) -> Dict:
+    t, elapsed = result['total'], result['elapsed']
+    done = t.ok + sum(t.errors.values())
+    return {
+        'elapsed_seconds': elapsed,
+        'sent': t.sent,
+        'completed': done,
+        'achieved_qps': done / elapsed if elapsed else 0.0,
+        'error_rate': sum(t.errors.values()) / done if done else 0.0,
+        'miss_rate': t.misses / (t.ok * len(LOOKUP_VIEWS)) if t.ok else 0.0,
+        'errors': dict(t.errors),
+        'max_lag_seconds': result['max_lag'],
+        'latency': t.latency.summary(),
+        'views': {name: h.summary() for name, h in result['view_latency'].items() if h.count},
+    }
+
+
+def print_window_header():
+    print(f"{'elapsed':>8} {'sent':>8} {'qps':>9} {'errors':>7} {'misses':>7} "
+          f"{'p50(ms)':>8} {'p99(ms)':>8} {'max(ms)':>9} {'inflight':>7} {'lag(s)':>7}")
+
+
+def print_window(record: Dict):
+    print(f"{record['elapsed_seconds']:>7.1f}s {record['sent']:>8,} {record['qps']:>9,.0f} "
+          f"{record['error_rate']:>7.2%} {record['miss_rate']:>7.2%} {record['p50_ms']:>8.2f} "
+          f"{record['p99_ms']:>8.2f} {record['max_ms']:>9.2f} {record['in_flight']:>7,} {record['lag_seconds']:>7.2f}")
+
+
+def print_summary(summary: Dict, distribution: Dict):
+    print("\n" + "=" * 60)
+    print("재생 결과 요약")
+    print("=" * 60)
+    print(f"  요청: {summary['sent']:,}건 / {summary['elapsed_seconds']:.1f}s "
+          f"(달성 {summary['achieved_qps']:,.0f} qps)")
+    print(f"  에러율: {summary['error_rate']:.3%} {summary['errors'] or ''}")
+    print(f"  미스율: {summary['miss_rate']:.3%} (Feature View 조회 기준)")
+    print(f"  최대 스케줄 지연: {summary['max_lag_seconds']:.3f}s")
+    lat = summary['latency']
+    print(f"  지연(ms): p50={lat['p50_ms']:.2f} p90={lat['p90_ms']:.2f} p99={lat['p99_ms']:.2f} "
+          f"p99.9={lat['p999_ms']:.2f} max={lat['max_ms']:.2f}")
+    for name, view in summary['views'].items():
+        print(f"    {name:<28} p50={view['p50_ms']:.2f} p99={view['p99_ms']:.2f} max={view['max_ms']:.2f}")
+    print("\n  키 분포:")
+    for column, d in distribution.items():
+        print(f"    {column:<12} 고유 {d['unique']:>7,}개, 상위 1% 비중 {d['top1pct_share']:.1%}, "
+              f"최다 {d['hottest']} ({d['hottest_count']:,}건)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="거래 재생 온라인 피처 조회 부하 생성기")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--speedup", type=float, default=3600.0,
+                      help="이벤트 시각 압축 배수 (기본 3600: 1시간 분량을 1초에)")
+    pace.add_argument("--qps", type=float, help="고정 초당 요청 수 (이벤트 간격 무시)")
+    parser.add_argument("--input", default=str(DATA_DIR / "transactions.csv"))
+    parser.add_argument("--start", type=pd.Timestamp, help="재생 시작 이벤트 시각")
+    parser.add_argument("--limit", type=int, help="재생할 최대 거래 수")
+    parser.add_argument("--duration", type=float, help="최대 재생 시간 (초)")
+    parser.add_argument("--mode", choices=['store', 'feast'], default='store')
+    parser.add_argument("--interval", type=float, default=5.0, help="통계 출력 간격 (초)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="요청 타임아웃 (초)")
+    parser.add_argument("--max-in-flight", type=int, default=24,
+                        help="동시 진행 거래 상한 (거래당 Feature View 수만큼 연결 사용, Feast async Redis 풀 기본 "
+                             "100개 안쪽으로 유지. 초과분은 대기열에서 기다리며 지연에 포함됨)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="부하 생성 프로세스 수 (이벤트 루프 하나의 CPU 한계를 넘는 부하용)")
+    parser.add_argument("--output", help="구간별/전체 결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    df = load_transactions(Path(args.input), args.limit, args.start)
+    if df.empty:
+        print("재생할 거래가 없습니다.")
+        return
+    schedule = build_schedule(df, args.speedup, args.qps)
+    distribution = key_distribution(df)
+    pace = f"{args.qps:,.0f} qps" if args.qps else f"speedup x{args.speedup:,.0f}"
+    print(f"거래 {len(df):,}건 재생 ({pace}, 예정 {schedule[-1]:.1f}s, mode={args.mode})")
+
+    print_window_header()
+    start_at = time.time() + 1.0
+    common = (str(FEAST_REPO), args.mode, args.timeout, args.max_in_flight)
+    if args.processes <= 1:
+        result = replay_partition(*common, df, schedule, args.interval, args.duration, start_at, True)
+    else:
+        # 거래를 라운드로빈으로 나눠 같은 시각 축에서 재생, 구간 통계는 종료 후 합산 출력
+        start_at += 5.0  # 프로세스별 Feast 초기화 시간
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            futures = [pool.submit(replay_partition, *common, df.iloc[p::args.processes],
+                                   schedule[p::args.processes], args.interval, args.duration, start_at, False)
+                       for p in range(args.processes)]
+            result = merge_partitions([f.result() for f in futures])
+        for window in result['windows']:
+            print_window(window.record())
+
+    summary = summarize(result)
+    print_summary(summary, distribution)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'config': {k: (str(v) if isinstance(v, pd.Timestamp) else v) for k, v in vars(args).items()},
+            'measured_at': datetime.now().isoformat(timespec="seconds"),
+            'key_distribution': distribution,
+            'summary': summary,
+            'windows': [w.record() for w in result['windows']],
+        }, indent=2, default=str))
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+PostgreSQL / Redis 공용 커넥션 풀
+
+dev-contract.yml에 명시된 환경 변수(POSTGRES_*, REDIS_*, MLFLOW_TRACKING_URI)를
+.env와 함께 한 번만 읽고, 스레드 간에 공유 가능한 커넥션 풀을 제공함.
+
+- PostgreSQL: psycopg2 ThreadedConnectionPool + 세마포어 (풀이 가득 차면 에러 대신
+  timeout까지 대기), 오래 쉰 연결은 꺼낼 때 SELECT 1로 확인 후 재사용 (끊어진 연결을
+  발견하면 정상 연결을 얻을 때까지 이후 연결도 모두 확인), 연결 단위 statement_timeout
+- Redis: BlockingConnectionPool (health_check_interval로 유휴 연결 확인)
+- 풀별 메트릭: checkout 수, 대기 시간 합계/최대, 에러, 폐기된 연결 수
+
+사용 예:
+    from service_clients import get_postgres_pool, get_redis
+
+    with get_postgres_pool().cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM features.user_features")
+
+    get_redis().hgetall(key)
+
+환경 변수 (계약 외 선택 항목):
+- PG_STATEMENT_TIMEOUT_MS: 쿼리 타임아웃 (기본 30000, 0이면 무제한)
+- PG_POOL_MAX / REDIS_POOL_MAX: 풀 최대 연결 수 (기본 8 / 16)
+"""
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import psycopg2
+    from psycopg2 import pool as pg_pool
+except ImportError:
+    psycopg2 = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+CONTRACT_PATH = PROJECT_DIR / "dev-contract.yml"
+ENV_PATH = PROJECT_DIR / ".env"
+
+# 계약 파일을 읽을 수 없을 때 사용하는 기본 목록
+DEFAULT_CONTRACT_VARIABLES = [
+    'POSTGRES_HOST', 'POSTGRES_PORT', 'POSTGRES_USER', 'POSTGRES_DB', 'POSTGRES_PASSWORD',
+    'REDIS_HOST', 'REDIS_PORT', 'MLFLOW_TRACKING_URI',
+]
+
+
+class PoolTimeout(Exception):
+    """풀에서 timeout 안에 연결을 얻지 못함"""
+
+
+def load_env_file(path: Path = ENV_PATH) -> Dict[str, str]:
+    """.env 파일을 읽어 os.environ에 없는 값만 채움 (test-integration.py와 같은 규칙)"""
+    loaded = {}
+    if not Path(path).exists():
+        return loaded
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                value = value.strip().strip('"').strip("'")
+                os.environ.setdefault(key.strip(), value)
+                loaded[key.strip()] = value
+    return loaded
+
+
+def contract_variables(path: Path = CONTRACT_PATH) -> List[str]:
+    """dev-contract.yml의 provides_env_variables"""
+    if yaml is None or not Path(path).exists():
+        return list(DEFAULT_CONTRACT_VARIABLES)
+    with open(path) as f:
+        contract = yaml.safe_load(f) or {}
+    return list(contract.get('provides_env_variables', DEFAULT_CONTRACT_VARIABLES))
+
+
+@dataclass(frozen=True)
+class ServiceSettings:
+    """계약 환경 변수에서 읽은 접속 정보"""
+    postgres_host: str
+    postgres_port: int
+    postgres_user: str
+    postgres_db: str
+    postgres_password: Optional[str]
+    redis_host: str
+    redis_port: int
+    mlflow_tracking_uri: Optional[str]
+    statement_timeout_ms: int
+    missing: tuple = ()
+
+    @property
+    def postgres_dsn(self) -> str:
+        parts = [f"host={self.postgres_host}", f"port={self.postgres_port}",
+                 f"dbname={self.postgres_db}", f"user={self.postgres_user}"]
+        if self.postgres_password:
+            parts.append(f"password={self.postgres_password}")
+        return " ".join(parts)
+
+
+_settings: Optional[ServiceSettings] = None
+_settings_lock = threading.Lock()
+
+
+def get_settings(reload: bool = False) -> ServiceSettings:
+    """접속 정보 (프로세스당 한 번만 .env/계약 파일을 읽음)"""
+    global _settings
+    with _settings_lock:
+        if _settings is None or reload:
+            load_env_file()
+            missing = tuple(v for v in contract_variables() if v not in os.environ)
+            _settings = ServiceSettings(
+                postgres_host=os.getenv('POSTGRES_HOST', 'localhost'),
+                postgres_port=int(os.getenv('POSTGRES_PORT', '5432')),
+                postgres_user=os.getenv('POSTGRES_USER', 'mluser'),
+                postgres_db=os.getenv('POSTGRES_DB', 'mlpipeline'),
+                postgres_password=os.getenv('POSTGRES_PASSWORD'),
+                redis_host=os.getenv('REDIS_HOST', 'localhost'),
+                redis_port=int(os.getenv('REDIS_PORT', '6379')),
+                mlflow_tracking_uri=os.getenv('MLFLOW_TRACKING_URI'),
+                statement_timeout_ms=int(os.getenv('PG_STATEMENT_TIMEOUT_MS', '30000')),
+                missing=missing,
+            )
+        return _settings
+
+
+class PoolStats:
+    """스레드 안전한 풀 메트릭"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.in_use = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def record_release(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'in_use': self.in_use,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+
+
+class PostgresPool:
+    """스레드 안전한 PostgreSQL 커넥션 풀"""
+
+    def __init__(self, settings: Optional[ServiceSettings] = None, minconn: int = 1,
+                 maxconn: Optional[int] = None, statement_timeout_ms: Optional[int] = None,
+                 health_check_after: float = 30.0, acquire_timeout: float = 30.0,
+                 application_name: str = "mmp-local-dev"):
+        if psycopg2 is None:
+            raise ImportError("psycopg2가 필요합니다: pip install psycopg2-binary")
+        self.settings = settings or get_settings()
+        self.maxconn = maxconn or int(os.getenv('PG_POOL_MAX', '8'))
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self.stats = PoolStats()
+
+        timeout = self.settings.statement_timeout_ms if statement_timeout_ms is None else statement_timeout_ms
+        self._pool = pg_pool.ThreadedConnectionPool(
+            minconn, self.maxconn, self.settings.postgres_dsn,
+            options=f"-c statement_timeout={int(timeout)}",
+            application_name=application_name,
+        )
+        # ThreadedConnectionPool은 가득 차면 PoolError를 던지므로 세마포어로 대기시킴
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._last_used: Dict[int, float] = {}
+        self._last_used_lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """연결 대여. 정상 종료 시 commit, 예외 시 rollback 후 반납"""
+        t0 = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout if timeout is None else timeout):
+            self.stats.incr('timeouts')
+            raise PoolTimeout(f"PostgreSQL 풀 대기 시간 초과 (max={self.maxconn})")
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            self.stats.incr('errors')
+            raise
+        self.stats.record_checkout(time.perf_counter() - t0)
+
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            self.stats.incr('errors')
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            with self._last_used_lock:
+                if conn.closed:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn, close=bool(conn.closed))
+            self.stats.record_release()
+            self._slots.release()
+
+    @contextmanager
+    def cursor(self, timeout: Optional[float] = None):
+        with self.connection(timeout) as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    def _checkout(self):
+        """확인을 통과한 연결 반환
+
+        끊어진 연결을 하나 발견하면 (서버 재시작 등) 풀의 나머지 유휴 연결도 죽었을 가능성이
+        높으므로, 이후 꺼내는 연결은 유휴 시간과 관계없이 모두 확인함. 유휴 연결은 최대
+        maxconn개이므로 그 안에 새 연결이 열리며, 새 연결도 확인에 실패하면 OperationalError.
+        """
+        suspect = False
+        for _ in range(self.maxconn + 1):
+            conn = self._pool.getconn()
+            now = time.monotonic()
+            with self._last_used_lock:
+                idle = now - self._last_used.get(id(conn), now)
+            verify = suspect or idle > self.health_check_after
+            if not conn.closed and (not verify or self._ping(conn)):
+                return conn
+            # 끊어진 연결은 폐기하고 다음 연결(유휴 연결이 없으면 새 연결)을 확인
+            suspect = True
+            self.stats.incr('discarded')
+            with self._last_used_lock:
+                self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError(f"PostgreSQL에 정상 연결을 얻지 못했습니다 ({self.maxconn + 1}회 시도)")
+
+    @staticmethod
+    def _ping(conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def close(self):
+        if not self._pool.closed:
+            self._pool.closeall()
+
+
+if redis is not None:
+    class _InstrumentedRedisPool(redis.BlockingConnectionPool):
+        """연결 대여 대기 시간/에러를 기록하는 BlockingConnectionPool"""
+
+        def __init__(self, *args, stats: PoolStats, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.stats = stats
+            # 연결 실패 시 get_connection 내부에서도 release가 호출되므로 대여 중인 연결만 집계
+            self._leased = set()
+
+        def get_connection(self, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                connection = super().get_connection(*args, **kwargs)
+            except redis.ConnectionError as e:
+                self.stats.incr('timeouts' if 'No connection available' in str(e) else 'errors')
+                raise
+            self.stats.record_checkout(time.perf_counter() - t0)
+            self._leased.add(id(connection))
+            return connection
+
+        def release(self, connection):
+            super().release(connection)
+            if id(connection) in self._leased:
+                self._leased.discard(id(connection))
+                self.stats.record_release()
+
+
+class RedisPool:
+    """스레드 안전한 Redis 커넥션 풀 (클라이언트 하나를 모든 스레드가 공유)"""
+
+    def __init__(self, settings: Optional[ServiceSettings] = None, max_connections: Optional[int] = None,
+                 acquire_timeout: float = 30.0, health_check_interval: int = 30,
+                 socket_timeout: float = 5.0, db: int = 0):
+        if redis is None:
+            raise ImportError("redis가 필요합니다: pip install redis")
+        self.settings = settings or get_settings()
+        self.max_connections = max_connections or int(os.getenv('REDIS_POOL_MAX', '16'))
+        self.stats = PoolStats()
+        self._pool = _InstrumentedRedisPool(
+            host=self.settings.redis_host, port=self.settings.redis_port, db=db,
+            max_connections=self.max_connections, timeout=acquire_timeout,
+            health_check_interval=health_check_interval,
+            socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout,
+            stats=self.stats,
+        )
+        self.client = redis.Redis(connection_pool=self._pool)
+
+    def close(self):
+        self._pool.disconnect()
+
+
+_pools: Dict[str, object] = {}
+_pools_lock = threading.Lock()
+
+
+def get_postgres_pool(**kwargs) -> PostgresPool:
+    """프로세스 공용 PostgreSQL 풀 (최초 호출 시 생성, 이후 kwargs 무시)"""
+    with _pools_lock:
+        if 'postgres' not in _pools:
+            _pools['postgres'] = PostgresPool(**kwargs)
+        return _pools['postgres']
+
+
+def get_redis_pool(**kwargs) -> RedisPool:
+    """프로세스 공용 Redis 풀 (최초 호출 시 생성, 이후 kwargs 무시)"""
+    with _pools_lock:
+        if 'redis' not in _pools:
+            _pools['redis'] = RedisPool(**kwargs)
+        return _pools['redis']
+
+
+def get_redis() -> 'redis.Redis':
+    return get_redis_pool().client
+
+
+def pool_metrics() -> Dict[str, Dict]:
+    """생성된 공용 풀의 메트릭"""
+    with _pools_lock:
+        return {name: p.stats.snapshot() for name, p in _pools.items()}
+
+
+@atexit.register
+def close_pools():
+    with _pools_lock:
+        for p in _pools.values():
+            p.close()
+        _pools.clear()
@@ -0,0 +1,127 @@
+"""
+시간에 따라 변하는 집계 피처의 일별 스냅샷 엔진
+
+키(merchant_id, category 등)별 거래 통계를 일 단위로 집계한 뒤 그룹 누적합
+(또는 최근 N일 롤링 윈도우)으로 스냅샷을 만듦. 키별 반복문 없이 groupby 연산만
+사용하므로 전체 데이터셋에도 그대로 적용 가능.
+
+- 누적 모드: 해당 일자까지의 모든 거래 통계
+- 윈도우 모드: 최근 N일 (d-N, d] 거래 통계. 거래가 윈도우를 벗어나는 날에도
+  스냅샷을 만들어 만료된 값이 남지 않게 함
+- 값이 바뀐 스냅샷만 출력하여 테이블을 작게 유지
+- created_at은 당일 거래가 모두 반영된 다음 날 0시 (사용자 피처와 동일한 규칙)
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SUM_STATS = ['count', 'sum', 'sumsq', 'fraud']
+SNAPSHOT_COLUMNS = ['count', 'mean', 'std', 'min', 'max', 'fraud_count', 'fraud_rate']
+
+
+def daily_stats(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """(key, day)별 거래 수/합/제곱합/최소/최대/사기 건수"""
+    ts = pd.to_datetime(df['trans_date_trans_time'])
+    amount = df['amt'].astype('float64')
+    frame = pd.DataFrame({
+        key: df[key].to_numpy(),
+        'day': ts.dt.normalize().to_numpy(),
+        'amt': amount.to_numpy(),
+        'amt_sq': (amount * amount).to_numpy(),
+        'is_fraud': df['is_fraud'].to_numpy(),
+    })
+    return frame.groupby([key, 'day'], sort=True).agg(
+        count=('amt', 'size'),
+        sum=('amt', 'sum'),
+        sumsq=('amt_sq', 'sum'),
+        min=('amt', 'min'),
+        max=('amt', 'max'),
+        fraud=('is_fraud', 'sum'),
+    ).reset_index()
+
+
+def _cumulative(daily: pd.DataFrame, key: str) -> pd.DataFrame:
+    g = daily.groupby(key, sort=False)
+    out = daily[[key, 'day']].copy()
+    for col in SUM_STATS:
+        out[col] = g[col].cumsum()
+    out['min'] = g['min'].cummin()
+    out['max'] = g['max'].cummax()
+    return out
+
+
+def _windowed(daily: pd.DataFrame, key: str, window_days: int) -> pd.DataFrame:
+    # 거래일 + N일(만료일)에도 행을 추가하여 윈도우에서 빠지는 시점의 스냅샷 생성
+    last_day = daily['day'].max()
+    expiry = daily[[key, 'day']].assign(day=daily['day'] + pd.Timedelta(days=window_days))
+    expiry = expiry[expiry['day'] <= last_day]
+    combined = pd.concat([daily, expiry], ignore_index=True).groupby([key, 'day'], sort=True).agg(
+        count=('count', 'sum'), sum=('sum', 'sum'), sumsq=('sumsq', 'sum'),
+        fraud=('fraud', 'sum'), min=('min', 'min'), max=('max', 'max'),
+    ).reset_index()
+
+    rolling = combined.set_index('day').groupby(key, sort=False).rolling(f'{window_days}D', min_periods=1)
+    sums = rolling[SUM_STATS].sum()
+    mins = rolling['min'].min()
+    maxs = rolling['max'].max()
+
+    out = combined[[key, 'day']].copy()
+    for col in SUM_STATS:
+        out[col] = sums[col].to_numpy()
+    out['min'] = mins.to_numpy()
+    out['max'] = maxs.to_numpy()
+    # 롤링 합의 부동소수점 잔차 정리
+    out['count'] = out['count'].round().astype('int64')
+    out['fraud'] = out['fraud'].round().astype('int64')
+    empty = out['count'] == 0
+    out.loc[empty, ['sum', 'sumsq']] = 0.0
+    return out
+
+
+def build_daily_snapshots(df: pd.DataFrame, key: str, window_days: Optional[int] = None) -> pd.DataFrame:
+    """키별 일별 스냅샷 생성
+
+    Args:
+        df: 원본 거래 (key, trans_date_trans_time, amt, is_fraud 컬럼 필요)
+        key: 스냅샷 키 컬럼
+        window_days: None이면 누적 통계, 정수면 최근 N일 윈도우 통계
+
+    Returns:
+        key, SNAPSHOT_COLUMNS, created_at 컬럼의 DataFrame (값이 바뀐 스냅샷만)
+    """
+    daily = daily_stats(df, key)
+    stats = _windowed(daily, key, window_days) if window_days else _cumulative(daily, key)
+
+    n = stats['count'].to_numpy(dtype='float64')
+    total = stats['sum'].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n > 0, total / n, np.nan)
+        var = (stats['sumsq'].to_numpy() - total * mean) / (n - 1)
+        # pandas std(ddof=1)와 동일하게 표본이 1개 이하이면 NaN
+        std = np.where(n > 1, np.sqrt(np.clip(var, 0, None)), np.nan)
+        fraud_rate = np.where(n > 0, stats['fraud'].to_numpy() / n, np.nan)
+
+    snapshots = pd.DataFrame({
+        key: stats[key].to_numpy(),
+        'count': stats['count'].to_numpy(),
+        'mean': mean,
+        'std': std,
+        'min': stats['min'].to_numpy(),
+        'max': stats['max'].to_numpy(),
+        'fraud_count': stats['fraud'].to_numpy(),
+        'fraud_rate': fraud_rate,
+        'created_at': stats['day'] + pd.Timedelta(days=1),
+    })
+    return drop_unchanged(snapshots, key, SNAPSHOT_COLUMNS)
+
+
+def drop_unchanged(snapshots: pd.DataFrame, key: str, columns) -> pd.DataFrame:
+    """같은 키의 직전 스냅샷과 값이 모두 같은 행 제거 (key, created_at 정렬 가정)"""
+    values = snapshots[list(columns)]
+    prev = values.groupby(snapshots[key], sort=False).shift(1)
+    same = (values == prev) | (values.isna() & prev.isna())
+    first = ~snapshots[key].duplicated()
+    changed = first | ~same.all(axis=1)
+    return snapshots[changed.to_numpy()].reset_index(drop=True)
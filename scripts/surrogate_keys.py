@@ -0,0 +1,211 @@
+"""
+엔티티 키 생성 (문자열 해시 키 / 정수 대리 키)
+
+기본(string)은 원본 값(cc_num, merchant)의 MD5 앞 8자리에 접두어를 붙인
+'user_1a2b3c4d' 형태의 VARCHAR 키. 32비트로 잘린 해시라서 카드 수가 10만을 넘으면
+충돌 가능성이 무시할 수 없고, 조인/인덱스/Redis 키가 모두 문자열 비교와 저장 비용을 냄.
+
+int 모드는 영구 키 사전(data/keys/<엔티티>.csv)으로 원본 값마다 1부터 촘촘한
+int64 대리 키를 부여함:
+
+    digest  원본 값의 전체 MD5 (128비트, 원본 카드 번호는 저장하지 않음)
+    key     처음 등장한 빌드에서 부여된 정수 (이후 빌드에서도 바뀌지 않음)
+
+한 번에 새로 등장한 값들은 digest 순으로 번호를 받으므로, 같은 샘플에서 여러 단계가
+병렬로 키를 요청해도 결과가 같음. 사전을 지우면 키가 다시 매겨지므로 단계 캐시도
+함께 무시해야 함 (prepare_fraud_data.py --no-cache).
+
+키 타입은 feast/feature_store.yaml의 entity_key_type(string | int)으로 정하며,
+feast/features.py의 Entity 값 타입도 같은 설정을 읽음. 따라서 `feast apply`가 만드는
+레지스트리의 키 타입은 실행 환경과 관계없이 저장소 설정으로 결정됨.
+
+사용법:
+    python3 scripts/surrogate_keys.py show
+    python3 scripts/surrogate_keys.py lookup --entity user_id 2703186189652095
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+KEY_DIR = DATA_DIR / "keys"
+FEATURE_STORE_YAML = Path(__file__).parent.parent / "feast" / "feature_store.yaml"
+
+KEY_TYPES = ('string', 'int')
+
+# 엔티티 -> 문자열 키 접두어
+PREFIXES = {'user_id': 'user_', 'merchant_id': 'merch_'}
+STRING_KEY_HEX = 8
+
+# DDL 키 컬럼 타입
+SQL_TYPES = {'string': 'VARCHAR(20)', 'int': 'BIGINT'}
+
+
+def check_key_type(key_type: str) -> str:
+    if key_type not in KEY_TYPES:
+        raise ValueError(f"알 수 없는 엔티티 키 타입: {key_type} (가능: {', '.join(KEY_TYPES)})")
+    return key_type
+
+
+def repo_key_type(path: Path = FEATURE_STORE_YAML) -> str:
+    """feature_store.yaml의 entity_key_type (설정이 없으면 string)"""
+    if yaml is None:
+        raise ImportError("pyyaml이 필요합니다: pip install pyyaml")
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    return check_key_type(config.get('entity_key_type', 'string'))
+
+
+ENTITY_KEY_TYPE = repo_key_type()
+
+
+def digest(value) -> str:
+    """원본 값의 전체 MD5 (hex)"""
+    return hashlib.md5(str(value).encode()).hexdigest()
+
+
+def key_sql_type(key_type: str) -> str:
+    return SQL_TYPES[check_key_type(key_type)]
+
+
+def string_keys(values: pd.Series, prefix: str) -> pd.Series:
+    """문자열 해시 키 ('user_' + MD5 앞 8자리). 잘린 해시의 충돌은 경고만 출력"""
+    uniques = pd.unique(values)
+    mapping = {value: f"{prefix}{digest(value)[:STRING_KEY_HEX]}" for value in uniques}
+    n_keys = len(set(mapping.values()))
+    if n_keys < len(uniques):
+        print(f"  Warning: {prefix}* 키 충돌 {len(uniques) - n_keys:,}건 "
+              f"({len(uniques):,}개 값 -> {n_keys:,}개 키). entity_key_type: int 사용을 권장합니다")
+    return values.map(mapping)
+
+
+class KeyDictionary:
+    """원본 값 -> 정수 대리 키 영구 사전 (엔티티 하나)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._keys: Dict[str, int] = {}
+        if self.path.exists():
+            table = pd.read_csv(self.path, dtype={'digest': str, 'key': np.int64})
+            self._keys = dict(zip(table['digest'], table['key'].tolist()))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, value):
+        """원본 값의 키 (없으면 None)"""
+        return self._keys.get(digest(value))
+
+    @property
+    def next_key(self) -> int:
+        return max(self._keys.values(), default=0) + 1
+
+    def encode(self, values: Iterable, assign: bool = True) -> np.ndarray:
+        """원본 값들의 정수 키 (assign=True면 처음 보는 값에 새 키 부여 후 저장)"""
+        values = pd.Series(values)
+        uniques = pd.unique(values)
+        digests = {value: digest(value) for value in uniques}
+
+        with self._lock:
+            new = sorted({d for d in digests.values() if d not in self._keys})
+            if new:
+                if not assign:
+                    raise KeyError(f"키 사전({self.path.name})에 없는 값 {len(new):,}개")
+                start = self.next_key
+                self._keys.update({d: start + i for i, d in enumerate(new)})
+                self._save()
+            mapping = {value: self._keys[d] for value, d in digests.items()}
+
+        return values.map(mapping).to_numpy(dtype=np.int64)
+
+    def _save(self):
+        """임시 파일에 쓴 뒤 교체 (중간에 실패해도 기존 사전 유지)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        table = pd.DataFrame({'digest': list(self._keys), 'key': list(self._keys.values())})
+        tmp = self.path.with_suffix('.tmp')
+        table.sort_values('key').to_csv(tmp, index=False)
+        os.replace(tmp, self.path)
+
+
+_dictionaries: Dict[str, KeyDictionary] = {}
+_dictionaries_lock = threading.Lock()
+
+
+def get_dictionary(entity: str, key_dir: Path = KEY_DIR) -> KeyDictionary:
+    """엔티티별 키 사전 (프로세스 내 공유)"""
+    path = Path(key_dir) / f"{entity}.csv"
+    with _dictionaries_lock:
+        if str(path) not in _dictionaries:
+            _dictionaries[str(path)] = KeyDictionary(path)
+        return _dictionaries[str(path)]
+
+
+def dictionary_digest(entity: str, key_type: str = ENTITY_KEY_TYPE, key_dir: Path = KEY_DIR) -> Optional[str]:
+    """키 사전 파일 내용의 해시 (단계 캐시 키용, string 모드면 None)
+
+    사전을 지우거나 다시 만들면 해시가 바뀌므로 이전 사전으로 만든 캐시 아티팩트를 쓰지 않음.
+    사전이 없으면 실행마다 다른 값을 돌려주어 항상 새로 키를 부여하게 함 (지운 사전으로 만든
+    예전 아티팩트와 키가 겹치지 않도록).
+    """
+    path = Path(key_dir) / f"{entity}.csv"
+    if check_key_type(key_type) != 'int':
+        return None
+    if not path.exists():
+        return f"missing-{uuid.uuid4().hex}"
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def entity_keys(values: pd.Series, entity: str, key_type: str = ENTITY_KEY_TYPE) -> pd.Series:
+    """원본 값 -> 엔티티 키 (key_type에 따라 문자열 해시 키 또는 int64 대리 키)"""
+    if check_key_type(key_type) == 'int':
+        return pd.Series(get_dictionary(entity).encode(values), index=values.index, name=values.name)
+    return string_keys(values, PREFIXES[entity])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="엔티티 키 사전 조회")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('show', help="엔티티별 키 사전 크기")
+
+    p = sub.add_parser('lookup', help="원본 값의 엔티티 키 (문자열/정수)")
+    p.add_argument('--entity', choices=list(PREFIXES), default='user_id')
+    p.add_argument('values', nargs='+')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == 'show':
+        print(f"키 사전 디렉토리: {KEY_DIR} (entity_key_type={ENTITY_KEY_TYPE})")
+        for entity in PREFIXES:
+            dictionary = get_dictionary(entity)
+            status = f"{len(dictionary):,}개 키" if dictionary.path.exists() else "없음"
+            print(f"  {entity:<12} {status}")
+        return
+
+    dictionary = get_dictionary(args.entity)
+    values = pd.Series(args.values)
+    strings = string_keys(values, PREFIXES[args.entity])
+    for value, string_key in zip(args.values, strings):
+        key = dictionary.get(value)
+        print(f"  {value} -> {string_key} / {key if key is not None else '(사전에 없음)'}")
+
+
+if __name__ == "__main__":
+    main()
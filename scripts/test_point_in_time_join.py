@@ -8,10 +8,18 @@ Feast를 사용하여 거래 시점 기준으로 피처를 조회하는 테스
 """
 
 import pandas as pd
+import json
 import os
+import sys
 from pathlib import Path
 from datetime import datetime
 
+from dedup_retrieval import get_historical_features_dedup
+from export_training_dataset import MANIFEST_NAME, export_training_dataset, print_manifest
+from lineage import LineageLogger, dataset_digest
+from pipeline_profiler import StageProfiler
+from pit_validator import validate_point_in_time
+
 # Feast 임포트
 try:
     from feast import FeatureStore
@@ -25,6 +33,7 @@ SCRIPT_DIR = Path(__file__).parent
 PROJECT_DIR = SCRIPT_DIR.parent
 FEAST_REPO = PROJECT_DIR / "feast"
 DATA_DIR = PROJECT_DIR / "data" / "processed"
+sys.path.insert(0, str(FEAST_REPO))  # feast/ 의 커스텀 online store 모듈
 
 
 def load_entity_dataframe():
@@ -43,6 +52,42 @@ def load_entity_dataframe():
     return sample
 
 
+def log_training_lineage(lineage, profiler, features, result, report, output_path, report_path,
+                         split_manifest=None):
+    """피처 목록, 데이터셋 해시, 원본 빌드 키, 검증 결과를 MLflow에 기록
+
+    학습 데이터 CSV / 분할 manifest는 저장 직후 업로드를 예약하므로 여기서는 리포트만 업로드함.
+    """
+    if not lineage.enabled:
+        return
+    lineage.log_params({
+        'feature_refs': ",".join(features),
+        'feature_views': ",".join(sorted({ref.split(":")[0] for ref in features})),
+        'dataset.sha256': dataset_digest(result),
+        'dataset.path': str(output_path),
+    })
+    # prepare_fraud_data run의 build.* 파라미터와 같은 값으로 어떤 빌드에서 나온 데이터인지 연결
+    build_manifest_path = DATA_DIR / "build_manifest.json"
+    if build_manifest_path.exists():
+        build_manifest = json.loads(build_manifest_path.read_text())
+        lineage.log_params({f"build.{name}": key[:16] for name, key in build_manifest.items()})
+    lineage.log_metrics({
+        'rows': len(result),
+        'fraud_rows': int(result['is_fraud'].sum()),
+        'validation.failed_rows': report.n_failed,
+        **{f"validation.{status}": count for status, count in report.status_counts.items()},
+    })
+    if split_manifest is not None:
+        lineage.log_metrics({f"split.{name}.{key}": info[key]
+                             for name, info in split_manifest['splits'].items()
+                             for key in ('rows', 'fraud_rows')})
+    lineage.log_profiler(profiler)
+    lineage.flush()
+
+    lineage.log_artifact(report_path, "profiles")
+    lineage.log_dict({'feature_refs': features, 'columns': list(result.columns)}, "features.json")
+
+
 def test_point_in_time_join():
     """Point-in-Time Join 테스트"""
     print("=" * 60)
@@ -50,78 +95,109 @@ def test_point_in_time_join():
     print("=" * 60)
     print()
 
-    # Feature Store 초기화
-    print("Feature Store 초기화...")
-    store = FeatureStore(repo_path=str(FEAST_REPO))
-
-    # Entity DataFrame 로드
-    print("\nEntity DataFrame 로드...")
-    entity_df = load_entity_dataframe()
-
-    # Entity DataFrame 준비 (Feast 형식)
-    entity_df_for_feast = entity_df[['user_id', 'event_timestamp']].copy()
-
-    print("\n사용자 피처 조회 중...")
-    print("(각 거래 시점까지의 피처만 조회 - Point-in-Time 정확성)")
-
-    # Point-in-Time Join 수행
-    features = [
-        "user_transaction_features:total_transactions",
-        "user_transaction_features:avg_amount",
-        "user_transaction_features:transactions_7d",
-        "user_transaction_features:transactions_30d",
-        "user_transaction_features:fraud_count",
-        "user_demographics:age",
-        "user_demographics:city_pop",
-    ]
-
-    training_df = store.get_historical_features(
-        entity_df=entity_df_for_feast,
-        features=features,
-    ).to_df()
-
-    print(f"\n결과: {len(training_df)} 행")
-
-    # 결과 분석
-    print("\n" + "=" * 60)
-    print("Point-in-Time Join 결과 분석")
-    print("=" * 60)
-
-    # 원본 데이터와 조인
-    result = entity_df.merge(
-        training_df,
-        on=['user_id', 'event_timestamp'],
-        how='left'
-    )
-
-    print(f"\n컬럼: {list(result.columns)}")
-    print(f"\n피처 통계:")
-    feature_cols = [c for c in result.columns if c not in entity_df.columns]
-    print(result[feature_cols].describe())
-
-    # Point-in-Time 정확성 검증
-    print("\n" + "=" * 60)
-    print("Point-in-Time 정확성 검증")
-    print("=" * 60)
-
-    # 첫 번째 사용자의 거래 분석
-    first_user = result['user_id'].iloc[0]
-    user_txns = result[result['user_id'] == first_user].sort_values('event_timestamp')
-
-    print(f"\n사용자 '{first_user}'의 거래별 피처 변화:")
-    print("-" * 80)
-
-    for idx, row in user_txns.head(5).iterrows():
-        print(f"거래 시점: {row['event_timestamp']}")
-        print(f"  - 총 거래 횟수: {row.get('total_transactions', 'N/A')}")
-        print(f"  - 최근 7일 거래: {row.get('transactions_7d', 'N/A')}")
-        print(f"  - 평균 금액: ${row.get('avg_amount', 0):.2f}")
-        print()
-
-    # 학습 데이터 저장
-    output_path = DATA_DIR / "training_dataset.csv"
-    result.to_csv(output_path, index=False)
-    print(f"\n학습 데이터 저장: {output_path}")
+    profiler = StageProfiler("test_point_in_time_join")
+    with LineageLogger("test_point_in_time_join", tags={'mmp.kind': 'training_dataset'}) as lineage:
+        # Feature Store 초기화
+        print("Feature Store 초기화...")
+        with profiler.stage('init_feature_store'):
+            store = FeatureStore(repo_path=str(FEAST_REPO))
+
+        # Entity DataFrame 로드
+        print("\nEntity DataFrame 로드...")
+        with profiler.stage('load_entity_dataframe') as stage:
+            entity_df = load_entity_dataframe()
+            stage.set_rows(rows_out=entity_df)
+
+        # Entity DataFrame 준비 (Feast 형식)
+        entity_df_for_feast = entity_df[['user_id', 'event_timestamp']].copy()
+
+        print("\n사용자 피처 조회 중...")
+        print("(각 거래 시점까지의 피처만 조회 - Point-in-Time 정확성)")
+
+        # Point-in-Time Join 수행
+        features = [
+            "user_transaction_features:total_transactions",
+            "user_transaction_features:avg_amount",
+            "user_transaction_features:transactions_7d",
+            "user_transaction_features:transactions_30d",
+            "user_transaction_features:fraud_count",
+            "user_demographics:age",
+            "user_demographics:city_pop",
+        ]
+
+        # 같은 사용자 / 같은 스냅샷 구간의 행은 한 번만 PIT Join 후 원래 행으로 펼침
+        with profiler.stage('get_historical_features', rows_in=entity_df_for_feast) as stage:
+            training_df, dedup_report = get_historical_features_dedup(
+                store,
+                entity_df=entity_df_for_feast,
+                features=features,
+            )
+            stage.set_rows(rows_out=training_df)
+        dedup_report.print_report()
+        lineage.log_metrics({
+            'retrieval.rows': dedup_report.n_rows,
+            'retrieval.keys': dedup_report.n_keys,
+            'retrieval.reduction_ratio': dedup_report.reduction_ratio,
+        })
+
+        print(f"\n결과: {len(training_df)} 행")
+
+        # 결과 분석
+        print("\n" + "=" * 60)
+        print("Point-in-Time Join 결과 분석")
+        print("=" * 60)
+
+        # 원본 데이터와 조인
+        result = entity_df.merge(
+            training_df,
+            on=['user_id', 'event_timestamp'],
+            how='left'
+        )
+
+        print(f"\n컬럼: {list(result.columns)}")
+        print(f"\n피처 통계:")
+        feature_cols = [c for c in result.columns if c not in entity_df.columns]
+        print(result[feature_cols].describe())
+
+        # Point-in-Time 정확성 검증
+        print("\n" + "=" * 60)
+        print("Point-in-Time 정확성 검증")
+        print("=" * 60)
+
+        # 전체 행에 대해 as-of 스냅샷 일치 여부와 스냅샷 재계산 결과를 검증
+        snapshots = pd.read_csv(DATA_DIR / "user_features.csv", parse_dates=['created_at'])
+        transactions = pd.read_csv(DATA_DIR / "transactions.csv", parse_dates=['event_timestamp'])
+        with profiler.stage('validate_point_in_time', rows_in=training_df):
+            report = validate_point_in_time(training_df, snapshots, transactions)
+        report.print_report()
+        if report.ok:
+            print("\n누출 없음: 모든 행이 as-of 스냅샷과 일치합니다.")
+        else:
+            print(f"\n경고: {report.n_failed:,}개 행에서 Point-in-Time 불일치가 발견되었습니다.")
+
+        # 학습 데이터 저장
+        output_path = DATA_DIR / "training_dataset.csv"
+        with profiler.stage('save_training_dataset', rows_in=result) as stage:
+            result.to_csv(output_path, index=False)
+            stage.set_rows(rows_out=result)
+        print(f"\n학습 데이터 저장: {output_path}")
+        # 업로드는 백그라운드에서 이후 단계(분할 export)와 겹쳐 진행
+        lineage.log_artifact(output_path, "dataset")
+
+        # 시간 기준 train/val/test 분할 + Parquet 샤드 (멀티 워커 데이터 로더용)
+        dataset_dir = DATA_DIR / "training_dataset"
+        with profiler.stage('export_training_dataset', rows_in=result) as stage:
+            manifest = export_training_dataset(result, dataset_dir, meta={'source': str(output_path)})
+            stage.set_rows(rows_out=sum(info['rows'] for info in manifest['splits'].values()))
+        print(f"\n분할 데이터셋 저장: {dataset_dir}")
+        lineage.log_artifact(dataset_dir / MANIFEST_NAME, "dataset")
+        print_manifest(manifest)
+
+        profiler.print_summary()
+        report_path = profiler.write_report()
+        print(f"프로파일 리포트: {report_path}")
+
+        log_training_lineage(lineage, profiler, features, result, report, output_path, report_path, manifest)
 
     print("\n" + "=" * 60)
     print("테스트 완료!")
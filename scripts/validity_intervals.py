@@ -0,0 +1,133 @@
+"""
+스냅샷 테이블의 유효 구간(SCD2) 표현
+
+스냅샷 테이블(user_features 등)은 엔티티별 `created_at` 시점 값만 가지므로, as-of 조회는
+엔티티마다 "t 이하 최신 행"을 찾아야 함 (PostgreSQL에서는 정렬/윈도우 또는 상관 서브쿼리).
+빌더가 스냅샷마다 유효 구간을 함께 기록하면 PIT 조회가 구간 포함 조인이 됨:
+
+    valid_from    = created_at
+    valid_to      = 같은 엔티티의 다음 스냅샷 created_at (마지막 스냅샷은 NULL = 열린 구간)
+    valid_to_ttl  = LEAST(valid_to, created_at + ttl)  (ttl은 feast/features.py의 Feature View 정의)
+
+구간은 [valid_from, valid_to_ttl) 반열린 구간이며, 이벤트 시각 t를 포함하는 행이 엔티티당
+최대 하나이므로 인덱스로 바로 찾을 수 있음:
+
+    CREATE INDEX ... USING gist (user_id, tsrange(valid_from, valid_to_ttl));   -- btree_gist 필요
+    ... ON f.user_id = e.user_id AND tsrange(f.valid_from, f.valid_to_ttl) @> e.event_timestamp
+
+Feast는 `created_at >= t - ttl`(경계 포함)로 TTL을 적용하므로, t가 정확히 created_at + ttl인
+순간 한 점에서만 결과가 다름 (구간 조인은 미포함).
+"""
+
+import importlib
+import re
+import sys
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+FEAST_REPO = Path(__file__).parent.parent / "feast"
+
+VALIDITY_COLUMNS = ['valid_from', 'valid_to', 'valid_to_ttl']
+
+_FROM_TABLE = re.compile(r"\bFROM\s+(?:\w+\.)?(\w+)", re.IGNORECASE)
+
+
+def load_feature_views(repo: Path = FEAST_REPO) -> list:
+    """Feast 저장소의 features 모듈을 임포트하여 TTL이 있는 FeatureView 객체 목록 반환
+
+    feast가 없으면 경고 후 빈 목록.
+    """
+    repo = Path(repo)
+    if not (repo / "features.py").exists():
+        return []
+    try:
+        from feast import FeatureView
+    except ImportError:
+        print("Warning: feast가 설치되어 있지 않아 Feature View TTL을 읽지 못했습니다")
+        return []
+    if str(repo) not in sys.path:
+        sys.path.insert(0, str(repo))  # features.py가 같은 디렉터리의 모듈을 임포트함
+    features = importlib.import_module("features")
+    return [view for view in vars(features).values()
+            if isinstance(view, FeatureView) and view.ttl and view.batch_source is not None]
+
+
+def feature_view_ttls(repo: Path = FEAST_REPO) -> Dict[str, timedelta]:
+    """feast/features.py의 Feature View TTL을 소스 테이블 이름별로 반환
+
+    batch_source의 table 또는 query(FROM features.<테이블>)로 테이블을 찾음.
+    feast가 없으면 빈 dict (TTL 미적용).
+    """
+    ttls: Dict[str, timedelta] = {}
+    for view in load_feature_views(repo):
+        # PostgreSQLSource: table이면 그 이름, query면 "(SELECT ... FROM features.<테이블>)a"
+        match = _FROM_TABLE.search(f"FROM {view.batch_source.get_table_query_string()}")
+        if match:
+            ttls[match.group(1)] = view.ttl
+    return ttls
+
+
+def view_ttls(repo: Path = FEAST_REPO) -> Dict[str, timedelta]:
+    """feast/features.py의 Feature View TTL을 뷰 이름별로 반환 (feast가 없으면 빈 dict)"""
+    return {view.name: view.ttl for view in load_feature_views(repo)}
+
+
+def add_validity_intervals(df: pd.DataFrame, entity: str, ttl: Optional[timedelta] = None,
+                           timestamp_col: str = 'created_at') -> pd.DataFrame:
+    """스냅샷 테이블에 valid_from / valid_to / valid_to_ttl 컬럼 추가 (행 순서 유지)"""
+    df = df.copy()
+    created = pd.to_datetime(df[timestamp_col])
+    ordered = pd.DataFrame({'entity': df[entity], 'created': created}).sort_values(
+        ['entity', 'created'], kind='mergesort')
+    valid_to = ordered['created'].groupby(ordered['entity'], sort=False).shift(-1).reindex(df.index)
+
+    df['valid_from'] = created
+    df['valid_to'] = valid_to
+    if ttl is None:
+        df['valid_to_ttl'] = valid_to
+    else:
+        expires = created + pd.Timedelta(ttl)
+        # 마지막 스냅샷(NaT)은 created_at + ttl에서 닫힘
+        df['valid_to_ttl'] = valid_to.where(valid_to < expires, expires)
+    return df
+
+
+def interval_lookup(entity_df: pd.DataFrame, snapshots: pd.DataFrame, entity: str,
+                    feature_columns: List[str], event_col: str = 'event_timestamp') -> pd.DataFrame:
+    """구간 포함 조인의 pandas 구현 (valid_from <= t < valid_to_ttl, entity_df 행 순서 유지)
+
+    구간이 엔티티별로 겹치지 않으므로 valid_from 기준 as-of 후보 하나만 확인하면 됨.
+    """
+    left = entity_df[[entity, event_col]].reset_index(drop=True)
+    left['_row'] = left.index
+    right = snapshots[[entity, 'valid_from', 'valid_to_ttl'] + feature_columns].sort_values('valid_from', kind='mergesort')
+    joined = pd.merge_asof(
+        left.sort_values(event_col, kind='mergesort'), right,
+        left_on=event_col, right_on='valid_from', by=entity, direction='backward',
+    ).sort_values('_row').reset_index(drop=True)
+
+    expired = joined['valid_to_ttl'].notna() & (joined[event_col] >= joined['valid_to_ttl'])
+    joined.loc[expired, feature_columns] = None
+    return joined[[entity, event_col] + feature_columns]
+
+
+def interval_join_sql(table: str, entity: str, feature_columns: List[str],
+                      entity_table: str = 'entity_df', event_col: str = 'event_timestamp') -> str:
+    """구간 포함 조인 SQL (GiST 인덱스 (entity, tsrange(valid_from, valid_to_ttl)) 사용)"""
+    columns = ", ".join(f"f.{c}" for c in feature_columns)
+    return f"""
+        SELECT e.*, {columns}
+        FROM {entity_table} e
+        LEFT JOIN {table} f
+          ON f.{entity} = e.{entity}
+         AND tsrange(f.valid_from, f.valid_to_ttl) @> e.{event_col}
+    """
+
+
+def gist_index_sql(table: str, entity: str, index_name: Optional[str] = None) -> str:
+    """구간 포함 조인용 GiST 인덱스 DDL (btree_gist 확장 필요)"""
+    index_name = index_name or f"idx_{table.split('.')[-1]}_validity"
+    return f"CREATE INDEX {index_name} ON {table} USING gist ({entity}, tsrange(valid_from, valid_to_ttl))"
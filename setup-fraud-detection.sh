@@ -20,6 +20,9 @@ else
     echo "cp .env.example .env"
 fi
 
+# 모든 단계의 프로파일 리포트를 하나의 실행 ID로 묶음 (scripts/pipeline_profiler.py)
+export PIPELINE_RUN_ID="${PIPELINE_RUN_ID:-$(date +%Y%m%d_%H%M%S)}"
+
 # Step 1: Docker Compose 시작
 echo "[Step 1/5] Docker Compose 시작..."
 docker-compose up -d
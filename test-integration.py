@@ -19,6 +19,8 @@ import yaml  # PyYAML 필요
 from datetime import datetime
 from typing import Dict, List, Optional
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
 # 색상 정의
 class Colors:
     RED = '\033[0;31m'
@@ -122,41 +124,33 @@ class IntegrationTest:
         log_info("PostgreSQL 연결 테스트 중...")
         
         try:
-            import psycopg2
-            
-            # 연결 문자열 생성
-            conn_string = f"host={self.postgres_host} port={self.postgres_port} dbname={self.postgres_db} user={self.postgres_user} password={self.postgres_password}"
-            
-            # 연결 테스트
-            conn = psycopg2.connect(conn_string)
-            cursor = conn.cursor()
-            
-            # 기본 쿼리 테스트
-            cursor.execute("SELECT version();")
-            version = cursor.fetchone()
-            
-            log_success(f"PostgreSQL 연결 성공: {version[0][:50]}...")
-            
-            # 스키마 존재 확인
-            cursor.execute("SELECT schema_name FROM information_schema.schemata WHERE schema_name = 'features';")
-            schema_exists = cursor.fetchone()
-            
-            if schema_exists:
-                log_success("features 스키마 존재 확인")
-            else:
-                log_warning("features 스키마가 존재하지 않음")
-                return False
-            
-            # 테이블 존재 확인
-            tables = ['user_demographics', 'user_purchase_summary', 'product_details', 'session_summary']
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM features.{table};")
-                count = cursor.fetchone()[0]
-                log_success(f"테이블 {table}: {count}개 레코드")
-            
-            cursor.close()
-            conn.close()
-            
+            from service_clients import get_postgres_pool
+
+            # 공용 커넥션 풀에서 연결 대여 (반납 시 자동 commit)
+            with get_postgres_pool().cursor() as cursor:
+                # 기본 쿼리 테스트
+                cursor.execute("SELECT version();")
+                version = cursor.fetchone()
+
+                log_success(f"PostgreSQL 연결 성공: {version[0][:50]}...")
+
+                # 스키마 존재 확인
+                cursor.execute("SELECT schema_name FROM information_schema.schemata WHERE schema_name = 'features';")
+                schema_exists = cursor.fetchone()
+
+                if schema_exists:
+                    log_success("features 스키마 존재 확인")
+                else:
+                    log_warning("features 스키마가 존재하지 않음")
+                    return False
+
+                # 테이블 존재 확인
+                tables = ['user_demographics', 'user_purchase_summary', 'product_details', 'session_summary']
+                for table in tables:
+                    cursor.execute(f"SELECT COUNT(*) FROM features.{table};")
+                    count = cursor.fetchone()[0]
+                    log_success(f"테이블 {table}: {count}개 레코드")
+
             return True
             
         except ImportError:
@@ -171,10 +165,10 @@ class IntegrationTest:
         log_info("Redis 연결 테스트 중...")
         
         try:
-            import redis
+            from service_clients import get_redis
             
-            # Redis 클라이언트 생성
-            r = redis.Redis(host=self.redis_host, port=int(self.redis_port), decode_responses=True)
+            # 공용 커넥션 풀의 Redis 클라이언트
+            r = get_redis()
             
             # 연결 테스트
             response = r.ping()
@@ -189,7 +183,7 @@ class IntegrationTest:
             test_value = "test_integration_value"
             
             r.set(test_key, test_value)
-            retrieved_value = r.get(test_key)
+            retrieved_value = (r.get(test_key) or b"").decode()
             
             if retrieved_value == test_value:
                 log_success("Redis 읽기/쓰기 테스트 성공")
@@ -353,6 +347,15 @@ class IntegrationTest:
             print(f"{status} {test_name}")
         
         print(f"\n총 {total}개 테스트 중 {passed}개 통과 ({passed/total*100:.1f}%)")
+
+        # 커넥션 풀 메트릭 (대기 시간, checkout, 에러)
+        try:
+            from service_clients import pool_metrics
+            for name, stats in pool_metrics().items():
+                log_info(f"{name} 풀: checkouts={stats['checkouts']}, errors={stats['errors']}, "
+                         f"timeouts={stats['timeouts']}, wait_avg={stats['wait_seconds_avg'] * 1000:.2f}ms")
+        except ImportError:
+            pass
         
         if passed == total:
             log_success("🎉 모든 테스트 통과! mmp-local-dev가 계약을 준수하며 정상 동작 중입니다.")